@@ -1,270 +1,313 @@
 #!/usr/bin/env python3
 """
-Apply all corrections to states-data.json
+Apply a corrections patch file to states-data.json
+
+Corrections live in a JSON patch file (default: data/corrections.json) as a
+list of operations addressed by state and JSON-Pointer field path:
+
+    {"op": "add",     "state": "*",         "path": "/legal/penalties/punitiveDamages", "value": false}
+    {"op": "replace", "state": "Idaho",     "path": "/legal/penalties/statutoryDamages", "value": "$10,000"}
+    {"op": "append",  "state": "Arkansas",  "path": "/legal/idRequirementsExact", "value": "...",
+     "unless": {"contains": "framework"}}
+    {"op": "test",    "state": "TN",        "path": "/legal/tier", "value": 3}
+
+- add:     set the field only if it is missing
+- replace: set an existing field
+- append:  concatenate text to an existing string field
+- test:    precondition; the batch is aborted if the value differs
+
+"state" is a state name, an abbreviation, or "*" for every state. An
+"unless": {"contains": text} guard skips the operation when the field
+already contains that text. Operations that would not change anything are
+skipped, so re-applying a patch is a no-op.
+
+The batch is all-or-nothing: any failed precondition or bad path aborts it
+before anything is written. Otherwise the current dataset is saved as a
+snapshot (see snapshot_store.py; only records not already stored take new
+space) and then rewritten atomically. Records are streamed one at a
+time, so memory use does not grow with the dataset.
+
+States whose legal data changed are recorded in the rule history (see
+rule_history.py), dated by --effective, else the record's own
+legal.effectiveDate, else today. The dataset as it was before the patch is
+recorded first, so a new history starts from the uncorrected rules.
+
+Usage:
+    python apply_corrections.py [--patch data/corrections.json] [--dry-run] [dataset ...]
+    python apply_corrections.py --effective 2025-07-01   # date of the corrected rules in the history
+    python apply_corrections.py --no-history             # do not touch data/rule-history.json
+    python apply_corrections.py --dry-run --profile profile.json   # also write per-phase timings (see phase_profiler.py)
 """
+import argparse
 import json
+import os
 import sys
-
-# Load current data
-with open('data/states-data.json', 'r') as f:
-    states_data = json.load(f)
-
-# Create a dictionary for easy lookup
-states_dict = {state['state']: state for state in states_data}
-
-print("=" * 80)
-print("APPLYING CORRECTIONS TO states-data.json")
-print("=" * 80)
-print()
-
-# Track all changes
-changes_made = []
-
-# ============================================================================
-# STEP 1: Add new fields to all states
-# ============================================================================
-print("STEP 1: Adding new data structure fields to all states...")
-print("-" * 80)
-
-for state in states_data:
-    state_name = state['state']
-
-    # Add new verification method fields
-    if 'bankAccount' not in state['legal']['verificationMethods']:
-        state['legal']['verificationMethods']['bankAccount'] = False
-        changes_made.append(f"{state_name}: Added verificationMethods.bankAccount field")
-
-    if 'financialDocument' not in state['legal']['verificationMethods']:
-        state['legal']['verificationMethods']['financialDocument'] = False
-        changes_made.append(f"{state_name}: Added verificationMethods.financialDocument field")
-
-    # Add new penalty fields
-    if 'punitiveDamages' not in state['legal']['penalties']:
-        state['legal']['penalties']['punitiveDamages'] = False
-        changes_made.append(f"{state_name}: Added penalties.punitiveDamages field")
-
-    if 'injunctiveRelief' not in state['legal']['penalties']:
-        state['legal']['penalties']['injunctiveRelief'] = False
-        changes_made.append(f"{state_name}: Added penalties.injunctiveRelief field")
-
-    if 'statutoryDamages' not in state['legal']['penalties']:
-        state['legal']['penalties']['statutoryDamages'] = None
-        changes_made.append(f"{state_name}: Added penalties.statutoryDamages field")
-
-print(f"✓ Added 5 new fields to all {len(states_data)} states")
-print()
-
-# ============================================================================
-# STEP 2: Tennessee - Add data retention note
-# ============================================================================
-print("STEP 2: Tennessee - Adding 7-year data retention requirement...")
-print("-" * 80)
-
-tn = states_dict['Tennessee']
-if '7 years' not in tn['legal']['notes']:
-    tn['legal']['notes'] = "Anonymized age-verification data must be retained for 7 years."
-    changes_made.append("Tennessee: Added 7-year data retention to notes")
-    print("✓ Tennessee updated")
-else:
-    print("✓ Tennessee already has retention note")
-print()
-
-# ============================================================================
-# STEP 3: Arkansas - Add IAL2 definition
-# ============================================================================
-print("STEP 3: Arkansas - Adding IAL2 definition...")
-print("-" * 80)
-
-ar = states_dict['Arkansas']
-ial2_definition = "\n\nIdentity Assurance Level 2 is a framework for confirming an individual's ownership of a genuine identity by using personal information, identity documentation, and biometric characteristics"
-
-if 'framework' not in ar['legal']['idRequirementsExact']:
-    ar['legal']['idRequirementsExact'] += ial2_definition
-    changes_made.append("Arkansas: Added IAL2 definition to idRequirementsExact")
-    print("✓ Arkansas updated")
-else:
-    print("✓ Arkansas already has IAL2 definition")
-print()
-
-# ============================================================================
-# STEP 4: Oklahoma - Add ISP blocking requirement
-# ============================================================================
-print("STEP 4: Oklahoma - Adding ISP blocking requirement...")
-print("-" * 80)
-
-ok = states_dict['Oklahoma']
-isp_text = "\n\nThe opportunity to block the services must be given to Internet service providers before any individual may access the material."
-
-if 'Internet service providers' not in ok['legal']['applicabilityExact']:
-    ok['legal']['applicabilityExact'] += isp_text
-    changes_made.append("Oklahoma: Added ISP blocking to applicabilityExact")
-    print("✓ Oklahoma applicability updated")
-else:
-    print("✓ Oklahoma already has ISP blocking text")
-
-if 'ISP' not in ok['legal']['notes']:
-    ok['legal']['notes'] = "ISP blocking requirement"
-    changes_made.append("Oklahoma: Added ISP note")
-    print("✓ Oklahoma notes updated")
-else:
-    print("✓ Oklahoma already has ISP note")
-
-ok['legal']['penalties']['injunctiveRelief'] = True
-changes_made.append("Oklahoma: Set injunctiveRelief = true")
-print("✓ Oklahoma injunctiveRelief flag set")
-print()
-
-# ============================================================================
-# STEP 5: Florida - Set punitiveDamages flag
-# ============================================================================
-print("STEP 5: Florida - Setting punitiveDamages flag...")
-print("-" * 80)
-
-fl = states_dict['Florida']
-fl['legal']['penalties']['punitiveDamages'] = True
-changes_made.append("Florida: Set punitiveDamages = true")
-print("✓ Florida updated")
-print()
-
-# ============================================================================
-# STEP 6: North Carolina - Set punitive and injunctive flags
-# ============================================================================
-print("STEP 6: North Carolina - Setting punitive and injunctive flags...")
-print("-" * 80)
-
-nc = states_dict['North Carolina']
-nc['legal']['penalties']['punitiveDamages'] = True
-nc['legal']['penalties']['injunctiveRelief'] = True
-changes_made.append("North Carolina: Set punitiveDamages = true")
-changes_made.append("North Carolina: Set injunctiveRelief = true")
-print("✓ North Carolina updated")
-print()
-
-# ============================================================================
-# STEP 7: South Carolina - Set punitive and injunctive flags
-# ============================================================================
-print("STEP 7: South Carolina - Setting punitive and injunctive flags...")
-print("-" * 80)
-
-sc = states_dict['South Carolina']
-sc['legal']['penalties']['punitiveDamages'] = True
-sc['legal']['penalties']['injunctiveRelief'] = True
-changes_made.append("South Carolina: Set punitiveDamages = true")
-changes_made.append("South Carolina: Set injunctiveRelief = true")
-print("✓ South Carolina updated")
-print()
-
-# ============================================================================
-# STEP 8: North Dakota - Set injunctiveRelief flag
-# ============================================================================
-print("STEP 8: North Dakota - Setting injunctiveRelief flag...")
-print("-" * 80)
-
-nd = states_dict['North Dakota']
-nd['legal']['penalties']['injunctiveRelief'] = True
-changes_made.append("North Dakota: Set injunctiveRelief = true")
-print("✓ North Dakota updated")
-print()
-
-# ============================================================================
-# STEP 9: Idaho - Set statutoryDamages value
-# ============================================================================
-print("STEP 9: Idaho - Setting statutoryDamages value...")
-print("-" * 80)
-
-id = states_dict['Idaho']
-id['legal']['penalties']['statutoryDamages'] = "$10,000"
-changes_made.append("Idaho: Set statutoryDamages = '$10,000'")
-print("✓ Idaho updated")
-print()
-
-# ============================================================================
-# STEP 10: Kansas - Set statutoryDamages value
-# ============================================================================
-print("STEP 10: Kansas - Setting statutoryDamages value...")
-print("-" * 80)
-
-ks = states_dict['Kansas']
-ks['legal']['penalties']['statutoryDamages'] = "$50,000 or more"
-changes_made.append("Kansas: Set statutoryDamages = '$50,000 or more'")
-print("✓ Kansas updated")
-print()
-
-# ============================================================================
-# STEP 11: South Dakota - Set bankAccount flag
-# ============================================================================
-print("STEP 11: South Dakota - Setting bankAccount flag...")
-print("-" * 80)
-
-sd = states_dict['South Dakota']
-sd['legal']['verificationMethods']['bankAccount'] = True
-changes_made.append("South Dakota: Set bankAccount = true")
-print("✓ South Dakota updated")
-print()
-
-# ============================================================================
-# STEP 12: Nebraska - Set financialDocument flag
-# ============================================================================
-print("STEP 12: Nebraska - Setting financialDocument flag...")
-print("-" * 80)
-
-ne = states_dict['Nebraska']
-ne['legal']['verificationMethods']['financialDocument'] = True
-changes_made.append("Nebraska: Set financialDocument = true")
-print("✓ Nebraska updated")
-print()
-
-# ============================================================================
-# Save the updated data
-# ============================================================================
-print("=" * 80)
-print("SAVING UPDATED DATA")
-print("=" * 80)
-print()
-
-# Create backup
-with open('data/states-data.json.backup', 'w') as f:
-    json.dump(states_data, f, indent=2, ensure_ascii=False)
-print("✓ Backup created: data/states-data.json.backup")
-
-# Save updated data
-with open('data/states-data.json', 'w') as f:
-    json.dump(states_data, f, indent=2, ensure_ascii=False)
-print("✓ Updated data saved: data/states-data.json")
-print()
-
-# ============================================================================
-# Summary
-# ============================================================================
-print("=" * 80)
-print("SUMMARY OF ALL CHANGES")
-print("=" * 80)
-print()
-print(f"Total changes made: {len(changes_made)}")
-print()
-
-# Group changes by type
-structural_changes = [c for c in changes_made if 'Added' in c and 'field' in c]
-text_changes = [c for c in changes_made if any(x in c for x in ['Added', 'Updated']) and 'field' not in c]
-flag_changes = [c for c in changes_made if 'Set' in c]
-
-print(f"Structural changes (new fields): {len(structural_changes)}")
-print(f"Text changes: {len([c for c in text_changes if 'field' not in c])}")
-print(f"Flag updates: {len(flag_changes)}")
-print()
-
-print("States affected by non-structural changes:")
-affected_states = set()
-for change in changes_made:
-    if 'field' not in change:
-        state = change.split(':')[0]
-        affected_states.add(state)
-
-for state in sorted(affected_states):
-    state_changes = [c for c in changes_made if c.startswith(state + ':') and 'field' not in c]
-    print(f"  • {state}: {len(state_changes)} change(s)")
-
-print()
-print("=" * 80)
-print("✅ ALL CORRECTIONS APPLIED SUCCESSFULLY")
-print("=" * 80)
+from datetime import date, datetime, timezone
+
+from dataset_io import iter_records, locked, write_records_atomic
+from phase_profiler import NO_PROFILER, Profiler, add_profile_arguments
+from rule_history import DEFAULT_HISTORY, record_file
+from snapshot_store import SnapshotStore
+
+DEFAULT_PATCH = 'data/corrections.json'
+DEFAULT_DATASET = 'data/states-data.json'
+
+_MISSING = object()
+
+
+class CorrectionError(Exception):
+    """Raised when an operation cannot be applied; aborts the whole batch"""
+
+
+def parse_pointer(path):
+    """Split a JSON Pointer into unescaped tokens"""
+    if not path.startswith('/'):
+        raise CorrectionError(f"Invalid path '{path}': must start with '/'")
+    return [token.replace('~1', '/').replace('~0', '~') for token in path[1:].split('/')]
+
+
+def resolve_parent(record, tokens, path):
+    """Return the dict holding the last pointer token"""
+    parent = record
+    for token in tokens[:-1]:
+        if not isinstance(parent, dict) or token not in parent:
+            raise CorrectionError(f"Path '{path}' does not exist")
+        parent = parent[token]
+    if not isinstance(parent, dict):
+        raise CorrectionError(f"Path '{path}' does not point into an object")
+    return parent
+
+
+def index_operations(operations):
+    """Check operations and group them by target for per-record lookup"""
+    by_target = {}
+    for i, op in enumerate(operations):
+        for field in ['op', 'state', 'path']:
+            if field not in op:
+                raise CorrectionError(f"Operation {i}: missing '{field}'")
+        if op['op'] in ['add', 'replace', 'append', 'test'] and 'value' not in op:
+            raise CorrectionError(f"Operation {i}: missing 'value'")
+        by_target.setdefault(op['state'], []).append((i, op))
+    return by_target
+
+
+def operations_for(record, by_target):
+    """Operations addressed to this record ('*', name or abbreviation), in patch order"""
+    ops = (by_target.get('*', []) + by_target.get(record.get('state'), [])
+           + by_target.get(record.get('abbreviation'), []))
+    return [op for _, op in sorted(ops, key=lambda item: item[0])]
+
+
+def apply_operation(state, op):
+    """Apply one operation to one state, returning a change record or None"""
+    kind = op['op']
+    path = op['path']
+    tokens = parse_pointer(path)
+    parent = resolve_parent(state, tokens, path)
+    key = tokens[-1]
+    current = parent.get(key, _MISSING)
+
+    if kind == 'test':
+        if current is _MISSING or current != op['value']:
+            raise CorrectionError(
+                f"{state['state']}: test failed at '{path}': "
+                f"expected {op['value']!r}, found {None if current is _MISSING else current!r}")
+        return None
+
+    guard = op.get('unless', {}).get('contains')
+    if guard is not None and isinstance(current, str) and guard in current:
+        return None
+
+    if kind == 'add':
+        if current is not _MISSING:
+            return None
+        new_value = op['value']
+    elif kind == 'replace':
+        if current is _MISSING:
+            raise CorrectionError(f"{state['state']}: cannot replace missing field '{path}'")
+        new_value = op['value']
+    elif kind == 'append':
+        if not isinstance(current, str):
+            raise CorrectionError(f"{state['state']}: cannot append to non-text field '{path}'")
+        new_value = current + op['value']
+    else:
+        raise CorrectionError(f"Unknown op '{kind}'")
+
+    if current is not _MISSING and current == new_value:
+        return None
+
+    parent[key] = new_value
+    return {
+        'state': state['state'],
+        'op': kind,
+        'path': path,
+        'old': None if current is _MISSING else current,
+        'new': new_value,
+    }
+
+
+def apply_patch(records, operations, changes):
+    """Yield records with the patch applied, appending change records to changes
+
+    Records are processed one at a time, so the whole batch is a single
+    O(n) pass over a stream. Raises CorrectionError (possibly after the
+    last record) if any operation fails or targets an unknown state.
+    """
+    by_target = index_operations(operations)
+    seen_targets = {'*'}
+
+    for record in records:
+        seen_targets.add(record.get('state'))
+        seen_targets.add(record.get('abbreviation'))
+        for op in operations_for(record, by_target):
+            change = apply_operation(record, op)
+            if change:
+                changes.append(change)
+        yield record
+
+    unknown = sorted(set(by_target) - seen_targets)
+    if unknown:
+        raise CorrectionError(f"Unknown state(s): {', '.join(unknown)}")
+
+
+def apply_to_dataset(dataset_path, operations, dry_run=False, profiler=NO_PROFILER,
+                     history_path=None, effective=None):
+    """Apply a patch to one dataset file under lock; returns (changes, snapshot_name)
+
+    The dataset is streamed into a temp file; it only replaces the original
+    (after a snapshot) if the whole batch succeeded and changed something.
+    With a history_path, the dataset before and after is recorded in that
+    rule history.
+    """
+    changes = []
+    snapshot_names = []
+
+    def commit():
+        if not changes or dry_run:
+            return False
+        stem = os.path.splitext(os.path.basename(dataset_path))[0]
+        name = f"{stem}.pre-corrections.{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%fZ')}"
+        with profiler.phase('snapshot'):
+            SnapshotStore().save(name, iter_records(dataset_path), source=dataset_path)
+        snapshot_names.append(name)
+        if history_path:
+            with profiler.phase('history'):
+                record_file(history_path, iter_records(dataset_path))
+        return True
+
+    with locked(dataset_path):
+        records = profiler.iterate('load', iter_records(dataset_path), counter='records')
+        records = profiler.iterate('apply', apply_patch(records, operations, changes))
+        with profiler.phase('write'):
+            write_records_atomic(dataset_path, records, commit=commit)
+        if snapshot_names and history_path:
+            with profiler.phase('history'):
+                record_file(history_path, iter_records(dataset_path), effective)
+    profiler.count('changes', len(changes))
+
+    return changes, snapshot_names[0] if snapshot_names else None
+
+
+def format_value(value):
+    text = json.dumps(value, ensure_ascii=False)
+    return text[:60] + '...' if len(text) > 60 else text
+
+
+def print_summary(dataset_path, changes, snapshot_name, dry_run, history_path=None):
+    print(f"Total changes {'pending' if dry_run else 'made'}: {len(changes)}")
+    print()
+
+    structural = [c for c in changes if c['op'] == 'add']
+    text = [c for c in changes if c['op'] != 'add' and isinstance(c['new'], str)]
+    flags = [c for c in changes if c['op'] != 'add' and not isinstance(c['new'], str)]
+    print(f"Structural changes (new fields): {len(structural)}")
+    print(f"Text changes: {len(text)}")
+    print(f"Flag updates: {len(flags)}")
+    print()
+
+    affected = {}
+    for change in text + flags:
+        affected.setdefault(change['state'], []).append(change)
+    if affected:
+        print("States affected by non-structural changes:")
+        for state in sorted(affected):
+            print(f"  • {state}: {len(affected[state])} change(s)")
+            for change in affected[state]:
+                print(f"      {change['op']} {change['path']}: "
+                      f"{format_value(change['old'])} → {format_value(change['new'])}")
+        print()
+
+    if dry_run:
+        print(f"Dry run: {dataset_path} not modified")
+    elif snapshot_name:
+        print(f"✓ Previous version saved as snapshot {snapshot_name} "
+              f"(python snapshot_store.py restore {snapshot_name} --output {dataset_path})")
+        print(f"✓ Updated data saved: {dataset_path}")
+        if history_path:
+            print(f"✓ Rule changes recorded in {history_path}")
+    else:
+        print(f"✓ {dataset_path} already up to date")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Apply a corrections patch file to states-data.json')
+    parser.add_argument('datasets', nargs='*', default=[DEFAULT_DATASET],
+                        help='dataset files to patch (default: %(default)s)')
+    parser.add_argument('--patch', default=DEFAULT_PATCH, help='patch file (default: %(default)s)')
+    parser.add_argument('--dry-run', action='store_true', help='report changes without writing')
+    parser.add_argument('--effective', help='date the corrected rules took effect, for the rule history (YYYY-MM-DD)')
+    parser.add_argument('--history', default=DEFAULT_HISTORY, help='rule history file (default: %(default)s)')
+    parser.add_argument('--no-history', action='store_true', help='do not record changes in the rule history')
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    history_path = None if args.no_history else args.history
+
+    if args.effective:
+        try:
+            date.fromisoformat(args.effective)
+        except ValueError as e:
+            print(f"❌ --effective: {e}")
+            sys.exit(1)
+
+    with Profiler.from_args('apply_corrections', args) as profiler:
+        with profiler.phase('parse'):
+            with open(args.patch, 'r') as f:
+                patch = json.load(f)
+        operations = patch['operations']
+        profiler.count('operations', len(operations))
+
+        print("=" * 80)
+        print(f"APPLYING CORRECTIONS FROM {args.patch}")
+        print("=" * 80)
+        if patch.get('description'):
+            print(patch['description'])
+        print(f"{len(operations)} operations")
+        print()
+
+        failed = False
+        for dataset_path in args.datasets:
+            print("-" * 80)
+            print(dataset_path)
+            print("-" * 80)
+            try:
+                changes, snapshot_name = apply_to_dataset(dataset_path, operations, args.dry_run, profiler,
+                                                          history_path, args.effective)
+            except CorrectionError as e:
+                print(f"❌ Patch aborted, {dataset_path} not modified: {e}")
+                print()
+                failed = True
+                continue
+            print_summary(dataset_path, changes, snapshot_name, args.dry_run, history_path)
+            print()
+
+        print("=" * 80)
+        if failed:
+            print("❌ SOME DATASETS WERE NOT CORRECTED")
+            print("=" * 80)
+            sys.exit(1)
+        print("✅ ALL CORRECTIONS APPLIED SUCCESSFULLY")
+        print("=" * 80)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Audit access logs against the age verification rules in states-data.json
+
+Each log row is (timestamp, state code, verification method used). The CSV
+is streamed in chunks; state codes and methods are mapped to integer
+indexes once per distinct value, and every row in a chunk is checked with
+one lookup into a state × method compliance matrix built from the dataset
+(same rules as compliance_service.py: states without an ID requirement
+always comply, otherwise the method must be accepted and, where the state
+has a minimumRequirement, be that method). An empty or "none" method means
+no verification was performed.
+
+With --history, each row is judged by the rules in force on its own date
+(rule_history.py): the row's state and date resolve to a rule version with
+one sorted search per chunk, and rows dated before a state's first recorded
+version count as compliant. Timestamps must then start with YYYY-MM-DD.
+
+Requires numpy. Files ending in .gz are decompressed on the fly.
+
+Usage:
+    python audit_access_logs.py logs/2025-10.csv.gz
+    python audit_access_logs.py logs/*.csv --samples 5 --json audit.json
+    python audit_access_logs.py logs.csv --state-column region --method-column av_method
+    python audit_access_logs.py logs/2024-*.csv.gz --history data/rule-history.json
+"""
+import argparse
+import csv
+import gzip
+import itertools
+import json
+import sys
+
+import numpy as np
+
+from dataset_io import iter_records
+from rule_history import RuleHistory, to_ordinal
+from schema_validator import VERIFICATION_METHOD_FIELDS
+from state_bitmasks import METHOD_BITS, method_mask, required_mask, satisfies
+
+CHUNK_SIZE = 1 << 18
+NO_METHOD_VALUES = {'', 'none', 'null', '-'}
+
+
+def compliance_row(legal):
+    """Compliance of every method column under one `legal` object"""
+    state = {'legal': legal}
+    accepted, required = method_mask(state), required_mask(state)
+    row = [satisfies(legal['idRequired'], accepted, required, bit) for bit in METHOD_BITS.values()]
+    return row + [satisfies(legal['idRequired'], accepted, required, 0)] * 2
+
+
+class ComplianceMatrix:
+    """compliant[state_index, method_index] for every state and method
+
+    The extra last state row is "unknown state"; the two extra method
+    columns are "no verification" and "unknown method". With a RuleHistory
+    the rows of `versioned` are rule versions instead, again followed by an
+    always-compliant row.
+    """
+
+    def __init__(self, states, history=None):
+        self.abbreviations = []
+        rows = []
+        for state in states:
+            self.abbreviations.append(state['abbreviation'].upper())
+            rows.append(compliance_row(state['legal']))
+        rows.append([True] * (len(METHOD_BITS) + 2))
+
+        self.compliant = np.array(rows, dtype=bool)
+        self.history = history
+        if history is not None:
+            self.versioned = np.array([compliance_row(version['legal']) for version in history.versions]
+                                      + [rows[-1]], dtype=bool)
+            history_index = {abbreviation: i for i, abbreviation in enumerate(history.abbreviations)}
+            self.unversioned = [abbreviation for abbreviation in self.abbreviations
+                                if abbreviation not in history_index]
+            # Matrix state index -> history state index (-1 = not in the history)
+            self._history_state = np.array([history_index.get(abbreviation, -1)
+                                            for abbreviation in self.abbreviations] + [-1], dtype=np.int64)
+        self.unknown_state = len(self.abbreviations)
+        self.no_method = len(METHOD_BITS)
+        self.unknown_method = len(METHOD_BITS) + 1
+        self._state_index = {abbreviation: i for i, abbreviation in enumerate(self.abbreviations)}
+        self._method_index = {method: i for i, method in enumerate(METHOD_BITS)}
+        self._method_index_folded = {method.lower(): i for i, method in enumerate(METHOD_BITS)}
+
+    def state_indexes(self, codes):
+        """Integer state index per code (unknown_state for unrecognised codes)"""
+        distinct, inverse = np.unique(np.asarray(codes, dtype=object), return_inverse=True)
+        lookup = np.array([self._state_index.get(code.strip().upper(), self.unknown_state)
+                           for code in distinct], dtype=np.int16)
+        return lookup[inverse]
+
+    def method_indexes(self, methods):
+        """Integer method index per value (no_method / unknown_method as appropriate)"""
+        distinct, inverse = np.unique(np.asarray(methods, dtype=object), return_inverse=True)
+        lookup = np.array([self._method_lookup(method) for method in distinct], dtype=np.int16)
+        return lookup[inverse]
+
+    def _method_lookup(self, method):
+        method = method.strip()
+        if method.lower() in NO_METHOD_VALUES:
+            return self.no_method
+        if method in self._method_index:
+            return self._method_index[method]
+        return self._method_index_folded.get(method.lower(), self.unknown_method)
+
+    def compliance(self, state_idx, method_idx, timestamps):
+        """Per-row compliance, by the current rules or, with a history, the rules on each row's date"""
+        if self.history is None:
+            return self.compliant[state_idx, method_idx]
+        version_idx = self.history.version_ids(self._history_state[state_idx], day_ordinals(timestamps))
+        # NO_VERSION (-1) selects the always-compliant last row
+        return self.versioned[version_idx, method_idx]
+
+
+def day_ordinals(timestamps):
+    """Day ordinal per ISO timestamp, parsing each distinct date once"""
+    days, inverse = np.unique(np.array([timestamp[:10] for timestamp in timestamps], dtype=object),
+                              return_inverse=True)
+    try:
+        lookup = np.array([to_ordinal(day) for day in days], dtype=np.int64)
+    except ValueError as e:
+        raise ValueError(f"timestamps must start with YYYY-MM-DD for --history: {e}")
+    return lookup[inverse]
+
+
+def iter_chunks(path, columns, chunk_size=CHUNK_SIZE):
+    """Yield (first_row_number, [column values...]) for each chunk of a CSV log"""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        missing = [column for column in columns if column not in header]
+        if missing:
+            raise ValueError(f"{path}: missing column(s) {', '.join(missing)} (found {', '.join(header)})")
+        positions = [header.index(column) for column in columns]
+
+        row_number = 2
+        while True:
+            rows = list(itertools.islice(reader, chunk_size))
+            if not rows:
+                return
+            yield row_number, [[row[p] if p < len(row) else '' for row in rows] for p in positions]
+            row_number += len(rows)
+
+
+class AuditResult:
+    """Running per-state totals across chunks and files"""
+
+    def __init__(self, matrix, samples_per_state):
+        size = matrix.unknown_state + 1
+        self.matrix = matrix
+        self.rows = np.zeros(size, dtype=np.int64)
+        self.violations = np.zeros(size, dtype=np.int64)
+        self.by_method = np.zeros((size, matrix.compliant.shape[1]), dtype=np.int64)
+        self.samples_per_state = samples_per_state
+        self.samples = {}
+        self.unknown_states = {}
+        self.unknown_methods = {}
+
+    def add_chunk(self, path, first_row, timestamps, codes, methods):
+        matrix = self.matrix
+        state_idx = matrix.state_indexes(codes)
+        method_idx = matrix.method_indexes(methods)
+        violating = ~matrix.compliance(state_idx, method_idx, timestamps)
+
+        size = len(self.rows)
+        self.rows += np.bincount(state_idx, minlength=size)
+        self.violations += np.bincount(state_idx[violating], minlength=size)
+        np.add.at(self.by_method, (state_idx[violating], method_idx[violating]), 1)
+
+        self._count_unknown(self.unknown_states, codes, state_idx == matrix.unknown_state)
+        self._count_unknown(self.unknown_methods, methods, method_idx == matrix.unknown_method)
+        self._take_samples(path, first_row, timestamps, codes, methods, state_idx, violating)
+
+    @staticmethod
+    def _count_unknown(counts, values, mask):
+        if mask.any():
+            distinct, n = np.unique(np.asarray(values, dtype=object)[mask], return_counts=True)
+            for value, count in zip(distinct, n):
+                counts[value] = counts.get(value, 0) + int(count)
+
+    def _take_samples(self, path, first_row, timestamps, codes, methods, state_idx, violating):
+        if not self.samples_per_state:
+            return
+        for s in np.unique(state_idx[violating]):
+            taken = self.samples.setdefault(int(s), [])
+            quota = self.samples_per_state - len(taken)
+            if quota <= 0:
+                continue
+            for i in np.flatnonzero(violating & (state_idx == s))[:quota]:
+                taken.append({'file': path, 'row': first_row + int(i), 'timestamp': timestamps[i],
+                              'state': codes[i], 'method': methods[i]})
+
+    def to_json(self):
+        matrix = self.matrix
+        method_names = VERIFICATION_METHOD_FIELDS + ['(none)', '(unknown)']
+        states = {}
+        for i, abbreviation in enumerate(matrix.abbreviations):
+            if not self.rows[i]:
+                continue
+            states[abbreviation] = {
+                'rows': int(self.rows[i]),
+                'violations': int(self.violations[i]),
+                'violationsByMethod': {method_names[m]: int(n) for m, n in enumerate(self.by_method[i]) if n},
+                'samples': self.samples.get(i, []),
+            }
+        return {
+            'rows': int(self.rows.sum()),
+            'violations': int(self.violations.sum()),
+            'unknownStateRows': int(self.rows[matrix.unknown_state]),
+            'unknownStates': self.unknown_states,
+            'unknownMethods': self.unknown_methods,
+            'states': states,
+        }
+
+
+def print_report(report):
+    print("=" * 80)
+    print("ACCESS LOG COMPLIANCE AUDIT")
+    print("=" * 80)
+    print()
+    print(f"Rows audited: {report['rows']:,}")
+    print(f"Violations:   {report['violations']:,}")
+    if report['unknownStateRows']:
+        top = sorted(report['unknownStates'].items(), key=lambda item: -item[1])[:5]
+        print(f"⚠️  {report['unknownStateRows']:,} rows with unknown state codes "
+              f"(e.g. {', '.join(f'{code!r}×{n}' for code, n in top)})")
+    if report['unknownMethods']:
+        top = sorted(report['unknownMethods'].items(), key=lambda item: -item[1])[:5]
+        print(f"⚠️  Unknown methods treated as no verification: "
+              f"{', '.join(f'{method!r}×{n}' for method, n in top)}")
+    print()
+
+    violating = sorted(((abbreviation, entry) for abbreviation, entry in report['states'].items()
+                        if entry['violations']), key=lambda item: -item[1]['violations'])
+    if not violating:
+        print("✅ No violations found")
+        return
+
+    print(f"{'State':<6} {'Rows':>12} {'Violations':>12} {'Rate':>8}  Top methods")
+    print("-" * 80)
+    for abbreviation, entry in violating:
+        rate = entry['violations'] / entry['rows'] * 100
+        top = sorted(entry['violationsByMethod'].items(), key=lambda item: -item[1])[:3]
+        print(f"{abbreviation:<6} {entry['rows']:>12,} {entry['violations']:>12,} {rate:>7.2f}%  "
+              f"{', '.join(f'{method} ({n:,})' for method, n in top)}")
+
+    print()
+    print("Sample violating rows:")
+    for abbreviation, entry in violating:
+        for sample in entry['samples']:
+            print(f"   • {abbreviation} {sample['file']}:{sample['row']} {sample['timestamp']} "
+                  f"method={sample['method'] or '(none)'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Audit access logs for age verification compliance')
+    parser.add_argument('logs', nargs='+', help='CSV access logs (.csv or .csv.gz)')
+    parser.add_argument('--dataset', default='data/states-data.json')
+    parser.add_argument('--timestamp-column', default='timestamp')
+    parser.add_argument('--state-column', default='state')
+    parser.add_argument('--method-column', default='method')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--samples', type=int, default=3, help='sample violating rows kept per state')
+    parser.add_argument('--json', help='also write the full report to this file')
+    parser.add_argument('--history', help='judge rows by the rules in force on their date (rule history file)')
+    args = parser.parse_args()
+
+    columns = [args.timestamp_column, args.state_column, args.method_column]
+
+    try:
+        history = RuleHistory.load(args.history) if args.history else None
+        matrix = ComplianceMatrix(iter_records(args.dataset), history)
+        if history is not None and matrix.unversioned:
+            print(f"⚠️  Not in {args.history}, treated as compliant: {', '.join(matrix.unversioned)}")
+        result = AuditResult(matrix, args.samples)
+        for path in args.logs:
+            for first_row, (timestamps, codes, methods) in iter_chunks(path, columns, args.chunk_size):
+                result.add_chunk(path, first_row, timestamps, codes, methods)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    report = result.to_json()
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print()
+        print(f"✓ Report written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
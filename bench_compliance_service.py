@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Throughput and latency benchmark for compliance_service.py
+
+Starts the service in a subprocess (or targets a running one with
+--target), then drives it from --processes load-generator processes, each
+holding --connections keep-alive connections that send requests back to
+back for --duration seconds. Requests rotate through every state; with
+--batch N each request is a POST of N states instead. Reports requests
+per second and latency percentiles over all requests.
+
+Usage:
+    python bench_compliance_service.py [--processes 4] [--connections 32] [--duration 10]
+    python bench_compliance_service.py --target 127.0.0.1:8765 --batch 51
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import time
+
+from dataset_io import iter_records
+
+TARGET_P99_MS = 1.0
+
+
+def build_requests(host, abbreviations, batch, methods):
+    """Raw HTTP requests the generator cycles through"""
+    header_host = f'Host: {host}\r\n'
+    if batch:
+        requests = []
+        for start in range(0, len(abbreviations), batch):
+            chunk = (abbreviations * (batch // len(abbreviations) + 2))[start:start + batch]
+            body = json.dumps({'states': chunk, 'methods': methods or None}).encode('utf-8')
+            requests.append((f'POST /v1/decisions HTTP/1.1\r\n{header_host}'
+                             f'Content-Type: application/json\r\n'
+                             f'Content-Length: {len(body)}\r\n\r\n').encode('latin-1') + body)
+        return requests
+
+    query = f"?methods={','.join(methods)}" if methods else ''
+    return [f'GET /v1/decision/{abbreviation}{query} HTTP/1.1\r\n{header_host}\r\n'.encode('latin-1')
+            for abbreviation in abbreviations]
+
+
+async def read_response(reader):
+    head = await reader.readuntil(b'\r\n\r\n')
+    status = int(head[9:12])
+    length = 0
+    for line in head.split(b'\r\n'):
+        if line[:15].lower() == b'content-length:':
+            length = int(line[15:])
+    await reader.readexactly(length)
+    return status
+
+
+async def drive_connection(host, port, requests, offset, deadline, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    i = offset
+    try:
+        while time.perf_counter() < deadline:
+            start = time.perf_counter_ns()
+            writer.write(requests[i % len(requests)])
+            status = await read_response(reader)
+            latencies.append(time.perf_counter_ns() - start)
+            if status != 200:
+                errors[0] += 1
+            i += 1
+    finally:
+        writer.close()
+
+
+def generator_process(host, port, requests, connections, duration, seed, queue):
+    """One load-generator process; puts (latencies_ns, errors) on queue"""
+    async def run():
+        latencies, errors = [], [0]
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(*(drive_connection(host, port, requests, seed * connections + c,
+                                                deadline, latencies, errors)
+                               for c in range(connections)))
+        return latencies, errors[0]
+
+    queue.put(asyncio.run(run()))
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_service(dataset, port):
+    """Launch compliance_service.py and wait until it accepts connections"""
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'compliance_service.py'),
+         '--dataset', dataset, '--port', str(port)],
+        stderr=subprocess.DEVNULL)
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+            return process
+        except OSError:
+            if process.poll() is not None:
+                break
+            time.sleep(0.05)
+    process.kill()
+    raise RuntimeError('compliance_service.py did not start')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the compliance decision service')
+    parser.add_argument('--target', help='host:port of a running service (default: start one)')
+    parser.add_argument('--dataset', default='data/states-data.json')
+    parser.add_argument('--processes', type=int, default=max(1, (os.cpu_count() or 2) - 1),
+                        help='load-generator processes (default: %(default)s)')
+    parser.add_argument('--connections', type=int, default=16, help='connections per process')
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds (default: %(default)s)')
+    parser.add_argument('--batch', type=int, default=0, help='states per POST /v1/decisions (0 = single GETs)')
+    parser.add_argument('--methods', default='', help='comma-separated offered methods to include')
+    args = parser.parse_args()
+
+    abbreviations = [state['abbreviation'] for state in iter_records(args.dataset)]
+    methods = [name for name in args.methods.split(',') if name]
+
+    service = None
+    if args.target:
+        host, _, port = args.target.rpartition(':')
+        port = int(port)
+    else:
+        host, port = '127.0.0.1', free_port()
+        service = start_service(args.dataset, port)
+
+    requests = build_requests(f'{host}:{port}', abbreviations, args.batch, methods)
+
+    print("=" * 80)
+    print("COMPLIANCE SERVICE BENCHMARK")
+    print("=" * 80)
+    print(f"Target: {host}:{port}  |  {args.processes} process(es) × {args.connections} connections  |  "
+          f"{args.duration:g}s  |  " + (f"batch of {args.batch}" if args.batch else "single decisions"))
+    print()
+
+    try:
+        queue = multiprocessing.Queue()
+        workers = [multiprocessing.Process(target=generator_process,
+                                           args=(host, port, requests, args.connections,
+                                                 args.duration, seed, queue))
+                   for seed in range(args.processes)]
+        for worker in workers:
+            worker.start()
+        results = [queue.get() for _ in workers]
+        for worker in workers:
+            worker.join()
+    finally:
+        if service:
+            service.terminate()
+            service.wait()
+
+    latencies = sorted(ns for worker_latencies, _ in results for ns in worker_latencies)
+    errors = sum(worker_errors for _, worker_errors in results)
+    if not latencies:
+        print("❌ No requests completed")
+        sys.exit(1)
+
+    rps = len(latencies) / args.duration
+    ms = lambda ns: ns / 1e6
+    p99 = ms(percentile(latencies, 0.99))
+    print(f"Requests:     {len(latencies):,} ({errors} non-200)")
+    print(f"Throughput:   {rps:,.0f} req/s" +
+          (f" ({rps * args.batch:,.0f} decisions/s)" if args.batch else ""))
+    print(f"Latency p50:  {ms(percentile(latencies, 0.50)):.3f} ms")
+    print(f"Latency p90:  {ms(percentile(latencies, 0.90)):.3f} ms")
+    print(f"Latency p99:  {p99:.3f} ms")
+    print(f"Latency p99.9:{ms(percentile(latencies, 0.999)):.3f} ms")
+    print(f"Latency max:  {ms(latencies[-1]):.3f} ms")
+    print()
+    if p99 < TARGET_P99_MS and not errors:
+        print(f"✅ p99 under {TARGET_P99_MS:g} ms")
+    else:
+        print(f"⚠️  p99 {p99:.3f} ms (target {TARGET_P99_MS:g} ms), {errors} errors")
+
+
+if __name__ == '__main__':
+    main()
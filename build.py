@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+Build the deployable site into dist/
+
+Minifies js/app.js and the JSON data it loads, renames every asset to
+include a content hash (so it can be served with a far-future cache
+lifetime), rewrites the references in app.js, index.html and login.html,
+writes .gz and .br siblings for compressible files and records everything
+in dist/asset-manifest.json. The HTML entry points keep their names and
+should be served with a short cache lifetime, as should dist/sw.js, the
+service worker generated from the manifest (js/sw.template.js) that
+precaches the app shell and first-render data (PRECACHE_ASSETS) and serves
+the data files stale-while-revalidate, caching the rest on first use.
+
+The files derived from data/states-data.json (states-summary.json and
+data/legal/, market-stats.json, method-cover.json, search-index.json) are
+regenerated from it first, so a build never ships tables computed from an
+older dataset. They record the dataset's hash as `sourceHash`, and the same
+hash is written into app.js (DATASET_HASH), which ignores any derived file
+from another version - e.g. one still in a browser cache. The boundaries
+(us-states.topo.json) come from build_boundaries.py and are packaged as
+they are on disk.
+
+Usage:
+    python build.py [--out dist]
+"""
+import argparse
+import glob
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+
+from build_market_stats import write_market_stats
+from build_method_cover import write_method_cover
+from build_search_index import write_search_index
+from build_state_shards import SHARD_DIR, build_shards
+from dataset_io import dataset_hash
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MANIFEST_NAME = 'asset-manifest.json'
+SERVICE_WORKER = 'sw.js'
+SERVICE_WORKER_TEMPLATE = 'js/sw.template.js'
+SERVICE_WORKER_PLACEHOLDER = '/* BUILD_MANIFEST */ null'
+MANIFEST_VERSION = 1
+HASH_LENGTH = 10
+
+DATASET = 'data/states-data.json'
+POPULATION_METADATA = 'data/population-metadata.json'
+LEGAL_MATRIX = 'legal_matrix_data.txt'
+GLOSSARY = 'legal-glossary.md'
+APP_SCRIPT = 'js/app.js'
+DATASET_HASH_PLACEHOLDER = '/* BUILD_DATASET_HASH */ null'
+
+ENTRY_POINTS = ['index.html', 'login.html']
+STATIC_FILES = ['CNAME']
+DATA_ASSETS = [
+    'data/states-summary.json',
+    'data/market-stats.json',
+    'data/method-cover.json',
+    'data/us-states.topo.json',
+    'data/states-data.json',
+    'data/population-metadata.json',
+    'data/search-index.json',
+]
+# Already content-hashed by build_state_shards.py and referenced from the
+# summary, so they keep their names
+PREHASHED_ASSETS = 'data/legal/*.json'
+SCRIPT_ASSETS = [APP_SCRIPT]
+# Installed with the service worker next to the entry points: what the first
+# render needs. Everything else is cached on first use.
+PRECACHE_ASSETS = ['js/app.js', 'data/states-summary.json', 'data/market-stats.json',
+                   'data/method-cover.json']
+
+COMPRESSIBLE = ('.html', '.js', '.json', '.css', '.svg', '.txt')
+
+# Tokens after which a '/' starts a regex literal rather than a division
+REGEX_PRECEDERS = set('(,=:[!&|?{};+-*%<>~^')
+REGEX_KEYWORDS = {'return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'new', 'delete',
+                  'void', 'throw', 'instanceof', 'yield', 'await'}
+
+
+def minify_js(source):
+    """Strip comments, indentation and blank lines from JavaScript
+
+    Deliberately conservative: string, template and regex literals are
+    copied verbatim and line breaks are kept, so automatic semicolon
+    insertion behaves exactly as in the source.
+    """
+    out = []
+    i, n = 0, len(source)
+    # One entry per open `${`: the brace depth at which it closes
+    template_stack = []
+    depth = 0
+
+    def last_significant():
+        for k in range(len(out) - 1, -1, -1):
+            if out[k] not in ' \t\n':
+                return k
+        return -1
+
+    def regex_allowed():
+        k = last_significant()
+        if k < 0 or out[k] in REGEX_PRECEDERS:
+            return True
+        if out[k].isalnum() or out[k] in '_$':
+            start = k
+            while start > 0 and (out[start - 1].isalnum() or out[start - 1] in '_$'):
+                start -= 1
+            return ''.join(out[start:k + 1]) in REGEX_KEYWORDS
+        return False
+
+    def copy_template(i):
+        """Copy template text from i (just after ` or }) up to ` or ${"""
+        while i < n:
+            c = source[i]
+            if c == '\\':
+                out.append(source[i:i + 2])
+                i += 2
+            elif c == '`':
+                out.append(c)
+                return i + 1, False
+            elif source.startswith('${', i):
+                out.append('${')
+                return i + 2, True
+            else:
+                out.append(c)
+                i += 1
+        raise ValueError('unterminated template literal')
+
+    while i < n:
+        c = source[i]
+        if c in '\'"':
+            j = i + 1
+            while source[j] != c:
+                j += 2 if source[j] == '\\' else 1
+            out.append(source[i:j + 1])
+            i = j + 1
+        elif c == '`':
+            out.append(c)
+            i, opened = copy_template(i + 1)
+            if opened:
+                template_stack.append(depth)
+                depth += 1
+        elif c == '{':
+            depth += 1
+            out.append(c)
+            i += 1
+        elif c == '}':
+            depth -= 1
+            if template_stack and template_stack[-1] == depth:
+                template_stack.pop()
+                out.append(c)
+                i, opened = copy_template(i + 1)
+                if opened:
+                    template_stack.append(depth)
+                    depth += 1
+            else:
+                out.append(c)
+                i += 1
+        elif source.startswith('//', i):
+            end = source.find('\n', i)
+            i = n if end < 0 else end
+        elif source.startswith('/*', i):
+            end = source.index('*/', i + 2)
+            out.append('\n' if '\n' in source[i:end] else ' ')
+            i = end + 2
+        elif c == '/' and regex_allowed():
+            j = i + 1
+            in_class = False
+            while True:
+                ch = source[j]
+                if ch == '\\':
+                    j += 2
+                    continue
+                if ch == '\n':
+                    raise ValueError(f'unterminated regex literal at offset {i}')
+                if ch == '[':
+                    in_class = True
+                elif ch == ']':
+                    in_class = False
+                elif ch == '/' and not in_class:
+                    break
+                j += 1
+            out.append(source[i:j + 1])
+            i = j + 1
+        elif c in ' \t\r\n':
+            j = i
+            while j < n and source[j] in ' \t\r\n':
+                j += 1
+            newline = '\n' in source[i:j]
+            while out and out[-1] in ' \t':
+                out.pop()
+            if out and out[-1] != '\n':
+                out.append('\n' if newline else ' ')
+            i = j
+        else:
+            out.append(c)
+            i += 1
+
+    return ''.join(out).strip() + '\n'
+
+
+def minify_json(text):
+    return json.dumps(json.loads(text), separators=(',', ':'), ensure_ascii=False)
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def hashed_name(path, data):
+    stem, ext = os.path.splitext(path)
+    return f'{stem}.{content_hash(data)[:HASH_LENGTH]}{ext}'
+
+
+def rewrite_references(text, asset_map):
+    """Replace quoted logical asset paths with their hashed names"""
+    def replace(match):
+        quote, path = match.group(1), match.group(2)
+        return quote + asset_map.get(path, path) + quote
+    pattern = '|'.join(re.escape(path) for path in sorted(asset_map, key=len, reverse=True))
+    if not pattern:
+        return text
+    return re.sub(r'''(['"])(%s)\1''' % pattern, replace, text)
+
+
+class SiteBuilder:
+    """Writes files into the output directory and records them in the manifest"""
+
+    def __init__(self, out_dir):
+        self.out_dir = out_dir
+        self.assets = {}
+        self.files = {}
+
+    def write(self, path, data):
+        target = os.path.join(self.out_dir, path)
+        os.makedirs(os.path.dirname(target) or '.', exist_ok=True)
+        with open(target, 'wb') as f:
+            f.write(data)
+
+        entry = {'size': len(data), 'sha256': content_hash(data)}
+        if path.endswith(COMPRESSIBLE):
+            compressed = gzip.compress(data, compresslevel=9, mtime=0)
+            if len(compressed) < len(data):
+                with open(target + '.gz', 'wb') as f:
+                    f.write(compressed)
+                entry['gzip'] = len(compressed)
+            if brotli is not None:
+                compressed = brotli.compress(data, quality=11)
+                if len(compressed) < len(data):
+                    with open(target + '.br', 'wb') as f:
+                        f.write(compressed)
+                    entry['br'] = len(compressed)
+        self.files[path] = entry
+
+    def add_asset(self, path, data, keep_name=False):
+        """Write an asset under its hashed name and remember the mapping"""
+        output_path = path if keep_name else hashed_name(path, data)
+        self.assets[path] = output_path
+        self.write(output_path, data)
+
+    def manifest(self):
+        return {
+            'version': MANIFEST_VERSION,
+            'entries': ENTRY_POINTS,
+            'assets': self.assets,
+            'files': self.files,
+        }
+
+
+def service_worker(manifest):
+    """Render the service worker for a build from its manifest"""
+    data_assets = {logical: output for logical, output in manifest['assets'].items()
+                   if logical in DATA_ASSETS}
+    build = {
+        # Changes whenever any file of the build changes
+        'version': content_hash(json.dumps(manifest['files'], sort_keys=True).encode('utf-8'))[:HASH_LENGTH],
+        'precache': manifest['entries'] + [manifest['assets'][logical] for logical in PRECACHE_ASSETS
+                                           if logical in manifest['assets']],
+        'assets': data_assets,
+    }
+    template = read_text(SERVICE_WORKER_TEMPLATE)
+    if SERVICE_WORKER_PLACEHOLDER not in template:
+        raise ValueError(f"{SERVICE_WORKER_TEMPLATE}: missing {SERVICE_WORKER_PLACEHOLDER!r}")
+    return minify_js(template.replace(SERVICE_WORKER_PLACEHOLDER, json.dumps(build)))
+
+
+def regenerate_derived_data():
+    """Rebuild every file derived from the dataset; returns the dataset's hash"""
+    build_shards(DATASET, POPULATION_METADATA, 'data/states-summary.json', SHARD_DIR)
+    write_market_stats(DATASET, 'data/market-stats.json')
+    write_method_cover(DATASET, 'data/method-cover.json')
+    write_search_index(DATASET, LEGAL_MATRIX, GLOSSARY, 'data/search-index.json')
+    return dataset_hash(DATASET)
+
+
+def read_text(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def build_site(out_dir):
+    """Build the site into out_dir (replaced atomically); returns the manifest"""
+    staging = out_dir.rstrip('/') + '.tmp'
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+    builder = SiteBuilder(staging)
+    source_hash = regenerate_derived_data()
+
+    # Data first: scripts reference data files, HTML references scripts
+    for path in DATA_ASSETS:
+        if not os.path.exists(path):
+            print(f"⚠️  {path} not found - skipped (run its build_*.py script)")
+            continue
+        builder.add_asset(path, minify_json(read_text(path)).encode('utf-8'))
+    for path in sorted(glob.glob(PREHASHED_ASSETS)):
+        builder.add_asset(path.replace(os.sep, '/'), minify_json(read_text(path)).encode('utf-8'),
+                          keep_name=True)
+
+    for path in SCRIPT_ASSETS:
+        source = read_text(path)
+        if path == APP_SCRIPT:
+            if DATASET_HASH_PLACEHOLDER not in source:
+                raise ValueError(f"{path}: missing {DATASET_HASH_PLACEHOLDER!r}")
+            source = source.replace(DATASET_HASH_PLACEHOLDER, json.dumps(source_hash))
+        script = rewrite_references(minify_js(source), builder.assets)
+        builder.add_asset(path, script.encode('utf-8'))
+
+    for path in ENTRY_POINTS:
+        builder.write(path, rewrite_references(read_text(path), builder.assets).encode('utf-8'))
+    for path in STATIC_FILES:
+        if os.path.exists(path):
+            shutil.copyfile(path, os.path.join(staging, path))
+
+    manifest = builder.manifest()
+    manifest['sourceHash'] = source_hash
+    builder.write(SERVICE_WORKER, service_worker(manifest).encode('utf-8'))
+    with open(os.path.join(staging, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.replace(staging, out_dir)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the fingerprinted, precompressed site')
+    parser.add_argument('--out', default='dist', help='output directory (default: %(default)s)')
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print(f"BUILDING SITE INTO {args.out}/")
+    print("=" * 80)
+    print()
+
+    try:
+        manifest = build_site(args.out)
+    except (OSError, ValueError) as e:
+        print(f"❌ Build failed: {e}")
+        sys.exit(1)
+
+    if brotli is None:
+        print("⚠️  brotli not installed - only .gz siblings written (pip install brotli)")
+
+    files = manifest['files']
+    raw = sum(entry['size'] for entry in files.values())
+    gzipped = sum(entry.get('gzip', entry['size']) for entry in files.values())
+    print(f"✓ Derived data regenerated from {DATASET} ({manifest['sourceHash']})")
+    print(f"✓ {len(files)} files, {len(manifest['assets'])} fingerprinted assets")
+    print(f"✓ {raw:,} bytes raw, {gzipped:,} bytes gzip")
+    for logical, output in manifest['assets'].items():
+        if not logical.startswith('data/legal/'):
+            entry = files[output]
+            print(f"   • {logical} → {output} ({entry['size']:,} bytes, {entry.get('gzip', entry['size']):,} gz)")
+    print(f"✓ Manifest: {os.path.join(args.out, MANIFEST_NAME)}")
+    print(f"✓ Service worker: {os.path.join(args.out, SERVICE_WORKER)}")
+
+
+if __name__ == '__main__':
+    main()
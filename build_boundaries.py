@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Build data/us-states.topo.json, the local map boundary asset for js/app.js
+
+Reads the US states GeoJSON in data/sources/ (see data/sources/README.md
+for where it comes from), quantizes coordinates onto an integer grid,
+splits rings into arcs shared between neighbouring states, simplifies each
+arc once (so shared borders stay identical on both sides) with a tolerance
+of one screen pixel at --zoom (islands smaller than that are dropped), and
+writes a delta-encoded TopoJSON topology. Each geometry carries the state's name,
+tier, gayMaleDensity and verification methodMask as properties.
+
+Usage:
+    python build_boundaries.py [--source data/sources/us-states.json] [--zoom 6]
+"""
+import argparse
+import json
+import os
+import sys
+
+from dataset_io import iter_records
+from state_bitmasks import method_mask
+
+DEFAULT_SOURCE = os.path.join('data', 'sources', 'us-states.json')
+DEFAULT_OUTPUT = os.path.join('data', 'us-states.topo.json')
+QUANTIZATION = 100000
+TILE_SIZE = 256
+
+
+def zoom_tolerance(zoom):
+    """Degrees of longitude covered by one screen pixel at a web-map zoom level"""
+    return 360.0 / (TILE_SIZE * 2 ** zoom)
+
+
+def feature_polygons(geometry):
+    """Polygons (lists of rings) of a Polygon or MultiPolygon geometry"""
+    if geometry['type'] == 'Polygon':
+        return [geometry['coordinates']]
+    if geometry['type'] == 'MultiPolygon':
+        return geometry['coordinates']
+    raise ValueError(f"unsupported geometry type {geometry['type']}")
+
+
+def unwrap_antimeridian(features):
+    """Shift eastern-hemisphere rings of mostly western features by -360 degrees
+
+    Keeps states that cross the antimeridian (Alaska's Aleutians) in one
+    piece, so they neither span the whole bounding box nor draw on the far
+    side of the map.
+    """
+    unwrapped = []
+    for feature in features:
+        polygons = feature_polygons(feature['geometry'])
+        if not any(x < 0 for polygon in polygons for x, *_ in polygon[0]):
+            unwrapped.append(feature)
+            continue
+        shifted = [[[[x - 360, *rest] for x, *rest in ring] for ring in polygon]
+                   if all(x > 0 for x, *_ in polygon[0]) else polygon
+                   for polygon in polygons]
+        geometry = ({'type': 'Polygon', 'coordinates': shifted[0]} if feature['geometry']['type'] == 'Polygon'
+                    else {'type': 'MultiPolygon', 'coordinates': shifted})
+        unwrapped.append(dict(feature, geometry=geometry))
+    return unwrapped
+
+
+def bounding_box(features):
+    xs, ys = [], []
+    for feature in features:
+        for polygon in feature_polygons(feature['geometry']):
+            for ring in polygon:
+                xs.extend(point[0] for point in ring)
+                ys.extend(point[1] for point in ring)
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def quantize_ring(ring, translate, scale):
+    """Snap a ring to the integer grid, dropping repeated points; None if degenerate
+
+    Spikes (A, B, A) left where a wiggly line collapses onto the grid are
+    removed too: otherwise A looks like a junction and splits the border.
+    """
+    points = []
+    for x, y, *_ in ring:
+        point = (round((x - translate[0]) / scale[0]), round((y - translate[1]) / scale[1]))
+        if points and points[-1] == point:
+            continue
+        if len(points) >= 2 and points[-2] == point:
+            points.pop()
+            continue
+        points.append(point)
+    if points[0] != points[-1]:
+        points.append(points[0])
+    return points if len(points) >= 4 else None
+
+
+def ring_extent(ring):
+    """Larger side of a quantized ring's bounding box"""
+    xs = [x for x, _ in ring]
+    ys = [y for _, y in ring]
+    return max(max(xs) - min(xs), max(ys) - min(ys))
+
+
+def find_junctions(rings):
+    """Points where rings diverge: the same point seen with different neighbours
+
+    A border walked by two states in opposite directions has the same
+    neighbour pair at every interior point, so only its ends are junctions.
+    """
+    neighbours = {}
+    for ring in rings:
+        open_ring = ring[:-1]
+        n = len(open_ring)
+        for i, point in enumerate(open_ring):
+            pair = frozenset((open_ring[i - 1], open_ring[(i + 1) % n]))
+            neighbours.setdefault(point, set()).add(pair)
+    return {point for point, pairs in neighbours.items() if len(pairs) > 1}
+
+
+def cut_ring(ring, junctions):
+    """Split a closed ring into arcs at its junction points"""
+    open_ring = ring[:-1]
+    cuts = [i for i, point in enumerate(open_ring) if point in junctions]
+    if not cuts:
+        # Island or ring with no neighbours: rotate to a canonical start so
+        # identical rings (e.g. a shared lake) still deduplicate
+        start = open_ring.index(min(open_ring))
+        rotated = open_ring[start:] + open_ring[:start]
+        return [rotated + [rotated[0]]]
+
+    rotated = open_ring[cuts[0]:] + open_ring[:cuts[0]]
+    offsets = [i - cuts[0] for i in cuts] + [len(open_ring)]
+    rotated.append(rotated[0])
+    return [rotated[offsets[k]:offsets[k + 1] + 1] for k in range(len(offsets) - 1)]
+
+
+def simplify(points, tolerance):
+    """Douglas-Peucker simplification keeping both endpoints"""
+    if len(points) <= 2:
+        return points
+    if points[0] == points[-1]:
+        # Closed arc: split at the midpoint so the ring keeps some area
+        middle = len(points) // 2
+        return simplify(points[:middle + 1], tolerance)[:-1] + simplify(points[middle:], tolerance)
+
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    tolerance_sq = tolerance * tolerance
+    while stack:
+        first, last = stack.pop()
+        (x1, y1), (x2, y2) = points[first], points[last]
+        dx, dy = x2 - x1, y2 - y1
+        length_sq = dx * dx + dy * dy
+        worst, worst_index = -1.0, None
+        for i in range(first + 1, last):
+            px, py = points[i]
+            if length_sq == 0:
+                dist_sq = (px - x1) ** 2 + (py - y1) ** 2
+            else:
+                cross = dx * (py - y1) - dy * (px - x1)
+                dist_sq = cross * cross / length_sq
+            if dist_sq > worst:
+                worst, worst_index = dist_sq, i
+        if worst_index is not None and worst > tolerance_sq:
+            keep[worst_index] = True
+            stack.append((first, worst_index))
+            stack.append((worst_index, last))
+    return [point for point, kept in zip(points, keep) if kept]
+
+
+def ring_area(points):
+    """Signed shoelace area of a closed ring"""
+    return sum(x0 * y1 - x1 * y0 for (x0, y0), (x1, y1) in zip(points, points[1:])) / 2
+
+
+def is_valid_ring(points):
+    """A closed ring of at least four positions that encloses some area"""
+    return len(points) >= 4 and points[0] == points[-1] and ring_area(points) != 0
+
+
+def delta_encode(points):
+    encoded = [list(points[0])]
+    for (x0, y0), (x1, y1) in zip(points, points[1:]):
+        encoded.append([x1 - x0, y1 - y0])
+    return encoded
+
+
+def build_topology(features, state_properties, tolerance, quantization=QUANTIZATION):
+    """Convert GeoJSON features into a quantized TopoJSON topology"""
+    features = unwrap_antimeridian(features)
+    x0, y0, x1, y1 = bounding_box(features)
+    scale = ((x1 - x0) / (quantization - 1) or 1, (y1 - y0) / (quantization - 1) or 1)
+    translate = (x0, y0)
+
+    grid_tolerance = tolerance / max(scale)
+
+    # Quantize every ring first so borders that differ only by float noise
+    # snap onto the same grid points before junction detection. Islands
+    # smaller than the tolerance would not be visible, so they are dropped
+    # (unless they are all there is of a feature).
+    quantized = []
+    for feature in features:
+        polygons = []
+        for polygon in feature_polygons(feature['geometry']):
+            rings = [q for q in (quantize_ring(ring, translate, scale) for ring in polygon) if q]
+            if rings:
+                polygons.append(rings)
+        visible = [rings for rings in polygons if ring_extent(rings[0]) >= grid_tolerance]
+        quantized.append(visible or polygons)
+
+    junctions = find_junctions(ring for polygons in quantized for rings in polygons for ring in rings)
+
+    arc_index = {}
+    arcs = []  # simplified grid points, encoded once the used arcs are known
+
+    def arc_ref(points):
+        key = tuple(points)
+        if key in arc_index:
+            return arc_index[key]
+        reversed_key = key[::-1]
+        if reversed_key in arc_index:
+            return ~arc_index[reversed_key]
+        arc_index[key] = len(arcs)
+        arcs.append(simplify(points, grid_tolerance))
+        return arc_index[key]
+
+    def ring_points(refs):
+        points = []
+        for ref in refs:
+            arc = arcs[ref] if ref >= 0 else arcs[~ref][::-1]
+            points.extend(arc[1:] if points else arc)
+        return points
+
+    # Simplification can collapse a small ring to a zero-area sliver
+    # (A-B-A); such rings are dropped, and a polygon goes with its outer ring
+    geometries = []
+    for feature, polygons in zip(features, quantized):
+        name = feature.get('properties', {}).get('name')
+        arc_polygons = []
+        for rings in polygons:
+            arc_rings = [[arc_ref(arc) for arc in cut_ring(ring, junctions)] for ring in rings]
+            if is_valid_ring(ring_points(arc_rings[0])):
+                arc_polygons.append([refs for refs in arc_rings if is_valid_ring(ring_points(refs))])
+        if not arc_polygons:
+            raise ValueError(f"{name}: nothing left after simplification (use a higher --zoom)")
+        geometry = {'properties': {'name': name, **state_properties.get(name, {})}}
+        if len(arc_polygons) == 1:
+            geometry.update(type='Polygon', arcs=arc_polygons[0])
+        else:
+            geometry.update(type='MultiPolygon', arcs=arc_polygons)
+        geometries.append(geometry)
+
+    # Keep only arcs some remaining ring uses, renumbered in order
+    used = sorted({ref if ref >= 0 else ~ref for geometry in geometries
+                   for rings in (geometry['arcs'] if geometry['type'] == 'MultiPolygon' else [geometry['arcs']])
+                   for refs in rings for ref in refs})
+    renumber = {old: new for new, old in enumerate(used)}
+    for geometry in geometries:
+        polygons = geometry['arcs'] if geometry['type'] == 'MultiPolygon' else [geometry['arcs']]
+        for rings in polygons:
+            for refs in rings:
+                refs[:] = [renumber[ref] if ref >= 0 else ~renumber[~ref] for ref in refs]
+
+    return {
+        'type': 'Topology',
+        'bbox': [x0, y0, x1, y1],
+        'transform': {'scale': list(scale), 'translate': list(translate)},
+        'objects': {'states': {'type': 'GeometryCollection', 'geometries': geometries}},
+        'arcs': [delta_encode(arcs[i]) for i in used],
+    }
+
+
+def load_state_properties(dataset_path):
+    """Per-state feature properties keyed by state name"""
+    return {state['state']: {'tier': state['legal']['tier'],
+                             'gayMaleDensity': state.get('gayMaleDensity'),
+                             'methodMask': method_mask(state)}
+            for state in iter_records(dataset_path)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the simplified TopoJSON state boundary asset')
+    parser.add_argument('--source', default=DEFAULT_SOURCE, help='GeoJSON boundary file (default: %(default)s)')
+    parser.add_argument('--dataset', default='data/states-data.json')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT)
+    parser.add_argument('--zoom', type=float, default=6,
+                        help='highest zoom the simplification should look right at (default: %(default)s)')
+    parser.add_argument('--quantization', type=int, default=QUANTIZATION)
+    args = parser.parse_args()
+
+    try:
+        with open(args.source, 'r', encoding='utf-8') as f:
+            source = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"❌ Cannot load boundary source: {e}")
+        sys.exit(1)
+
+    try:
+        topology = build_topology(source['features'], load_state_properties(args.dataset),
+                                  zoom_tolerance(args.zoom), args.quantization)
+    except ValueError as e:
+        print(f"❌ Cannot build boundaries: {e}")
+        sys.exit(1)
+
+    tmp_path = args.output + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(topology, f, separators=(',', ':'), ensure_ascii=False)
+    os.replace(tmp_path, args.output)
+
+    points = sum(len(arc) for arc in topology['arcs'])
+    print(f"✓ {args.output}: {len(topology['objects']['states']['geometries'])} features, "
+          f"{len(topology['arcs'])} arcs, {points:,} points "
+          f"({os.path.getsize(args.source):,} → {os.path.getsize(args.output):,} bytes)")
+
+
+if __name__ == '__main__':
+    main()
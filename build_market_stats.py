@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Build data/market-stats.json, the precomputed lookup table behind the
+market-stats panel in js/app.js
+
+For every tier selection (2^5) and every ID-check method selection (2^13,
+the 12 methods plus "No Law") the artifact maps the selection bitmask to an
+outcome: selected state count, population, populationPercent, gay-male and
+LGBT totals, and the member states as a hex bitset over `states`. Many
+selections select the same states, so outcomes are deduplicated and the
+index arrays just point into them. `sourceHash` identifies the dataset
+version the table was built from.
+
+Usage:
+    python build_market_stats.py [--dataset data/states-data.json] [--output data/market-stats.json]
+"""
+import argparse
+import json
+import os
+
+from dataset_io import dataset_hash, iter_records
+from state_bitmasks import SELECTION_FIELDS, TIERS, selection_bits, subset_unions, tier_bit
+
+ARTIFACT_VERSION = 1
+
+
+def build_market_stats(states):
+    """Compute the lookup artifact from a stream of state records"""
+    rows = sorted(
+        ((state['state'], tier_bit(state), selection_bits(state), state['population'],
+          state['populationPercent'], state.get('gayMalePopulation') or 0,
+          state.get('totalLgbtPopulation') or 0)
+         for state in states),
+        key=lambda row: row[0])
+
+    # Which states carry each tier / selection bit, as bitsets over rows
+    tier_members = [0] * len(TIERS)
+    method_members = [0] * len(SELECTION_FIELDS)
+    for i, (_, tier, selection, *_) in enumerate(rows):
+        for b in range(len(TIERS)):
+            if tier >> b & 1:
+                tier_members[b] |= 1 << i
+        for b in range(len(SELECTION_FIELDS)):
+            if selection >> b & 1:
+                method_members[b] |= 1 << i
+
+    tier_sets = subset_unions(tier_members, len(TIERS))
+    method_sets = subset_unions(method_members, len(SELECTION_FIELDS))
+
+    outcome_index = {}
+    outcomes = []
+
+    def outcome_for(members):
+        if members not in outcome_index:
+            selected = [row for i, row in enumerate(rows) if members >> i & 1]
+            outcome_index[members] = len(outcomes)
+            outcomes.append([
+                len(selected),
+                sum(row[3] for row in selected),
+                round(sum(row[4] for row in selected), 2),
+                sum(row[5] for row in selected),
+                sum(row[6] for row in selected),
+                format(members, 'x'),
+            ])
+        return outcome_index[members]
+
+    return {
+        'version': ARTIFACT_VERSION,
+        'states': [row[0] for row in rows],
+        'tiers': TIERS,
+        'methods': SELECTION_FIELDS,
+        'outcomeFields': ['count', 'population', 'populationPercent',
+                          'gayMalePopulation', 'totalLgbtPopulation', 'members'],
+        'outcomes': outcomes,
+        'tierIndex': [outcome_for(members) for members in tier_sets],
+        'methodIndex': [outcome_for(members) for members in method_sets],
+    }
+
+
+def write_market_stats(dataset_path, output_path):
+    """Build the table for a dataset file, tagged with its hash, and write it; returns it"""
+    artifact = build_market_stats(iter_records(dataset_path))
+    artifact['sourceHash'] = dataset_hash(dataset_path)
+
+    tmp_path = output_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(artifact, f, separators=(',', ':'), ensure_ascii=False)
+    os.replace(tmp_path, output_path)
+    return artifact
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the market-stats lookup table')
+    parser.add_argument('--dataset', default='data/states-data.json')
+    parser.add_argument('--output', default='data/market-stats.json')
+    args = parser.parse_args()
+
+    artifact = write_market_stats(args.dataset, args.output)
+
+    print(f"✓ {args.output}: {len(artifact['states'])} states, "
+          f"{len(artifact['tierIndex'])} tier selections, "
+          f"{len(artifact['methodIndex'])} method selections, "
+          f"{len(artifact['outcomes'])} distinct outcomes "
+          f"({os.path.getsize(args.output):,} bytes)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Build data/method-cover.json, the exact minimum method sets behind the
+"Must Process" panel in js/app.js
+
+A set of offered methods covers a state when state_bitmasks.satisfies()
+says so (states without an ID requirement are always covered). For all
+4,096 subsets of the 12 methods the covered states are computed at once
+with subset_unions: a subset covers the states accepting any of its
+methods, minus those whose minimumRequirement it lacks.
+
+For every state set the dashboard can select (each tier selection and
+each ID-check selection, as in build_market_stats.py) the artifact lists:
+
+    size      the minimum number of methods that covers every coverable
+              selected state (provably minimal: every smaller subset was
+              checked)
+    minimum   each such minimum cover: [method mask, population reached,
+              hex bitset of selected states left uncovered]
+    partial   for each smaller size k, the k-method set reaching the most
+              population, in the same layout
+
+Selections are keyed by their hex member bitset over `states`; `sourceHash`
+is the hash of the dataset they were computed from.
+
+Usage:
+    python build_method_cover.py [--dataset data/states-data.json] [--output data/method-cover.json]
+"""
+import argparse
+import json
+import os
+
+from build_market_stats import build_market_stats
+from dataset_io import dataset_hash, iter_records
+from schema_validator import VERIFICATION_METHOD_FIELDS
+from state_bitmasks import ALL_METHODS_MASK, METHOD_BITS, method_mask, required_mask, subset_unions
+
+ARTIFACT_VERSION = 1
+# Keep at most this many of the equally small covers (the panel shows one)
+MAX_MINIMUM_COVERS = 16
+
+
+def coverage_table(states):
+    """covered[mask] = bitset of states (over `states`) satisfied by offering mask"""
+    width = len(METHOD_BITS)
+    accepting = [0] * width
+    requiring = [0] * width
+    no_requirement = 0
+    for i, state in enumerate(states):
+        if not state['legal']['idRequired']:
+            no_requirement |= 1 << i
+            continue
+        accepted, required = method_mask(state), required_mask(state)
+        for b in range(width):
+            if accepted >> b & 1:
+                accepting[b] |= 1 << i
+            if required >> b & 1:
+                requiring[b] |= 1 << i
+
+    accepts_any = subset_unions(accepting, width)
+    lacks_required = subset_unions(requiring, width)
+    return [no_requirement | (accepts_any[mask] & ~lacks_required[ALL_METHODS_MASK & ~mask])
+            for mask in range(1 << width)]
+
+
+def population_of(bits, populations):
+    return sum(population for i, population in enumerate(populations) if bits >> i & 1)
+
+
+def solve_selection(selected, covered, masks_by_size, populations):
+    """(size, minimum covers, best partial covers) for one selected state bitset"""
+    coverable = selected & covered[ALL_METHODS_MASK]
+    reach_cache = {}
+
+    def entry(mask):
+        hit = covered[mask] & selected
+        if hit not in reach_cache:
+            reach_cache[hit] = population_of(hit, populations)
+        return [mask, reach_cache[hit], format(selected & ~hit, 'x')]
+
+    partial = []
+    for size, masks in enumerate(masks_by_size):
+        full = [mask for mask in masks if covered[mask] & coverable == coverable]
+        if full:
+            return size, [entry(mask) for mask in full[:MAX_MINIMUM_COVERS]], partial
+        if size:
+            best = max(masks, key=lambda mask: (population_of(covered[mask] & selected, populations),
+                                                -mask))
+            partial.append(entry(best))
+    raise AssertionError('the full method set always covers every coverable state')
+
+
+def build_method_cover(states):
+    """Compute the artifact from a list of state records"""
+    rows = sorted(states, key=lambda state: state['state'])
+    populations = [state['population'] for state in rows]
+    covered = coverage_table(rows)
+
+    masks_by_size = [[] for _ in range(len(METHOD_BITS) + 1)]
+    for mask in range(1 << len(METHOD_BITS)):
+        masks_by_size[bin(mask).count('1')].append(mask)
+
+    market = build_market_stats(rows)
+    selections = {}
+    for outcome in market['outcomes']:
+        hex_members = outcome[-1]
+        if hex_members not in selections:
+            size, minimum, partial = solve_selection(int(hex_members, 16), covered, masks_by_size, populations)
+            selections[hex_members] = [size, minimum, partial]
+
+    return {
+        'version': ARTIFACT_VERSION,
+        'states': [state['state'] for state in rows],
+        'methods': VERIFICATION_METHOD_FIELDS,
+        'selectionFields': ['size', 'minimum', 'partial'],
+        'coverFields': ['methodMask', 'population', 'uncovered'],
+        'selections': selections,
+    }
+
+
+def write_method_cover(dataset_path, output_path):
+    """Build the table for a dataset file, tagged with its hash, and write it; returns it"""
+    artifact = build_method_cover(list(iter_records(dataset_path)))
+    artifact['sourceHash'] = dataset_hash(dataset_path)
+
+    tmp_path = output_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(artifact, f, separators=(',', ':'), ensure_ascii=False)
+    os.replace(tmp_path, output_path)
+    return artifact
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the minimum method-cover lookup table')
+    parser.add_argument('--dataset', default='data/states-data.json')
+    parser.add_argument('--output', default='data/method-cover.json')
+    args = parser.parse_args()
+
+    artifact = write_method_cover(args.dataset, args.output)
+
+    sizes = [selection[0] for selection in artifact['selections'].values()]
+    print(f"✓ {args.output}: {len(sizes)} distinct selections, "
+          f"minimum covers of {min(sizes)}-{max(sizes)} methods "
+          f"({os.path.getsize(args.output):,} bytes)")
+
+
+if __name__ == '__main__':
+    main()
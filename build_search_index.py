@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Build data/search-index.json, the full-text index behind the dashboard's
+state search
+
+Documents are one per state (its applicability, ID-requirement and penalty
+texts, citation and legal-matrix entry) plus one per glossary term. Text is
+lowercased and split into [a-z0-9]+ tokens, stop words are dropped, and
+every term gets a positional posting list with a precomputed BM25 weight,
+so js/app.js ranks a query by summing weights from a few posting lists
+(and checks phrases by position) without touching the documents.
+
+Postings are flat integer arrays, one group per document:
+    [docDelta, round(weight * 1000), positionCount, positionDelta...]
+Positions run across a document's fields in order; `fields` gives each
+field's first position and a gap of one keeps phrases inside a field.
+
+The matrix is read from legal_matrix_data.txt through matrix_parser (the
+.md copy is RTF, not Markdown). `sourceHash` is the states dataset's hash.
+
+Usage:
+    python build_search_index.py [--dataset data/states-data.json] [--output data/search-index.json]
+"""
+import argparse
+import json
+import math
+import os
+import re
+
+from dataset_io import dataset_hash, iter_records
+from matrix_parser import MATRIX_FIELDS, load_matrix_index
+
+INDEX_VERSION = 1
+K1 = 1.2
+B = 0.75
+WEIGHT_SCALE = 1000
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+STOP_WORDS = sorted({
+    'a', 'an', 'and', 'any', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'has', 'have', 'if',
+    'in', 'is', 'it', 'its', 'of', 'on', 'or', 'such', 'that', 'the', 'their', 'this', 'to',
+    'which', 'with',
+})
+
+STATE_FIELDS = [
+    ('applicability', lambda state, matrix: state['legal'].get('applicabilityExact')),
+    ('idRequirements', lambda state, matrix: state['legal'].get('idRequirementsExact')),
+    ('penalties', lambda state, matrix: state['legal'].get('penaltiesExact')),
+    ('citation', lambda state, matrix: state['legal'].get('citation')),
+    ('matrix', lambda state, matrix: ' '.join(matrix.get(field, '') for field in MATRIX_FIELDS + ['notes'])
+     if matrix else None),
+]
+
+_STOP = set(STOP_WORDS)
+
+
+def tokenize(text):
+    """Index tokens of a text (js/app.js tokenizes queries the same way)"""
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in _STOP]
+
+
+def parse_glossary(text):
+    """[(term, simple explanation, full section text)] for each glossary term
+
+    Only "## " sections with a "### 🔵 Simple" subsection are terms; the
+    disclaimer and sources sections are skipped.
+    """
+    entries = []
+    for section in re.split(r'^## ', text, flags=re.MULTILINE)[1:]:
+        heading, _, body = section.partition('\n')
+        simple = re.search(r'^### 🔵 Simple\s*\n(.*?)(?=^### |\Z)', body, re.MULTILINE | re.DOTALL)
+        if simple:
+            body = re.sub(r'^(-{3,}|### .*)$', '', body, flags=re.MULTILINE)
+            entries.append((heading.strip(), simple.group(1).strip(), heading + '\n' + body))
+    return entries
+
+
+def build_search_index(states, matrix, glossary):
+    """Compute the index artifact from state records, a matrix index and glossary entries"""
+    docs = []
+    doc_tokens = []
+
+    def add_doc(doc, fields):
+        tokens = []
+        starts = []
+        for name, text in fields:
+            if not text:
+                continue
+            if tokens:
+                tokens.append(None)  # field gap
+            starts.append([name, len(tokens)])
+            tokens.extend(tokenize(text))
+        doc['fields'] = starts
+        docs.append(doc)
+        doc_tokens.append(tokens)
+
+    for state in sorted(states, key=lambda state: state['state']):
+        entry = matrix.get(state['state'])
+        add_doc({'kind': 'state', 'ref': state['state'], 'label': state['state']},
+                [(name, value(state, entry)) for name, value in STATE_FIELDS])
+    for term, simple, text in glossary:
+        add_doc({'kind': 'glossary', 'ref': term, 'label': term, 'summary': simple},
+                [('glossary', text)])
+
+    # term -> {doc: [positions]}
+    occurrences = {}
+    for doc_id, tokens in enumerate(doc_tokens):
+        for position, token in enumerate(tokens):
+            if token is not None:
+                occurrences.setdefault(token, {}).setdefault(doc_id, []).append(position)
+
+    lengths = [sum(token is not None for token in tokens) for tokens in doc_tokens]
+    average = sum(lengths) / len(lengths)
+    n = len(docs)
+
+    terms = {}
+    for term in sorted(occurrences):
+        by_doc = occurrences[term]
+        idf = math.log(1 + (n - len(by_doc) + 0.5) / (len(by_doc) + 0.5))
+        postings = []
+        previous_doc = 0
+        for doc_id in sorted(by_doc):
+            positions = by_doc[doc_id]
+            tf = len(positions)
+            weight = idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * lengths[doc_id] / average))
+            postings += [doc_id - previous_doc, round(weight * WEIGHT_SCALE), tf]
+            postings += [p - q for p, q in zip(positions, [0] + positions[:-1])]
+            previous_doc = doc_id
+        terms[term] = postings
+
+    return {
+        'version': INDEX_VERSION,
+        'weightScale': WEIGHT_SCALE,
+        'stopWords': STOP_WORDS,
+        'docs': docs,
+        'terms': terms,
+    }
+
+
+def write_search_index(dataset_path, matrix_path, glossary_path, output_path):
+    """Build the index from the source files, tagged with the dataset's hash, and write it; returns it"""
+    matrix = load_matrix_index(matrix_path)
+    with open(glossary_path, 'r', encoding='utf-8') as f:
+        glossary = parse_glossary(f.read())
+    index = build_search_index(iter_records(dataset_path), matrix, glossary)
+    index['sourceHash'] = dataset_hash(dataset_path)
+
+    tmp_path = output_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(index, f, separators=(',', ':'), ensure_ascii=False)
+    os.replace(tmp_path, output_path)
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the full-text search index')
+    parser.add_argument('--dataset', default='data/states-data.json')
+    parser.add_argument('--matrix', default='legal_matrix_data.txt')
+    parser.add_argument('--glossary', default='legal-glossary.md')
+    parser.add_argument('--output', default='data/search-index.json')
+    args = parser.parse_args()
+
+    index = write_search_index(args.dataset, args.matrix, args.glossary, args.output)
+
+    kinds = [doc['kind'] for doc in index['docs']]
+    print(f"✓ {args.output}: {kinds.count('state')} states, {kinds.count('glossary')} glossary terms, "
+          f"{len(index['terms']):,} terms ({os.path.getsize(args.output):,} bytes)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Split states-data.json into a slim first-render summary and per-state legal
+detail shards for js/app.js
+
+data/states-summary.json holds the population metadata totals and every
+state record without the long verbatim statute texts. Each state's
+applicabilityExact / idRequirementsExact / penaltiesExact go into
+data/legal/<ABBR>.<hash>.json, named by content hash so the browser can
+cache them indefinitely; the summary record points at its shard via
+`legalDetail`, and the summary records the dataset's hash as `sourceHash`.
+Verification method flags are packed into a `methodMask`
+integer (bit order in the summary's `methods` list) and expanded back into
+the usual object on load. Shards no longer referenced are removed.
+
+Usage:
+    python build_state_shards.py [--dataset data/states-data.json] [--metadata data/population-metadata.json]
+"""
+import argparse
+import hashlib
+import json
+import os
+
+from dataset_io import dataset_hash, iter_records
+from state_bitmasks import METHOD_BITS, method_mask
+
+SUMMARY_VERSION = 1
+DETAIL_FIELDS = ['applicabilityExact', 'idRequirementsExact', 'penaltiesExact']
+SHARD_DIR = os.path.join('data', 'legal')
+HASH_LENGTH = 12
+
+
+def compact_json(obj):
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False)
+
+
+def write_if_changed(path, text):
+    """Atomically write text to path unless it already has that content"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            if f.read() == text:
+                return False
+    except OSError:
+        pass
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+    return True
+
+
+def split_state(state, shard_dir):
+    """Return (summary_record, shard_path, shard_text) for one state"""
+    legal = dict(state['legal'])
+    detail = {field: legal.pop(field, '') for field in DETAIL_FIELDS}
+    legal['methodMask'] = method_mask(state)
+    del legal['verificationMethods']
+    shard_text = compact_json(detail)
+    digest = hashlib.sha256(shard_text.encode('utf-8')).hexdigest()[:HASH_LENGTH]
+    shard_path = os.path.join(shard_dir, f"{state['abbreviation']}.{digest}.json")
+
+    summary = dict(state, legal=legal, legalDetail=shard_path.replace(os.sep, '/'))
+    return summary, shard_path, shard_text
+
+
+def build_shards(dataset_path, metadata_path, summary_path, shard_dir):
+    """Write the summary and shards; returns (state_count, shards_written, shards_removed)"""
+    os.makedirs(shard_dir, exist_ok=True)
+    with open(metadata_path, 'r') as f:
+        metadata = json.load(f)
+
+    summaries = []
+    live_shards = set()
+    written = 0
+    for state in iter_records(dataset_path):
+        summary, shard_path, shard_text = split_state(state, shard_dir)
+        summaries.append(summary)
+        live_shards.add(os.path.basename(shard_path))
+        written += write_if_changed(shard_path, shard_text)
+
+    write_if_changed(summary_path, compact_json(
+        {'version': SUMMARY_VERSION, 'sourceHash': dataset_hash(dataset_path), 'metadata': metadata,
+         'methods': list(METHOD_BITS), 'states': summaries}))
+
+    removed = 0
+    for name in os.listdir(shard_dir):
+        if name.endswith('.json') and name not in live_shards:
+            os.unlink(os.path.join(shard_dir, name))
+            removed += 1
+
+    return len(summaries), written, removed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the slim summary and legal detail shards')
+    parser.add_argument('--dataset', default='data/states-data.json')
+    parser.add_argument('--metadata', default='data/population-metadata.json')
+    parser.add_argument('--summary', default='data/states-summary.json')
+    parser.add_argument('--shard-dir', default=SHARD_DIR)
+    args = parser.parse_args()
+
+    count, written, removed = build_shards(args.dataset, args.metadata, args.summary, args.shard_dir)
+
+    print(f"✓ {args.summary}: {count} states ({os.path.getsize(args.summary):,} bytes, "
+          f"was {os.path.getsize(args.dataset):,})")
+    print(f"✓ {args.shard_dir}: {written} shard(s) written, {removed} stale shard(s) removed")
+
+
+if __name__ == '__main__':
+    main()
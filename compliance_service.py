@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+Local compliance decision service
+
+Answers "for a visitor in state X, which verification methods satisfy the
+law, and is ID required?" from an in-memory index of states-data.json,
+using the same rules as the dashboard's ID-check filters.
+
+    GET  /v1/decision/TX                                  decision for one state
+    GET  /v1/decision/TX?methods=creditCard,governmentId  ... and whether those methods satisfy it
+    GET  /v1/decision-by-ip/203.0.113.7[?methods=...]     same, for the visitor's state (needs --ip-index)
+    POST /v1/decisions  {"states": ["TX", "FL"], "methods": ["creditCard"]}
+    GET  /v1/health                                       index version and size
+
+A state is satisfied when it requires no ID, or when at least one offered
+method is accepted and its minimumRequirement (if any) is among them.
+
+The dataset is re-read in a worker thread when the file changes, validated
+against the schema and swapped in with a single reference assignment, so
+each request sees either the old or the new index, never a mix. A file
+that fails validation is reported and the old index stays in service.
+Response bodies are serialised once per index and reused. A request that
+raises gets a 500 JSON error (traceback on stderr) instead of a dropped
+connection.
+
+Usage:
+    python compliance_service.py [--dataset data/states-data.json] [--port 8765] [--ip-index data/ip-state-index.bin]
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import time
+import traceback
+from urllib.parse import parse_qs, unquote
+
+from dataset_io import iter_records
+from ip_state_index import IPStateIndex
+from schema_validator import validate_records
+from state_bitmasks import METHOD_BITS, method_mask, methods_from_mask, required_mask, satisfies
+
+DEFAULT_DATASET = 'data/states-data.json'
+DEFAULT_PORT = 8765
+RELOAD_INTERVAL = 1.0
+MAX_BATCH = 10000
+MAX_BODY = 1 << 20
+MAX_HEADER = 1 << 16
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+
+def encode(obj):
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+class DecisionIndex:
+    """Immutable per-state decisions for one version of the dataset"""
+
+    def __init__(self, records, version):
+        self.version = version
+        self.loaded_at = time.time()
+        self._rules = {}
+        self._bodies = {}
+        self._with_methods = {}
+
+        for state in records:
+            abbreviation = state['abbreviation'].upper()
+            legal = state['legal']
+            accepted = method_mask(state)
+            decision = {
+                'state': state['state'],
+                'abbreviation': abbreviation,
+                'tier': legal['tier'],
+                'idRequired': legal['idRequired'],
+                'acceptedMethods': methods_from_mask(accepted),
+                'requiredMethod': legal.get('minimumRequirement'),
+            }
+            self._rules[abbreviation] = (decision, accepted, required_mask(state))
+            self._bodies[abbreviation] = encode(decision)
+
+    def __len__(self):
+        return len(self._rules)
+
+    def satisfied(self, abbreviation, offered):
+        decision, accepted, required = self._rules[abbreviation]
+        return satisfies(decision['idRequired'], accepted, required, offered)
+
+    def body(self, abbreviation, offered=None):
+        """Serialised decision, or None for an unknown state
+
+        With offered (a method mask) the body also says whether those
+        methods satisfy the state; each combination is serialised once.
+        """
+        if offered is None:
+            return self._bodies.get(abbreviation)
+        key = (abbreviation, offered)
+        body = self._with_methods.get(key)
+        if body is None:
+            if abbreviation not in self._rules:
+                return None
+            decision = self._rules[abbreviation][0]
+            body = encode(dict(decision, offeredMethods=methods_from_mask(offered),
+                               satisfied=self.satisfied(abbreviation, offered)))
+            self._with_methods[key] = body
+        return body
+
+
+def load_index(path):
+    """Read, validate and index a dataset file; raises ValueError if invalid"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            digest.update(chunk)
+
+    records = list(iter_records(path))
+    count, errors = validate_records(records, [])
+    if errors:
+        error_path, state_name, message = errors[0]
+        raise ValueError(f"{path}: {len(errors)} schema error(s), first: {error_path} ({state_name}): {message}")
+    return DecisionIndex(records, digest.hexdigest()[:12])
+
+
+def parse_methods(names):
+    """Method mask for a list of method names; raises ValueError on unknown names"""
+    offered = 0
+    for name in names:
+        if name not in METHOD_BITS:
+            raise ValueError(f"unknown verification method {name!r}")
+        offered |= METHOD_BITS[name]
+    return offered
+
+
+class ComplianceService:
+    """Current DecisionIndex plus request routing; connections are DecisionProtocol"""
+
+    def __init__(self, dataset_path, ip_index=None):
+        self.dataset_path = dataset_path
+        self.ip_index = ip_index
+        self._stat_key = self._stat()
+        self.index = load_index(dataset_path)
+
+    def _stat(self):
+        stat = os.stat(self.dataset_path)
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    async def watch(self, interval=RELOAD_INTERVAL):
+        """Poll the dataset and hot-swap the index when it changes"""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                stat_key = self._stat()
+            except OSError:
+                continue
+            if stat_key == self._stat_key:
+                continue
+            # Remember the stat from before the read: a change during the
+            # read is picked up on the next poll
+            self._stat_key = stat_key
+            try:
+                index = await loop.run_in_executor(None, load_index, self.dataset_path)
+            except (OSError, ValueError) as e:
+                print(f"⚠️  Keeping index {self.index.version}: {e}", file=sys.stderr)
+                continue
+            except Exception:
+                # Anything else is a bug, but it must not end the watcher
+                # and leave the service on this index for good
+                print(f"⚠️  Keeping index {self.index.version}: unexpected error loading {self.dataset_path}",
+                      file=sys.stderr)
+                traceback.print_exc(file=sys.stderr)
+                continue
+            self.index = index
+            print(f"✓ Loaded index {index.version} ({len(index)} states)", file=sys.stderr)
+
+    def dispatch(self, method, target, body):
+        """Return (status, response body) for one request"""
+        index = self.index
+        path, _, query = target.partition('?')
+
+        if path.startswith('/v1/decision-by-ip/'):
+            if self.ip_index is None:
+                return 404, encode({'error': 'no IP index loaded (start with --ip-index)'})
+            ip = unquote(path[len('/v1/decision-by-ip/'):])
+            abbreviation = self.ip_index.lookup(ip)
+            if abbreviation is None:
+                return 404, encode({'error': f'no state for address {ip!r}'})
+            path = '/v1/decision/' + abbreviation
+
+        if path.startswith('/v1/decision/'):
+            if method != 'GET':
+                return 405, encode({'error': 'use GET'})
+            abbreviation = unquote(path[len('/v1/decision/'):]).upper()
+            offered = None
+            params = parse_qs(query, keep_blank_values=True)
+            if 'methods' in params:
+                try:
+                    offered = parse_methods(name for name in params['methods'][0].split(',') if name)
+                except ValueError as e:
+                    return 400, encode({'error': str(e)})
+            decision = index.body(abbreviation, offered)
+            if decision is None:
+                return 404, encode({'error': f'unknown state {abbreviation!r}'})
+            return 200, decision
+
+        if path == '/v1/decisions':
+            if method != 'POST':
+                return 405, encode({'error': 'use POST'})
+            return self.batch(index, body)
+
+        if path == '/v1/health':
+            return 200, encode({'version': index.version, 'states': len(index),
+                                'loadedAt': index.loaded_at})
+
+        return 404, encode({'error': f'no route for {path}'})
+
+    def batch(self, index, body):
+        try:
+            query = json.loads(body)
+            states = query['states']
+            offered = parse_methods(query['methods']) if query.get('methods') is not None else None
+        except (ValueError, KeyError, TypeError) as e:
+            return 400, encode({'error': f'expected {{"states": [...], "methods": [...]}}: {e}'})
+        if not isinstance(states, list):
+            return 400, encode({'error': '"states" must be a list of abbreviations'})
+        if len(states) > MAX_BATCH:
+            return 413, encode({'error': f'at most {MAX_BATCH} states per batch'})
+
+        parts = []
+        for abbreviation in states:
+            abbreviation = str(abbreviation).upper()
+            decision = index.body(abbreviation, offered)
+            parts.append(decision if decision is not None else
+                         encode({'abbreviation': abbreviation, 'error': 'unknown state'}))
+        return 200, b''.join([b'{"version":"', index.version.encode('ascii'), b'","decisions":[',
+                              b','.join(parts), b']}'])
+
+    @staticmethod
+    def response(status, payload, keep_alive, version):
+        head = (f'HTTP/1.1 {status} {REASONS[status]}\r\n'
+                f'Content-Type: application/json\r\n'
+                f'Content-Length: {len(payload)}\r\n')
+        if version:
+            head += f'X-Index-Version: {version}\r\n'
+        if not keep_alive:
+            head += 'Connection: close\r\n'
+        return head.encode('latin-1') + b'\r\n' + payload
+
+    async def serve(self, host, port, reload_interval=RELOAD_INTERVAL):
+        loop = asyncio.get_running_loop()
+        server = await loop.create_server(lambda: DecisionProtocol(self), host, port, backlog=1024)
+        watcher = asyncio.create_task(self.watch(reload_interval))
+        address = server.sockets[0].getsockname()
+        print(f"✓ Serving {len(self.index)} states (index {self.index.version}) "
+              f"on http://{address[0]}:{address[1]}", file=sys.stderr)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            watcher.cancel()
+
+
+class DecisionProtocol(asyncio.Protocol):
+    """One HTTP/1.1 connection; parses requests straight out of the receive buffer"""
+
+    def __init__(self, service):
+        self.service = service
+        self.buffer = b''
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def pause_writing(self):
+        self.transport.pause_reading()
+
+    def resume_writing(self):
+        self.transport.resume_reading()
+
+    def reply(self, status, payload, keep_alive=True):
+        self.transport.write(self.service.response(status, payload, keep_alive, self.service.index.version))
+        if not keep_alive:
+            self.transport.close()
+
+    def data_received(self, data):
+        self.buffer += data
+        # Several pipelined requests may arrive in one read
+        while not self.transport.is_closing():
+            end = self.buffer.find(b'\r\n\r\n')
+            if end < 0:
+                if len(self.buffer) > MAX_HEADER:
+                    self.reply(400, encode({'error': 'request header too large'}), False)
+                return
+
+            lines = self.buffer[:end].split(b'\r\n')
+            try:
+                method, target, version = lines[0].decode('latin-1').split(' ', 2)
+                length = 0
+                connection = b''
+                for line in lines[1:]:
+                    name, _, value = line.partition(b':')
+                    name = name.strip().lower()
+                    if name == b'content-length':
+                        length = int(value)
+                    elif name == b'connection':
+                        connection = value.strip().lower()
+            except ValueError:
+                self.reply(400, encode({'error': 'malformed request'}), False)
+                return
+            if length < 0:
+                self.reply(400, encode({'error': 'invalid Content-Length'}), False)
+                return
+            if length > MAX_BODY:
+                self.reply(413, encode({'error': 'request body too large'}), False)
+                return
+
+            body_start = end + 4
+            if len(self.buffer) < body_start + length:
+                return
+            body = self.buffer[body_start:body_start + length]
+            self.buffer = self.buffer[body_start + length:]
+
+            keep_alive = (connection != b'close' if version == 'HTTP/1.1'
+                          else connection == b'keep-alive')
+            try:
+                status, payload = self.service.dispatch(method, target, body)
+            except Exception:
+                # The request was consumed, so the connection can carry on
+                traceback.print_exc(file=sys.stderr)
+                status, payload = 500, encode({'error': 'internal error'})
+            self.reply(status, payload, keep_alive)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve compliance decisions over HTTP')
+    parser.add_argument('--dataset', default=DEFAULT_DATASET)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--ip-index', help='IP → state index from ip_state_index.py compile')
+    parser.add_argument('--reload-interval', type=float, default=RELOAD_INTERVAL,
+                        help='seconds between dataset change checks (default: %(default)s)')
+    args = parser.parse_args()
+
+    try:
+        ip_index = IPStateIndex(args.ip_index) if args.ip_index else None
+        service = ComplianceService(args.dataset, ip_index)
+    except (OSError, ValueError) as e:
+        print(f"❌ Cannot start: {e}")
+        sys.exit(1)
+
+    try:
+        asyncio.run(service.serve(args.host, args.port, args.reload_interval))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Safe read/write helpers for the JSON datasets in data/
+
+Writes hold an exclusive lock on a sibling .lock file, go to a temp file in
+the same directory and are renamed into place, so readers never see a
+half-written dataset. Rewritten files keep their permission bits.
+"""
+import fcntl
+import hashlib
+import json
+import os
+import stat
+import tempfile
+from contextlib import contextmanager
+
+DATASET_HASH_LENGTH = 16
+
+
+@contextmanager
+def locked(path):
+    """Hold an exclusive advisory lock for read-modify-write of path"""
+    with open(path + '.lock', 'w') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def dump_json(data):
+    """Serialise a dataset in the repo's on-disk format"""
+    return json.dumps(data, indent=2, ensure_ascii=False)
+
+
+def dataset_hash(path):
+    """Short content hash of a dataset file
+
+    Artifacts derived from a dataset record it as `sourceHash`, so build.py
+    and js/app.js can tell which version of the data they were built from.
+    """
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:DATASET_HASH_LENGTH]
+
+
+def _file_mode(path):
+    """Permission bits for path: its current ones, or the umask default for a new file"""
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+def _temp_file_for(path):
+    """(fd, tmp_path) of a temp file beside path, with the mode path has or would get
+
+    mkstemp creates files as 0600 and os.replace keeps that mode, which
+    would leave rewritten datasets unreadable to the web server.
+    """
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path), suffix='.tmp')
+    try:
+        os.fchmod(fd, _file_mode(path))
+    except BaseException:
+        os.close(fd)
+        os.unlink(tmp_path)
+        raise
+    return fd, tmp_path
+
+
+def write_json_atomic(path, data):
+    """Write JSON via temp file + rename so the target is never partial"""
+    fd, tmp_path = _temp_file_for(path)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(dump_json(data))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def _is_ndjson(path):
+    return path.endswith(('.ndjson', '.jsonl'))
+
+
+def iter_records(path, chunk_size=1 << 16):
+    """Yield records one at a time from a JSON array or NDJSON file
+
+    Only the current record and one read chunk are held in memory, so peak
+    memory does not grow with the number of records.
+    """
+    if _is_ndjson(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        return
+
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buf = ''
+        pos = 0
+        eof = False
+
+        def fill():
+            nonlocal buf, pos, eof
+            chunk = f.read(chunk_size)
+            if not chunk:
+                eof = True
+            buf = buf[pos:] + chunk
+            pos = 0
+
+        def skip_whitespace():
+            nonlocal pos
+            while True:
+                while pos < len(buf) and buf[pos] in ' \t\r\n':
+                    pos += 1
+                if pos < len(buf) or eof:
+                    return
+                fill()
+
+        skip_whitespace()
+        if pos >= len(buf) or buf[pos] != '[':
+            raise ValueError(f"{path}: expected a JSON array of records")
+        pos += 1
+
+        skip_whitespace()
+        if pos < len(buf) and buf[pos] == ']':
+            return
+
+        while True:
+            skip_whitespace()
+            try:
+                record, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                # Probably a record split across chunks; read more and retry
+                if eof:
+                    raise
+                fill()
+                continue
+
+            # Look for the delimiter without discarding the buffer, so a
+            # value cut off at a chunk boundary (e.g. a number) is re-read
+            delimiter = end
+            while delimiter < len(buf) and buf[delimiter] in ' \t\r\n':
+                delimiter += 1
+            if delimiter >= len(buf) or buf[delimiter] not in ',]':
+                if eof:
+                    raise ValueError(f"{path}: expected ',' or ']' after record at offset {end}")
+                fill()
+                continue
+
+            yield record
+            pos = delimiter + 1
+            if buf[delimiter] == ']':
+                return
+
+
+def write_records_atomic(path, records, commit=None):
+    """Stream records to path via temp file + rename; returns the record count
+
+    JSON arrays are written in the same layout as dump_json (indent=2), so
+    unchanged datasets round-trip byte for byte. Raising from the records
+    iterator leaves the target untouched. If given, commit() is called once
+    everything is written and the target is only replaced if it returns True.
+    """
+    fd, tmp_path = _temp_file_for(path)
+    count = 0
+    try:
+        with os.fdopen(fd, 'w') as f:
+            if _is_ndjson(path):
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False) + '\n')
+                    count += 1
+            else:
+                for record in records:
+                    f.write('[\n  ' if count == 0 else ',\n  ')
+                    f.write(dump_json(record).replace('\n', '\n  '))
+                    count += 1
+                f.write('\n]' if count else '[]')
+            f.flush()
+            os.fsync(f.fileno())
+        if commit is None or commit():
+            os.replace(tmp_path, path)
+        else:
+            os.unlink(tmp_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return count
@@ -1,145 +1,61 @@
 #!/usr/bin/env python3
 """
 Detailed state-by-state verification against legal_matrix_data.txt
+
+Usage:
+    python detailed_state_check.py            # verify states serially
+    python detailed_state_check.py --jobs 4   # fan comparisons out over 4 processes
+    python detailed_state_check.py --full     # ignore the manifest and re-verify everything
+    python detailed_state_check.py --profile profile.json   # also write per-phase timings (see phase_profiler.py)
+
+Unchanged states are skipped using the per-state hash manifest in .cache/.
+With --jobs > 1 comparisons run in worker processes, so the profile's
+compare phase is the time spent waiting for them and has no per-field
+comparison counts.
 """
-import json
-import difflib
-
-# Load JSON data
-with open('data/states-data.json', 'r') as f:
-    states_data = json.load(f)
-
-# Load text data
-with open('legal_matrix_data.txt', 'r') as f:
-    matrix_lines = f.readlines()
-
-# Create a dictionary keyed by state name
-json_by_state = {state['state']: state for state in states_data}
-
-def find_state_in_matrix(state_name):
-    """Find state information in matrix text"""
-    for i, line in enumerate(matrix_lines):
-        if line.strip() == state_name:
-            # Found the state, now extract data
-            # Previous line should be Yes/No
-            if i > 0:
-                id_req = matrix_lines[i-1].strip()
-
-                result = {
-                    'idRequired': id_req == 'Yes',
-                    'applicability': '',
-                    'requirements': '',
-                    'penalties': '',
-                    'citation': '',
-                    'notes': ''
-                }
-
-                # Next lines should be applicability, requirements, penalties, citation
-                j = i + 1
-                field_idx = 0
-                fields = ['applicability', 'requirements', 'penalties', 'citation']
-                current_field = None
-
-                while j < len(matrix_lines) and field_idx < 4:
-                    line = matrix_lines[j].strip()
-
-                    # Skip empty lines
-                    if not line:
-                        j += 1
-                        continue
-
-                    # Check if we hit next state
-                    if line in ['Yes', 'No'] and j + 1 < len(matrix_lines):
-                        next_line = matrix_lines[j+1].strip()
-                        # Check if next line looks like a state name
-                        if len(next_line) > 0 and next_line[0].isupper() and not line.startswith('-'):
-                            break
-
-                    # Assign to current field
-                    if field_idx < 4:
-                        current_field = fields[field_idx]
-                        if result[current_field]:
-                            result[current_field] += ' ' + line
-                        else:
-                            result[current_field] = line
-
-                        # Move to next field if line doesn't start with - (continuation)
-                        if not (j + 1 < len(matrix_lines) and matrix_lines[j+1].strip().startswith('-')):
-                            # Check if next line is continuation (starts with -)
-                            peek_j = j + 1
-                            while peek_j < len(matrix_lines):
-                                peek_line = matrix_lines[peek_j].strip()
-                                if not peek_line:
-                                    peek_j += 1
-                                    continue
-                                if peek_line.startswith('-'):
-                                    # It's continuation, don't move to next field yet
-                                    j = peek_j
-                                    result[current_field] += ' ' + peek_line
-                                    peek_j += 1
-                                else:
-                                    # Not continuation
-                                    field_idx += 1
-                                    break
-                            if peek_j >= len(matrix_lines):
-                                field_idx += 1
-                        else:
-                            # Next line is continuation
-                            pass
-                    else:
-                        # Everything after citation is notes
-                        if result['notes']:
-                            result['notes'] += ' ' + line
-                        else:
-                            result['notes'] = line
-
-                    j += 1
-
-                return result
-
-    return None
-
-def compare_text(text1, text2, threshold=0.8):
-    """Compare two texts and return similarity ratio"""
-    if not text1 and not text2:
-        return 1.0
-    if not text1 or not text2:
-        return 0.0
-
-    # Clean texts
-    t1 = ' '.join(text1.lower().split())
-    t2 = ' '.join(text2.lower().split())
-
-    # Use difflib
-    return difflib.SequenceMatcher(None, t1, t2).ratio()
-
-# Track all discrepancies
-all_discrepancies = []
-
-print("=" * 100)
-print("DETAILED STATE-BY-STATE VERIFICATION")
-print("=" * 100)
-print()
-
-# Check each state
-for state in sorted(states_data, key=lambda x: x['state']):
-    state_name = state['state']
-    json_legal = state['legal']
+import argparse
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from dataset_io import iter_records
+from matrix_parser import load_matrix_index
+from phase_profiler import NO_PROFILER, Profiler, add_profile_arguments
+from text_similarity import SIMILARITY_THRESHOLD, check_similarity, similarity_ratio
+from verification_manifest import load_manifest, manifest_path, save_manifest, filter_changed
+
+# Bump when verify_state changes so cached results are discarded
+MANIFEST_VERSION = f'2:{SIMILARITY_THRESHOLD}'
+
+# (JSON field, matrix field) pairs compared by text similarity
+TEXT_FIELDS = [
+    ('applicabilityExact', 'applicability'),
+    ('idRequirementsExact', 'requirements'),
+    ('penaltiesExact', 'penalties'),
+]
 
-    matrix_legal = find_state_in_matrix(state_name)
+# Matrix index shared with pool workers once, via the pool initializer
+_worker_matrix = None
 
+
+def truncate(text, length=100):
+    """Shorten long legal text for the report"""
+    return text[:length] + '...' if len(text) > length else text
+
+
+def verify_state(state, matrix_legal, profiler=NO_PROFILER):
+    """Compare one state's JSON legal data with its matrix record
+
+    Returns a list of discrepancies, or None if the state is not in the matrix.
+    """
     if not matrix_legal:
-        print(f"\n⚠️  {state_name}: NOT FOUND IN MATRIX")
-        all_discrepancies.append({
-            'state': state_name,
-            'issue': 'Not found in matrix data'
-        })
-        continue
+        return None
 
-    # Compare data
+    json_legal = state['legal']
     discrepancies = []
 
     # 1. Check idRequired
+    profiler.count('comparisons')
     if json_legal['idRequired'] != matrix_legal['idRequired']:
         discrepancies.append({
             'field': 'idRequired',
@@ -147,41 +63,25 @@ for state in sorted(states_data, key=lambda x: x['state']):
             'matrix': matrix_legal['idRequired']
         })
 
-    # 2. Check applicability (if state requires ID)
-    if matrix_legal['idRequired'] and matrix_legal['applicability'] != '-':
-        similarity = compare_text(json_legal['applicabilityExact'], matrix_legal['applicability'])
-        if similarity < 0.85:
-            discrepancies.append({
-                'field': 'applicabilityExact',
-                'similarity': f"{similarity:.2%}",
-                'json': json_legal['applicabilityExact'][:100] + '...' if len(json_legal['applicabilityExact']) > 100 else json_legal['applicabilityExact'],
-                'matrix': matrix_legal['applicability'][:100] + '...' if len(matrix_legal['applicability']) > 100 else matrix_legal['applicability']
-            })
-
-    # 3. Check requirements
-    if matrix_legal['idRequired'] and matrix_legal['requirements'] != '-':
-        similarity = compare_text(json_legal['idRequirementsExact'], matrix_legal['requirements'])
-        if similarity < 0.85:
-            discrepancies.append({
-                'field': 'idRequirementsExact',
-                'similarity': f"{similarity:.2%}",
-                'json': json_legal['idRequirementsExact'][:100] + '...' if len(json_legal['idRequirementsExact']) > 100 else json_legal['idRequirementsExact'],
-                'matrix': matrix_legal['requirements'][:100] + '...' if len(matrix_legal['requirements']) > 100 else matrix_legal['requirements']
-            })
-
-    # 4. Check penalties
-    if matrix_legal['idRequired'] and matrix_legal['penalties'] != '-':
-        similarity = compare_text(json_legal['penaltiesExact'], matrix_legal['penalties'])
-        if similarity < 0.85:
-            discrepancies.append({
-                'field': 'penaltiesExact',
-                'similarity': f"{similarity:.2%}",
-                'json': json_legal['penaltiesExact'][:100] + '...' if len(json_legal['penaltiesExact']) > 100 else json_legal['penaltiesExact'],
-                'matrix': matrix_legal['penalties'][:100] + '...' if len(matrix_legal['penalties']) > 100 else matrix_legal['penalties']
-            })
+    # 2-4. Check applicability, requirements and penalties (if state requires ID)
+    for json_field, matrix_field in TEXT_FIELDS:
+        if matrix_legal['idRequired'] and matrix_legal[matrix_field] != '-':
+            profiler.count('comparisons')
+            similarity, exact = check_similarity(json_legal[json_field], matrix_legal[matrix_field])
+            if similarity < SIMILARITY_THRESHOLD:
+                if not exact:
+                    # Only an upper bound; report the real score
+                    similarity = similarity_ratio(json_legal[json_field], matrix_legal[matrix_field])
+                discrepancies.append({
+                    'field': json_field,
+                    'similarity': f"{similarity:.2%}",
+                    'json': truncate(json_legal[json_field]),
+                    'matrix': truncate(matrix_legal[matrix_field])
+                })
 
     # 5. Check citation
     if matrix_legal['citation'] and matrix_legal['citation'] != '-':
+        profiler.count('comparisons')
         json_citation = json_legal['citation'].strip() if json_legal['citation'] else ''
         matrix_citation = matrix_legal['citation'].strip()
         if json_citation.lower() != matrix_citation.lower():
@@ -191,35 +91,211 @@ for state in sorted(states_data, key=lambda x: x['state']):
                 'matrix': matrix_citation
             })
 
-    if discrepancies:
-        print(f"\n{'='*100}")
-        print(f"❌ {state_name} - {len(discrepancies)} discrepancies found")
-        print('='*100)
-        for disc in discrepancies:
-            print(f"\nField: {disc['field']}")
-            if 'similarity' in disc:
-                print(f"  Similarity: {disc['similarity']}")
-            print(f"  JSON:   {disc['json']}")
-            print(f"  Matrix: {disc['matrix']}")
-
-        all_discrepancies.append({
-            'state': state_name,
-            'discrepancies': discrepancies
-        })
-    else:
-        print(f"✅ {state_name} - All data matches")
-
-print(f"\n\n{'='*100}")
-print(f"SUMMARY")
-print('='*100)
-print(f"\nTotal states checked: {len(states_data)}")
-print(f"States with discrepancies: {len(all_discrepancies)}")
-print(f"States matching: {len(states_data) - len(all_discrepancies)}")
-
-if all_discrepancies:
-    print(f"\nStates with issues:")
-    for item in all_discrepancies:
-        if 'discrepancies' in item:
-            print(f"  - {item['state']}: {len(item['discrepancies'])} discrepancies")
+    return discrepancies
+
+
+def _init_worker(matrix_index):
+    global _worker_matrix
+    _worker_matrix = matrix_index
+
+
+def _verify_in_worker(state):
+    return state['state'], verify_state(state, _worker_matrix.get(state['state']))
+
+
+def _batches(states, size):
+    batch = []
+    for state in states:
+        batch.append(state)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _verify_batch_in_worker(batch):
+    return [_verify_in_worker(state) for state in batch]
+
+
+def _verify_states(states, matrix_index, jobs, batch_size=16, profiler=NO_PROFILER):
+    """Yield (state_name, discrepancies) for a stream of states"""
+    if jobs <= 1:
+        for state in states:
+            with profiler.phase('compare'):
+                discrepancies = verify_state(state, matrix_index.get(state['state']), profiler)
+            yield state['state'], discrepancies
+        return
+
+    # Keep a bounded number of batches in flight so the input stream is
+    # never materialised; results come back in batch order
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=(matrix_index,)) as pool:
+        in_flight = deque()
+        for batch in _batches(states, batch_size):
+            in_flight.append(pool.submit(_verify_batch_in_worker, batch))
+            if len(in_flight) >= jobs * 2:
+                with profiler.phase('compare'):
+                    results = in_flight.popleft().result()
+                yield from results
+        while in_flight:
+            with profiler.phase('compare'):
+                results = in_flight.popleft().result()
+            yield from results
+
+
+def _numbered(states, positions):
+    """Pass states through, noting each one's input position under its name"""
+    for position, state in enumerate(states):
+        positions.setdefault(state['state'], deque()).append(position)
+        yield state
+
+
+def _in_input_order(verified, reused, positions):
+    """Yield (state_name, discrepancies, was_reused) in input order
+
+    With jobs > 1 the pool reads batches ahead, so filter_changed may have
+    stashed unchanged states that come after results still in flight.
+    Every result is placed by its input position and held only until all
+    earlier positions have been yielded.
+    """
+    pending = {}
+    next_position = 0
+
+    def place(state_name, discrepancies, was_reused):
+        pending[positions[state_name].popleft()] = (state_name, discrepancies, was_reused)
+
+    for state_name, discrepancies in verified:
+        while reused:
+            cached_name = next(iter(reused))
+            place(cached_name, reused.pop(cached_name), True)
+        place(state_name, discrepancies, False)
+        while next_position in pending:
+            yield pending.pop(next_position)
+            next_position += 1
+    while reused:
+        cached_name = next(iter(reused))
+        place(cached_name, reused.pop(cached_name), True)
+    for position in sorted(pending):
+        yield pending.pop(position)
+
+
+def run_verification(states, matrix_index, jobs=1, manifest_file=None, profiler=NO_PROFILER):
+    """Yield (state_name, discrepancies) for a stream of states as each completes
+
+    Results come out in input order, whatever --jobs is, and are not kept
+    once yielded. With a manifest_file, states whose JSON and matrix hashes are
+    unchanged since the last run reuse their cached result instead of being
+    re-verified; only the manifest entries to save are held until the end.
+    """
+    reused = {}
+    hashes = {}
+    positions = {}
+    entries = None
+    states = _numbered(states, positions)
+    if manifest_file:
+        with profiler.phase('manifest'):
+            cached = load_manifest(manifest_file, MANIFEST_VERSION)
+        states = profiler.iterate('manifest', filter_changed(states, matrix_index, cached, hashes, reused))
+        entries = {}
+
+    verified_count = reused_count = 0
+    verified = _verify_states(states, matrix_index, jobs, profiler=profiler)
+    for state_name, discrepancies, was_reused in _in_input_order(verified, reused, positions):
+        if was_reused:
+            reused_count += 1
+        else:
+            verified_count += 1
+        if entries is not None:
+            entries[state_name] = dict(hashes.pop(state_name), result=discrepancies)
+        yield state_name, discrepancies
+    profiler.count('verified', verified_count)
+    profiler.count('reused', reused_count)
+
+    if manifest_file:
+        with profiler.phase('manifest'):
+            save_manifest(manifest_file, MANIFEST_VERSION, entries)
+        print(f"Re-verified {verified_count} of {verified_count + reused_count} states "
+              f"({reused_count} unchanged, reused from {manifest_file})", file=sys.stderr)
+
+
+def print_report(results):
+    """Print each state's result as it arrives, then the summary
+
+    Only counts and the names of states with issues are kept. Returns the
+    number of states with discrepancies.
+    """
+    total_states = 0
+    issues = []
+
+    print("=" * 100)
+    print("DETAILED STATE-BY-STATE VERIFICATION")
+    print("=" * 100)
+    print()
+
+    for state_name, discrepancies in results:
+        total_states += 1
+        if discrepancies is None:
+            print(f"\n⚠️  {state_name}: NOT FOUND IN MATRIX")
+            issues.append((state_name, 'Not found in matrix data'))
+            continue
+
+        if discrepancies:
+            print(f"\n{'='*100}")
+            print(f"❌ {state_name} - {len(discrepancies)} discrepancies found")
+            print('='*100)
+            for disc in discrepancies:
+                print(f"\nField: {disc['field']}")
+                if 'similarity' in disc:
+                    print(f"  Similarity: {disc['similarity']}")
+                print(f"  JSON:   {disc['json']}")
+                print(f"  Matrix: {disc['matrix']}")
+
+            issues.append((state_name, f"{len(discrepancies)} discrepancies"))
         else:
-            print(f"  - {item['state']}: {item['issue']}")
+            print(f"✅ {state_name} - All data matches")
+
+    print(f"\n\n{'='*100}")
+    print(f"SUMMARY")
+    print('='*100)
+    print(f"\nTotal states checked: {total_states}")
+    print(f"States with discrepancies: {len(issues)}")
+    print(f"States matching: {total_states - len(issues)}")
+
+    if issues:
+        print(f"\nStates with issues:")
+        for state_name, issue in issues:
+            print(f"  - {state_name}: {issue}")
+
+    return len(issues)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='number of worker processes for per-state comparisons')
+    parser.add_argument('--full', action='store_true',
+                        help='re-verify every state, ignoring the hash manifest')
+    parser.add_argument('--dataset', default='data/states-data.json',
+                        help='JSON array or NDJSON file of state records (default: %(default)s)')
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    with Profiler.from_args('detailed_state_check', args) as profiler:
+        # Load the matrix index (parsed once, cached by content hash)
+        with profiler.phase('parse'):
+            matrix_index = load_matrix_index('legal_matrix_data.txt')
+
+        # Stream state records one at a time
+        states = profiler.iterate('load', iter_records(args.dataset), counter='records')
+
+        manifest_file = None if args.full else manifest_path('detailed_state_check')
+        results = run_verification(states, matrix_index, jobs=args.jobs,
+                                   manifest_file=manifest_file, profiler=profiler)
+        with profiler.phase('report'):
+            discrepancy_count = print_report(results)
+        profiler.count('statesWithDiscrepancies', discrepancy_count)
+
+
+if __name__ == '__main__':
+    main()
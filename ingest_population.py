@@ -0,0 +1,432 @@
+#!/usr/bin/env python3
+"""
+Ingest population figures from source CSVs into states-data.json
+
+Each --source CSV is recognised by its header:
+
+    estimates  state-level LGBT estimates table (State, Total Population
+               (YYYY), Gay Male Count (Estimated), ...), e.g.
+               data/gay_male_population_all_states_UPDATED.csv; provides
+               population, gayMalePopulation, lesbianPopulation and
+               totalLgbtPopulation
+    census     Census Bureau population estimates (STNAME, SUMLEV,
+               POPESTIMATEYYYY, e.g. co-est2024-alldata.csv); population
+               from the latest POPESTIMATE year
+    acs        American Community Survey table export (GEO_ID, NAME,
+               B01003_001E); population
+
+Files are read CHUNK_ROWS rows at a time and each chunk is summed per state
+with a vectorized group-by (numpy bincount when available), so county-level
+files with tens of thousands of rows take well under a second. County rows
+are summed per state; if a file also has state rows, the county sums win and
+any disagreement is reported. When several sources provide the same field
+the last one on the command line wins and the others are reported.
+
+From the merged figures the derived fields are recomputed for every state:
+populationPercent (share of the dataset's total population), gayMaleDensity
+(terciles of gay-male share of population among states with data; states
+without data are 'low') and the population-metadata.json totals. Only
+records whose values change are rewritten (the others round-trip byte for
+byte); the previous dataset is saved as a snapshot first, as in
+apply_corrections.py.
+
+Usage:
+    python ingest_population.py --source data/gay_male_population_all_states_UPDATED.csv --dry-run
+    python ingest_population.py --source data/gay_male_population_all_states_UPDATED.csv \\
+        --source co-est2024-alldata.csv --fields population,gayMalePopulation
+"""
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import time
+from datetime import datetime, timezone
+from itertools import islice
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from dataset_io import iter_records, locked, write_json_atomic, write_records_atomic
+from snapshot_store import SnapshotStore
+
+DEFAULT_DATASET = 'data/states-data.json'
+DEFAULT_METADATA = 'data/population-metadata.json'
+CHUNK_ROWS = 50_000
+
+POPULATION_FIELDS = ['population', 'gayMalePopulation', 'lesbianPopulation', 'totalLgbtPopulation']
+DENSITY_BUCKETS = ['low', 'medium', 'high']
+# population-metadata.json total -> record field
+METADATA_TOTALS = {
+    'totalUSGayMalePopulation': 'gayMalePopulation',
+    'totalUSLesbianPopulation': 'lesbianPopulation',
+    'totalUSLgbtPopulation': 'totalLgbtPopulation',
+}
+
+
+def _summary_level(value):
+    return {'050': 'county', '040': 'state'}.get((value or '').strip().zfill(3))
+
+
+# detect: header that identifies the format; state/level: row -> state name
+# and 'county'/'state' (None skips the row); fields: record field -> header
+# pattern, whose optional group is a year (the latest year is used)
+SOURCE_FORMATS = {
+    'estimates': {
+        'detect': 'Gay Male Count (Estimated)',
+        'state': lambda row: row['State'],
+        'level': lambda row: 'state',
+        'fields': {
+            'population': r'Total Population(?: \((\d{4})\))?',
+            'gayMalePopulation': r'Gay Male Count \(Estimated\)',
+            'lesbianPopulation': r'Lesbian Count \(Estimated\)',
+            'totalLgbtPopulation': r'Total LGBT Count \(Estimated\)',
+        },
+    },
+    'census': {
+        'detect': 'STNAME',
+        'state': lambda row: row['STNAME'],
+        'level': lambda row: _summary_level(row.get('SUMLEV')),
+        'fields': {'population': r'POPESTIMATE(\d{4})'},
+    },
+    'acs': {
+        'detect': 'B01003_001E',
+        # "Autauga County, Alabama" / "Alabama"
+        'state': lambda row: row['NAME'].rsplit(',', 1)[-1],
+        'level': lambda row: _summary_level(row['GEO_ID'][:3]),
+        'fields': {'population': r'B01003_001E'},
+    },
+}
+
+
+class SourceError(Exception):
+    """Raised when a source file cannot be read; nothing is written"""
+
+
+def detect_format(path, header):
+    for name, source_format in SOURCE_FORMATS.items():
+        if source_format['detect'] in header:
+            return name
+    raise SourceError(f"{path}: unrecognised header (expected one of: "
+                      f"{', '.join(f['detect'] for f in SOURCE_FORMATS.values())})")
+
+
+def pick_columns(header, patterns):
+    """{field: (column index, year or None)}, taking the latest year on multiple matches"""
+    columns = {}
+    for field, pattern in patterns.items():
+        matches = []
+        for index, name in enumerate(header):
+            match = re.fullmatch(pattern, name.strip())
+            if match:
+                year = match.group(1) if match.groups() else None
+                matches.append((year or '', index))
+        if matches:
+            year, index = max(matches)
+            columns[field] = (index, year or None)
+    return columns
+
+
+def parse_count(text):
+    return float(text.replace(',', '').strip())
+
+
+def group_sums(keys, rows, width):
+    """{key: [column sums]} for parallel lists of keys and numeric rows"""
+    if np is not None:
+        labels, inverse = np.unique(np.asarray(keys), return_inverse=True)
+        matrix = np.asarray(rows, dtype=float).reshape(len(rows), width)
+        sums = np.column_stack([np.bincount(inverse, weights=matrix[:, j], minlength=len(labels))
+                                for j in range(width)])
+        return {label: list(row) for label, row in zip(labels.tolist(), sums.tolist())}
+    sums = {}
+    for key, row in zip(keys, rows):
+        total = sums.setdefault(key, [0.0] * width)
+        for j, value in enumerate(row):
+            total[j] += value
+    return sums
+
+
+def read_source(path, state_names, chunk_rows=CHUNK_ROWS):
+    """Aggregate one source CSV per state
+
+    Returns {'path', 'format', 'years', 'rows', 'used', 'skipped', 'values':
+    {state: {field: value}}, 'levelMismatches': [(state, field, county sum,
+    state row)]}. Rows for places outside the dataset (Puerto Rico, label
+    rows, national totals) are counted as skipped.
+    """
+    try:
+        # Census Bureau files are Latin-1 (county names with accents)
+        f = open(path, 'r', encoding='latin-1', newline='')
+    except OSError as e:
+        raise SourceError(str(e))
+
+    with f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if not header:
+            raise SourceError(f"{path}: empty file")
+        header[0] = header[0].lstrip('\ufeff\xef\xbb\xbf')
+        format_name = detect_format(path, header)
+        source_format = SOURCE_FORMATS[format_name]
+        columns = pick_columns(header, source_format['fields'])
+        if not columns:
+            raise SourceError(f"{path}: no population columns found")
+        fields = list(columns)
+        positions = [columns[field][0] for field in fields]
+
+        stats = {'path': path, 'format': format_name, 'rows': 0, 'used': 0, 'skipped': 0,
+                 'years': sorted({year for _, year in columns.values() if year})}
+        totals = {'county': {}, 'state': {}}
+        while True:
+            chunk = list(islice(reader, chunk_rows))
+            if not chunk:
+                break
+            stats['rows'] += len(chunk)
+            keys = {'county': [], 'state': []}
+            values = {'county': [], 'state': []}
+            for raw in chunk:
+                row = dict(zip(header, raw))
+                try:
+                    name = state_names.get(source_format['state'](row).strip().lower())
+                    level = source_format['level'](row)
+                    numbers = [parse_count(raw[position]) for position in positions]
+                except (KeyError, IndexError, ValueError):
+                    name = None
+                if name is None or level is None:
+                    stats['skipped'] += 1
+                    continue
+                keys[level].append(name)
+                values[level].append(numbers)
+            for level in totals:
+                if not keys[level]:
+                    continue
+                stats['used'] += len(keys[level])
+                for name, sums in group_sums(keys[level], values[level], len(fields)).items():
+                    total = totals[level].setdefault(name, [0.0] * len(fields))
+                    for j, value in enumerate(sums):
+                        total[j] += value
+
+    merged = {}
+    mismatches = []
+    for name in set(totals['county']) | set(totals['state']):
+        county, state = totals['county'].get(name), totals['state'].get(name)
+        chosen = county if county is not None else state
+        merged[name] = {field: int(round(value)) for field, value in zip(fields, chosen)}
+        if county is not None and state is not None:
+            for field, county_sum, state_row in zip(fields, county, state):
+                if round(county_sum) != round(state_row):
+                    mismatches.append((name, field, int(round(county_sum)), int(round(state_row))))
+    stats['values'] = merged
+    stats['levelMismatches'] = sorted(mismatches)
+    return stats
+
+
+def merge_sources(sources, fields):
+    """({state: {field: value}}, disagreements) with later sources winning
+
+    disagreements are (state, field, [(path, value)...]) where sources differ.
+    """
+    merged = {}
+    provided = {}
+    for source in sources:
+        for name, values in source['values'].items():
+            for field, value in values.items():
+                if field in fields:
+                    merged.setdefault(name, {})[field] = value
+                    provided.setdefault((name, field), []).append((source['path'], value))
+    disagreements = [(name, field, values) for (name, field), values in sorted(provided.items())
+                     if len({value for _, value in values}) > 1]
+    return merged, disagreements
+
+
+def density_buckets(figures):
+    """{state: 'low'|'medium'|'high'} by tercile of gay-male share of population"""
+    ranked = sorted((values['gayMalePopulation'] / values['population'], name)
+                    for name, values in figures.items()
+                    if values.get('gayMalePopulation') and values.get('population'))
+    buckets = {name: DENSITY_BUCKETS[0] for name in figures}
+    for rank, (_, name) in enumerate(ranked):
+        buckets[name] = DENSITY_BUCKETS[rank * len(DENSITY_BUCKETS) // len(ranked)]
+    return buckets
+
+
+def recompute(current, merged):
+    """New population, derived fields and metadata totals for every state
+
+    current: {state: record fields}; returns ({state: {field: value}}, totals).
+    """
+    figures = {name: dict({field: record.get(field) for field in POPULATION_FIELDS}, **merged.get(name, {}))
+               for name, record in current.items()}
+    total_population = sum(values['population'] or 0 for values in figures.values())
+    buckets = density_buckets(figures)
+    for name, values in figures.items():
+        values['populationPercent'] = round((values['population'] or 0) / total_population * 100, 2)
+        values['gayMaleDensity'] = buckets[name]
+    totals = {key: sum(values.get(field) or 0 for values in figures.values())
+              for key, field in METADATA_TOTALS.items()}
+    return figures, totals
+
+
+def record_changes(current, figures):
+    """[(state, field, old, new)] where recomputed values differ from the dataset"""
+    return [(name, field, current[name].get(field), value)
+            for name in sorted(figures) for field, value in figures[name].items()
+            if current[name].get(field) != value]
+
+
+def ingest(dataset_path, metadata_path, sources, fields, dry_run=False):
+    """Apply merged source figures to the dataset and metadata under lock
+
+    Returns a result dict with changes, disagreements, unmatched states,
+    the metadata totals before/after and the snapshot name (if written).
+    """
+    result = {'snapshot': None}
+
+    def commit():
+        if not result['changes'] or dry_run:
+            return False
+        stem = os.path.splitext(os.path.basename(dataset_path))[0]
+        name = f"{stem}.pre-population.{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%fZ')}"
+        SnapshotStore().save(name, iter_records(dataset_path), source=dataset_path)
+        result['snapshot'] = name
+        return True
+
+    def updated(records, figures):
+        for record in records:
+            values = figures[record['state']]
+            if any(record.get(field) != value for field, value in values.items()):
+                record.update(values)
+            yield record
+
+    with locked(dataset_path):
+        current = {record['state']: {field: record.get(field) for field in
+                                     POPULATION_FIELDS + ['populationPercent', 'gayMaleDensity']}
+                   for record in iter_records(dataset_path)}
+        merged, result['disagreements'] = merge_sources(sources, fields)
+        figures, totals = recompute(current, merged)
+        result['changes'] = record_changes(current, figures)
+        result['unsourced'] = sorted(set(current) - set(merged))
+        write_records_atomic(dataset_path, updated(iter_records(dataset_path), figures), commit=commit)
+
+    with locked(metadata_path):
+        try:
+            with open(metadata_path, 'r', encoding='utf-8') as f:
+                metadata = json.load(f)
+        except FileNotFoundError:
+            metadata = {}
+        result['totals'] = [(key, metadata.get(key), value) for key, value in totals.items()
+                            if metadata.get(key) != value]
+        if result['totals'] and not dry_run:
+            metadata.update(totals)
+            metadata['lastUpdated'] = datetime.now(timezone.utc).isoformat(timespec='milliseconds') \
+                .replace('+00:00', 'Z')
+            write_json_atomic(metadata_path, metadata)
+    return result
+
+
+def relative_change(old, new):
+    if not isinstance(old, (int, float)) or not isinstance(new, (int, float)) or not old:
+        return ''
+    return f" ({(new - old) / old * 100:+.1f}%)"
+
+
+def print_report(sources, result, dataset_path, metadata_path, dry_run, elapsed):
+    print("Sources:")
+    for source in sources:
+        years = f", {'/'.join(source['years'])} figures" if source['years'] else ''
+        print(f"  • {source['path']} [{source['format']}{years}]: {source['rows']:,} rows, "
+              f"{source['used']:,} used, {source['skipped']:,} skipped, {len(source['values'])} states")
+        for name, field, county_sum, state_row in source['levelMismatches']:
+            print(f"      ⚠️  {name} {field}: counties sum to {county_sum:,}, state row says {state_row:,}"
+                  f"{relative_change(state_row, county_sum)}")
+    print(f"  Read and aggregated in {elapsed * 1000:.0f} ms")
+    print()
+
+    if result['disagreements']:
+        print(f"⚠️  {len(result['disagreements'])} value(s) differ between sources (last source used):")
+        for name, field, values in result['disagreements']:
+            listed = ', '.join(f"{value:,} ({os.path.basename(path)})" for path, value in values)
+            print(f"   {name} {field}: {listed}")
+        print()
+
+    if result['unsourced']:
+        print(f"⚠️  Not in any source, population figures kept: {', '.join(result['unsourced'])}")
+        print()
+
+    states = sorted({name for name, _, _, _ in result['changes']})
+    print(f"Record changes {'pending' if dry_run else 'made'}: {len(result['changes'])} "
+          f"field(s) in {len(states)} state(s)")
+    for name in states:
+        print(f"  • {name}")
+        for changed_name, field, old, new in result['changes']:
+            if changed_name == name:
+                old_text = f"{old:,}" if isinstance(old, (int, float)) else old
+                new_text = f"{new:,}" if isinstance(new, (int, float)) else new
+                print(f"      {field}: {old_text} → {new_text}{relative_change(old, new)}")
+    print()
+
+    for key, old, new in result['totals']:
+        print(f"  {key}: {old if old is None else format(old, ',')} → {new:,}{relative_change(old, new)}")
+    if result['totals']:
+        print()
+
+    if dry_run:
+        print(f"Dry run: {dataset_path} and {metadata_path} not modified")
+        return
+    if result['snapshot']:
+        print(f"✓ Previous version saved as snapshot {result['snapshot']} "
+              f"(python snapshot_store.py restore {result['snapshot']} --output {dataset_path})")
+        print(f"✓ Updated data saved: {dataset_path}")
+        print("  Rebuild the derived files (build_state_shards.py, build_market_stats.py, "
+              "build_method_cover.py) before deploying")
+    else:
+        print(f"✓ {dataset_path} already up to date")
+    if result['totals']:
+        print(f"✓ Updated totals saved: {metadata_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Ingest population figures from source CSVs')
+    parser.add_argument('--source', action='append', required=True,
+                        help='source CSV (repeatable; later sources win per field)')
+    parser.add_argument('--fields', default=','.join(POPULATION_FIELDS),
+                        help='comma-separated fields to take from the sources (default: %(default)s)')
+    parser.add_argument('--dataset', default=DEFAULT_DATASET)
+    parser.add_argument('--metadata', default=DEFAULT_METADATA)
+    parser.add_argument('--dry-run', action='store_true', help='report changes without writing')
+    args = parser.parse_args()
+
+    fields = [field.strip() for field in args.fields.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in POPULATION_FIELDS]
+    if unknown:
+        print(f"❌ Unknown field(s) {', '.join(unknown)} (one of {', '.join(POPULATION_FIELDS)})")
+        sys.exit(1)
+
+    state_names = {}
+    for record in iter_records(args.dataset):
+        state_names[record['state'].lower()] = record['state']
+        state_names[record['abbreviation'].lower()] = record['state']
+
+    print("=" * 80)
+    print("POPULATION INGESTION")
+    print("=" * 80)
+    print()
+
+    start = time.perf_counter()
+    try:
+        sources = [read_source(path, state_names) for path in args.source]
+    except SourceError as e:
+        print(f"❌ {e}; nothing written")
+        sys.exit(1)
+    elapsed = time.perf_counter() - start
+
+    result = ingest(args.dataset, args.metadata, sources, fields, args.dry_run)
+    print_report(sources, result, args.dataset, args.metadata, args.dry_run, elapsed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+IP address → state lookup index
+
+`compile` turns a local IP-range → region CSV into a compact binary file
+of sorted range arrays; `IPStateIndex` memory-maps that file (no parsing
+at load) and answers lookups by bisecting the range starts, for IPv4 and
+IPv6 (IPv4-mapped IPv6 addresses such as ::ffff:203.0.113.7 are looked up
+as IPv4). Regions are stored as states-data.json abbreviations, so a result
+joins directly to a state record.
+
+CSV input needs a region column (abbreviation, state name or "US-TX"
+style code) plus either start/end address columns or a CIDR network
+column. Rows for regions not in the dataset (other countries, territories)
+are skipped. Adjacent ranges of the same state are merged; overlapping
+ranges are an error.
+
+Binary layout (little-endian, sections 8-byte aligned):
+    header      magic 'IPST', version, state count, IPv4 count, IPv6 count, 0
+    states      4-byte NUL-padded abbreviations
+    IPv4        starts u32[n], ends u32[n], state indexes u16[n]
+    IPv6        starts [n][16 bytes big-endian], ends [n][16], state indexes u16[n]
+
+Batch lookups use numpy when it is installed.
+
+Usage:
+    python ip_state_index.py compile ranges.csv [--output data/ip-state-index.bin]
+    python ip_state_index.py lookup 8.8.8.8 2001:4860::8888
+    python ip_state_index.py bench [--count 1000000]
+"""
+import argparse
+import csv
+import ipaddress
+import mmap
+import os
+import random
+import socket
+import struct
+import sys
+import time
+from array import array
+from bisect import bisect_right
+
+from dataset_io import iter_records
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+DEFAULT_INDEX = 'data/ip-state-index.bin'
+MAGIC = b'IPST'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sIIIII')
+NO_STATE = -1
+# ::ffff:0:0/96 - IPv4 clients as reported by dual-stack sockets
+IPV4_MAPPED_PREFIX = bytes(10) + b'\xff\xff'
+
+
+def _align(offset):
+    return (offset + 7) & ~7
+
+
+def _ipv6_key(value):
+    return value.to_bytes(16, 'big')
+
+
+def _region_lookup(dataset_path):
+    """Map every accepted spelling of a region to its abbreviation"""
+    lookup = {}
+    for state in iter_records(dataset_path):
+        abbreviation = state['abbreviation'].upper()
+        for spelling in (abbreviation, f'US-{abbreviation}', state['state'].upper()):
+            lookup[spelling] = abbreviation
+    return lookup
+
+
+def read_ranges(csv_path, regions, region_column='region'):
+    """Parse the CSV into {4: [(start, end, abbreviation)], 6: [...]} plus a skipped-row count"""
+    ranges = {4: [], 6: []}
+    skipped = 0
+    with open(csv_path, 'r', newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        fields = reader.fieldnames or []
+        if region_column not in fields:
+            raise ValueError(f"{csv_path}: no {region_column!r} column (found {', '.join(fields)})")
+        if 'network' not in fields and not {'start', 'end'} <= set(fields):
+            raise ValueError(f"{csv_path}: need start/end or network columns")
+
+        for line, row in enumerate(reader, start=2):
+            abbreviation = regions.get(row[region_column].strip().upper())
+            if abbreviation is None:
+                skipped += 1
+                continue
+            try:
+                if row.get('network'):
+                    network = ipaddress.ip_network(row['network'].strip(), strict=False)
+                    start, end = network.network_address, network.broadcast_address
+                else:
+                    start = ipaddress.ip_address(row['start'].strip())
+                    end = ipaddress.ip_address(row['end'].strip())
+            except ValueError as e:
+                raise ValueError(f"{csv_path}:{line}: {e}") from None
+            if start.version != end.version or int(start) > int(end):
+                raise ValueError(f"{csv_path}:{line}: invalid range {start} - {end}")
+            ranges[start.version].append((int(start), int(end), abbreviation))
+    return ranges, skipped
+
+
+def merge_ranges(ranges):
+    """Sort ranges, merge adjacent ones of the same state and reject overlaps"""
+    merged = []
+    for start, end, state in sorted(ranges):
+        if merged:
+            last_start, last_end, last_state = merged[-1]
+            if start <= last_end:
+                raise ValueError(f"overlapping ranges at {ipaddress.ip_address(start)}")
+            if start == last_end + 1 and state == last_state:
+                merged[-1] = (last_start, end, state)
+                continue
+        merged.append((start, end, state))
+    return merged
+
+
+def compile_index(csv_path, dataset_path, output_path, region_column='region'):
+    """Build the binary index; returns (ipv4 ranges, ipv6 ranges, skipped rows)"""
+    regions = _region_lookup(dataset_path)
+    abbreviations = sorted(set(regions.values()))
+    state_index = {abbreviation: i for i, abbreviation in enumerate(abbreviations)}
+
+    ranges, skipped = read_ranges(csv_path, regions, region_column)
+    ipv4, ipv6 = [merge_ranges((start, end, state_index[abbreviation])
+                               for start, end, abbreviation in ranges[version])
+                  for version in (4, 6)]
+
+    out = bytearray(HEADER.pack(MAGIC, FORMAT_VERSION, len(abbreviations), len(ipv4), len(ipv6), 0))
+    out += b''.join(abbreviation.encode('ascii').ljust(4, b'\0') for abbreviation in abbreviations)
+    out += bytes(_align(len(out)) - len(out))
+
+    for values in (array('I', (r[0] for r in ipv4)), array('I', (r[1] for r in ipv4)),
+                   array('H', (r[2] for r in ipv4))):
+        if sys.byteorder != 'little':
+            values.byteswap()
+        out += values.tobytes()
+    out += bytes(_align(len(out)) - len(out))
+
+    out += b''.join(_ipv6_key(r[0]) for r in ipv6)
+    out += b''.join(_ipv6_key(r[1]) for r in ipv6)
+    states = array('H', (r[2] for r in ipv6))
+    if sys.byteorder != 'little':
+        states.byteswap()
+    out += states.tobytes()
+
+    tmp_path = output_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(out)
+    os.replace(tmp_path, output_path)
+    return len(ipv4), len(ipv6), skipped
+
+
+class _Keys:
+    """Sequence view of fixed-width big-endian keys, for bisect"""
+
+    def __init__(self, view, width):
+        self._view = view
+        self._width = width
+
+    def __len__(self):
+        return len(self._view) // self._width
+
+    def __getitem__(self, i):
+        return bytes(self._view[i * self._width:(i + 1) * self._width])
+
+
+class IPStateIndex:
+    """Memory-mapped IP → state index built by compile_index"""
+
+    def __init__(self, path=DEFAULT_INDEX):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+
+        magic, version, state_count, n4, n6, _ = HEADER.unpack_from(view)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{path}: not an IP state index (version {FORMAT_VERSION})")
+        if sys.byteorder != 'little':
+            raise ValueError(f"{path}: index files are little-endian")
+
+        offset = HEADER.size
+        self.abbreviations = [bytes(view[offset + 4 * i:offset + 4 * i + 4]).rstrip(b'\0').decode('ascii')
+                              for i in range(state_count)]
+        offset = _align(offset + 4 * state_count)
+
+        self._v4_starts = view[offset:offset + 4 * n4].cast('I')
+        self._v4_ends = view[offset + 4 * n4:offset + 8 * n4].cast('I')
+        self._v4_states = view[offset + 8 * n4:offset + 10 * n4].cast('H')
+        offset = _align(offset + 10 * n4)
+
+        self._v6_starts = _Keys(view[offset:offset + 16 * n6], 16)
+        self._v6_ends = _Keys(view[offset + 16 * n6:offset + 32 * n6], 16)
+        self._v6_states = view[offset + 32 * n6:offset + 34 * n6].cast('H')
+        self._v4_offset = _align(HEADER.size + 4 * state_count)
+        self._counts = (n4, n6)
+        self._views = [view, self._v4_starts, self._v4_ends, self._v4_states,
+                       self._v6_starts._view, self._v6_ends._view, self._v6_states]
+
+    def __len__(self):
+        return sum(self._counts)
+
+    def lookup_index(self, ip):
+        """Index into self.abbreviations for an address string, or NO_STATE"""
+        # inet_pton, unlike inet_aton, rejects shorthand such as '10.1' that
+        # would silently map to another address; both raise ValueError
+        # rather than OSError for strings with embedded NULs
+        try:
+            if ':' not in ip:
+                return self._lookup_v4_int(int.from_bytes(socket.inet_pton(socket.AF_INET, ip), 'big'))
+            key = socket.inet_pton(socket.AF_INET6, ip)
+        except (OSError, ValueError):
+            return NO_STATE
+        if key.startswith(IPV4_MAPPED_PREFIX):
+            return self._lookup_v4_int(int.from_bytes(key[12:], 'big'))
+        return self._lookup_v6_key(key)
+
+    def lookup(self, ip):
+        """State abbreviation for an address string, or None"""
+        i = self.lookup_index(ip)
+        return None if i == NO_STATE else self.abbreviations[i]
+
+    def lookup_many_ipv4(self, values):
+        """State indexes for an array of IPv4 addresses as unsigned ints (NO_STATE where unmapped)"""
+        if np is None:
+            return [self._lookup_v4_int(int(value)) for value in values]
+        values = np.asarray(values, dtype=np.uint32)
+        if self._counts[0] == 0:
+            return np.full(len(values), NO_STATE, dtype=np.int32)
+        starts = np.frombuffer(self._mmap, dtype='<u4', count=self._counts[0], offset=self._v4_offset)
+        ends = np.frombuffer(self._mmap, dtype='<u4', count=self._counts[0],
+                             offset=self._v4_offset + 4 * self._counts[0])
+        states = np.frombuffer(self._mmap, dtype='<u2', count=self._counts[0],
+                               offset=self._v4_offset + 8 * self._counts[0])
+        i = np.searchsorted(starts, values, side='right') - 1
+        clipped = np.maximum(i, 0)
+        hit = (i >= 0) & (values <= ends[clipped])
+        return np.where(hit, states[clipped].astype(np.int32), NO_STATE)
+
+    def _lookup_v4_int(self, value):
+        i = bisect_right(self._v4_starts, value) - 1
+        if i >= 0 and value <= self._v4_ends[i]:
+            return self._v4_states[i]
+        return NO_STATE
+
+    def _lookup_v6_key(self, key):
+        i = bisect_right(self._v6_starts, key) - 1
+        if i >= 0 and key <= self._v6_ends[i]:
+            return self._v6_states[i]
+        return NO_STATE
+
+    def lookup_many(self, ips):
+        """State abbreviations (or None) for a sequence of address strings
+
+        IPv4 addresses (including IPv4-mapped IPv6 ones) are converted once
+        and resolved in a single vectorized pass when numpy is available.
+        """
+        results = [None] * len(ips)
+        v4_positions, v4_values = [], []
+        for position, ip in enumerate(ips):
+            try:
+                if ':' not in ip:
+                    value = int.from_bytes(socket.inet_pton(socket.AF_INET, ip), 'big')
+                else:
+                    key = socket.inet_pton(socket.AF_INET6, ip)
+                    if not key.startswith(IPV4_MAPPED_PREFIX):
+                        i = self._lookup_v6_key(key)
+                        if i != NO_STATE:
+                            results[position] = self.abbreviations[i]
+                        continue
+                    value = int.from_bytes(key[12:], 'big')
+            except (OSError, ValueError):
+                continue
+            v4_values.append(value)
+            v4_positions.append(position)
+
+        for position, i in zip(v4_positions, self.lookup_many_ipv4(v4_values)):
+            if i != NO_STATE:
+                results[position] = self.abbreviations[i]
+        return results
+
+    def close(self):
+        """Unmap the file (deferred to garbage collection while batch results still reference it)"""
+        for view in reversed(self._views):
+            view.release()
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass
+
+
+def run_bench(index, count):
+    """Time single and batch IPv4 lookups over random addresses"""
+    rng = random.Random(0)
+    values = [rng.getrandbits(32) for _ in range(count)]
+    ips = [socket.inet_ntoa(value.to_bytes(4, 'big')) for value in values]
+
+    start = time.perf_counter()
+    for ip in ips:
+        index.lookup_index(ip)
+    single = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index.lookup_many_ipv4(values)
+    batch = time.perf_counter() - start
+
+    print(f"✓ {len(index):,} ranges, {count:,} random IPv4 lookups")
+    print(f"   • lookup():           {count / single:>14,.0f} lookups/s")
+    print(f"   • lookup_many_ipv4(): {count / batch:>14,.0f} lookups/s"
+          + ("" if np is not None else " (numpy not installed - pure Python fallback)"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='IP address to state lookup index')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    build = sub.add_parser('compile', help='compile an IP-range CSV into the binary index')
+    build.add_argument('csv')
+    build.add_argument('--dataset', default='data/states-data.json')
+    build.add_argument('--region-column', default='region')
+    build.add_argument('--output', default=DEFAULT_INDEX)
+
+    lookup = sub.add_parser('lookup', help='look up addresses')
+    lookup.add_argument('ips', nargs='+')
+    lookup.add_argument('--index', default=DEFAULT_INDEX)
+
+    bench = sub.add_parser('bench', help='measure lookup throughput')
+    bench.add_argument('--index', default=DEFAULT_INDEX)
+    bench.add_argument('--count', type=int, default=1000000)
+
+    args = parser.parse_args()
+
+    try:
+        if args.command == 'compile':
+            n4, n6, skipped = compile_index(args.csv, args.dataset, args.output, args.region_column)
+            print(f"✓ {args.output}: {n4:,} IPv4 ranges, {n6:,} IPv6 ranges "
+                  f"({skipped:,} rows outside the dataset skipped)")
+            return
+
+        index = IPStateIndex(args.index)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    if args.command == 'lookup':
+        for ip, abbreviation in zip(args.ips, index.lookup_many(args.ips)):
+            print(f"{ip}\t{abbreviation or '-'}")
+    else:
+        run_bench(index, args.count)
+
+
+if __name__ == '__main__':
+    main()
@@ -3,8 +3,29 @@
 
 let statesData = [];
 let populationMetadata = {};
+let marketStats = null; // precomputed selection lookup (data/market-stats.json)
+let methodCover = null; // precomputed minimum method sets (data/method-cover.json)
 let map = null;
 let geojsonLayer = null;
+let boundaryGeoJSON = null;
+
+// Data files the app loads. build.py rewrites these to fingerprinted names,
+// and the service worker sends the new names when a new build is cached.
+const dataUrls = {
+  summary: 'data/states-summary.json',
+  marketStats: 'data/market-stats.json',
+  methodCover: 'data/method-cover.json',
+  states: 'data/states-data.json',
+  metadata: 'data/population-metadata.json',
+  boundaries: 'data/us-states.topo.json',
+  search: 'data/search-index.json'
+};
+
+// Hash of data/states-data.json, written in by build.py (null when served
+// unbuilt). Derived files carry the hash of the dataset they were built
+// from as sourceHash; one that does not match the data in use is ignored.
+const DATASET_HASH = /* BUILD_DATASET_HASH */ null;
+let datasetHash = null; // sourceHash of the states data in use, if known
 
 // Legal glossary data
 const legalGlossary = {
@@ -561,25 +582,324 @@ document.addEventListener('DOMContentLoaded', async () => {
   document.getElementById('close-panel').addEventListener('click', () => {
     document.getElementById('state-panel').classList.remove('open');
   });
+
+  initServiceWorker();
 });
 
+// Register the service worker that build.py generates into dist/. It serves
+// the app shell from cache and posts 'data-updated' once a newer build's
+// data files are cached.
+function initServiceWorker() {
+  if (!('serviceWorker' in navigator)) return;
+
+  navigator.serviceWorker.addEventListener('message', event => {
+    if (event.data && event.data.type === 'data-updated') {
+      applyDataUpdate(event.data.assets);
+    }
+  });
+  navigator.serviceWorker.register('sw.js').catch(() => {
+    // Not a built site (no sw.js) - run without offline support
+  });
+}
+
+// Strip the content hash build.py adds: data/x.0123456789.json -> data/x.json
+function unfingerprinted(url) {
+  return url.replace(/\.[0-9a-f]{10}(\.\w+)$/, '$1');
+}
+
+// Switch to a newer build's data files and re-render everything that shows them
+async function applyDataUpdate(assets) {
+  const changed = Object.keys(dataUrls).filter(key => {
+    const updated = assets[unfingerprinted(dataUrls[key])];
+    if (!updated || updated === dataUrls[key]) return false;
+    dataUrls[key] = updated;
+    return true;
+  });
+  if (changed.length === 0) return;
+  console.log('New data version available:', changed.join(', '));
+
+  if (changed.includes('search') && searchIndexRequest) {
+    searchIndex = null;
+    searchIndexRequest = null;
+    await loadSearchIndex();
+  }
+  await loadStatesData();
+  if (changed.includes('boundaries') && map) {
+    boundaryGeoJSON = await loadBoundaries();
+  }
+  if (boundaryGeoJSON) {
+    addStatesLayer();
+  }
+
+  if (document.querySelector('.detailed-row')) {
+    populateDetailedStatesData();
+  }
+  if (document.querySelector('#gay-pop-table-body')?.children.length) {
+    populateGayPopulationTable();
+  }
+  renderTable();
+  updateMarketStats();
+
+  const panel = document.getElementById('state-panel');
+  if (panelState && panel.classList.contains('open')) {
+    const refreshed = statesData.find(s => s.state === panelState.state);
+    if (refreshed) showStateDetail(refreshed);
+  }
+}
+
 // Load states data from JSON
 async function loadStatesData() {
   try {
-    const response = await fetch('data/states-data.json');
-    statesData = await response.json();
+    // The slim summary (built by build_state_shards.py) and the market-stats
+    // table load in parallel; full legal texts are fetched per state on demand
+    const [summary, stats, cover] = await Promise.all([
+      fetchJson(dataUrls.summary),
+      fetchJson(dataUrls.marketStats),
+      fetchJson(dataUrls.methodCover)
+    ]);
+
+    if (summary && summary.version === 1 && summary.sourceHash &&
+        (DATASET_HASH === null || summary.sourceHash === DATASET_HASH)) {
+      statesData = summary.states.map(state => expandSummaryState(state, summary.methods));
+      populationMetadata = summary.metadata;
+      datasetHash = summary.sourceHash;
+    } else {
+      // No summary built, or built from another dataset - load the full one
+      if (summary) console.warn('states-summary.json does not match the dataset; loading the full data');
+      const [states, metadata] = await Promise.all([
+        fetchJson(dataUrls.states),
+        fetchJson(dataUrls.metadata)
+      ]);
+      if (!states) throw new Error(`${dataUrls.states} could not be loaded`);
+      statesData = states;
+      populationMetadata = metadata || {};
+      datasetHash = DATASET_HASH;
+    }
     console.log(`Loaded ${statesData.length} states`);
-    
-    // Load population metadata
-    const metaResponse = await fetch('data/population-metadata.json');
-    populationMetadata = await metaResponse.json();
     console.log('Loaded population metadata:', populationMetadata);
+
+    initMarketStats(stats);
+    initMethodCover(cover);
   } catch (error) {
     console.error('Error loading states data:', error);
     alert('Error loading data. Please refresh the page.');
   }
 }
 
+// Whether a derived file was built from the dataset statesData came from
+function isCurrentDerivedData(artifact) {
+  return datasetHash !== null && artifact.sourceHash === datasetHash;
+}
+
+// Fetch and parse a JSON file; null if it is missing or unreadable
+async function fetchJson(url) {
+  try {
+    const response = await fetch(url);
+    return response.ok ? await response.json() : null;
+  } catch (error) {
+    console.warn(`Could not load ${url}`, error);
+    return null;
+  }
+}
+
+// Unpack a summary record's methodMask into the usual verificationMethods object
+function expandSummaryState(state, methods) {
+  const { methodMask, ...legal } = state.legal;
+  legal.verificationMethods = Object.fromEntries(
+    methods.map((method, i) => [method, (methodMask & (1 << i)) !== 0])
+  );
+  return { ...state, legal };
+}
+
+// Full legal texts for a state. Summary records point at a content-hashed
+// shard that is fetched once and cached; full records already carry them.
+const legalDetailCache = new Map();
+
+function loadLegalDetail(state) {
+  if (!state.legalDetail) return Promise.resolve(state.legal);
+
+  if (!legalDetailCache.has(state.legalDetail)) {
+    const request = fetch(state.legalDetail)
+      .then(response => {
+        if (!response.ok) throw new Error(`${state.legalDetail}: HTTP ${response.status}`);
+        return response.json();
+      })
+      .catch(error => {
+        legalDetailCache.delete(state.legalDetail);
+        throw error;
+      });
+    legalDetailCache.set(state.legalDetail, request);
+  }
+  return legalDetailCache.get(state.legalDetail);
+}
+
+// Full-text search over the legal texts, the legal matrix and the glossary,
+// from the BM25 index built by build_search_index.py. The index is fetched
+// the first time the search box is used.
+const SEARCH_FIELD_LABELS = {
+  applicability: 'applicability',
+  idRequirements: 'ID requirements',
+  penalties: 'penalties',
+  citation: 'citation',
+  matrix: 'legal matrix',
+  glossary: 'glossary'
+};
+const MAX_PREFIX_TERMS = 32;
+const PHRASE_BOOST = 1;
+
+let searchIndex = null;
+let searchIndexRequest = null;
+
+function loadSearchIndex() {
+  if (!searchIndexRequest) {
+    searchIndexRequest = fetchJson(dataUrls.search).then(index => {
+      if (index && index.version === 1 && isCurrentDerivedData(index)) {
+        searchIndex = {
+          ...index,
+          stopWords: new Set(index.stopWords),
+          // A Map, so query tokens like "constructor" are not found on Object.prototype
+          terms: new Map(Object.entries(index.terms)),
+          sortedTerms: Object.keys(index.terms).sort(),
+          postings: new Map()
+        };
+      } else if (index) {
+        console.warn('search-index.json does not match the states data; full-text search is off');
+      }
+      return searchIndex;
+    });
+  }
+  return searchIndexRequest;
+}
+
+// Same tokens as build_search_index.py: lowercase [a-z0-9]+ minus stop words
+function tokenizeSearchText(text, stopWords) {
+  return (text.toLowerCase().match(/[a-z0-9]+/g) || []).filter(token => !stopWords.has(token));
+}
+
+// Decoded postings for a term: Map(doc -> {weight, positions}), cached
+function searchPostings(index, term) {
+  let postings = index.postings.get(term);
+  if (postings) return postings;
+
+  postings = new Map();
+  const raw = index.terms.get(term) || [];
+  let doc = 0;
+  for (let i = 0; i < raw.length; ) {
+    doc += raw[i];
+    const weight = raw[i + 1] / index.weightScale;
+    const count = raw[i + 2];
+    const positions = new Array(count);
+    let position = 0;
+    for (let j = 0; j < count; j++) {
+      position += raw[i + 3 + j];
+      positions[j] = position;
+    }
+    postings.set(doc, { weight, positions });
+    i += 3 + count;
+  }
+  index.postings.set(term, postings);
+  return postings;
+}
+
+// Index terms starting with prefix (binary search over the sorted term list)
+function searchPrefixTerms(index, prefix) {
+  const terms = index.sortedTerms;
+  let lo = 0, hi = terms.length;
+  while (lo < hi) {
+    const mid = (lo + hi) >> 1;
+    if (terms[mid] < prefix) lo = mid + 1; else hi = mid;
+  }
+  const matches = [];
+  for (let i = lo; i < terms.length && terms[i].startsWith(prefix) && matches.length < MAX_PREFIX_TERMS; i++) {
+    matches.push(terms[i]);
+  }
+  return matches;
+}
+
+// Rank documents for a query. Each query token scores a document by its best
+// matching term (the last token also matches as a prefix while it is being
+// typed); documents containing every token outrank the rest, and an exact
+// phrase match doubles the score. Returns [{doc, score, fields}] best first.
+function searchDocuments(index, query) {
+  const tokens = tokenizeSearchText(query, index.stopWords);
+  if (tokens.length === 0) return [];
+  const typing = !/\s$/.test(query);
+
+  const hits = new Map(); // doc -> {score, matched, positions}
+  tokens.forEach((token, t) => {
+    const terms = t === tokens.length - 1 && typing
+      ? searchPrefixTerms(index, token)
+      : (index.terms.has(token) ? [token] : []);
+
+    const best = new Map();
+    terms.forEach(term => {
+      searchPostings(index, term).forEach((posting, doc) => {
+        const current = best.get(doc);
+        if (!current || posting.weight > current.weight) best.set(doc, posting);
+      });
+    });
+    best.forEach((posting, doc) => {
+      let hit = hits.get(doc);
+      if (!hit) {
+        hit = { score: 0, matched: 0, positions: [] };
+        hits.set(doc, hit);
+      }
+      hit.score += posting.weight;
+      hit.matched += 1;
+      hit.positions.push(...posting.positions);
+    });
+  });
+
+  let results = [...hits].map(([doc, hit]) => ({ doc, ...hit }));
+  const complete = results.filter(result => result.matched === tokens.length);
+  if (complete.length > 0) results = complete;
+
+  if (tokens.length > 1 && tokens.every(token => index.terms.has(token))) {
+    const lists = tokens.map(token => searchPostings(index, token));
+    results.forEach(result => {
+      const first = lists[0].get(result.doc);
+      if (!first) return;
+      const following = lists.slice(1).map(list => new Set(list.get(result.doc)?.positions || []));
+      if (first.positions.some(p => following.every((positions, i) => positions.has(p + i + 1)))) {
+        result.score *= 1 + PHRASE_BOOST;
+      }
+    });
+  }
+
+  results.forEach(result => {
+    const fields = new Set(result.positions.map(position => {
+      const starts = index.docs[result.doc].fields;
+      let field = starts[0][0];
+      for (const [name, start] of starts) {
+        if (start > position) break;
+        field = name;
+      }
+      return field;
+    }));
+    result.fields = [...fields].map(field => SEARCH_FIELD_LABELS[field] || field);
+    delete result.positions;
+    delete result.matched;
+  });
+  return results.sort((a, b) => b.score - a.score);
+}
+
+// Full-text matches for the table search: {states: Map(name -> result), glossary: [results]}
+// or null while the index is not loaded
+function searchStatutes(query) {
+  if (!searchIndex || !query.trim()) return null;
+  const states = new Map();
+  const glossary = [];
+  searchDocuments(searchIndex, query).forEach(result => {
+    const doc = searchIndex.docs[result.doc];
+    if (doc.kind === 'state') {
+      states.set(doc.ref, result);
+    } else {
+      glossary.push({ ...result, label: doc.label, summary: doc.summary });
+    }
+  });
+  return { states, glossary };
+}
+
 // Initialize Leaflet map
 async function initMap() {
   // Create map
@@ -591,22 +911,77 @@ async function initMap() {
     maxZoom: 18
   }).addTo(map);
   
-  // Load US states GeoJSON
+  // Load US states boundaries
   try {
-    const response = await fetch('https://raw.githubusercontent.com/PublicaMundi/MappingAPI/master/data/geojson/us-states.json');
-    const geojson = await response.json();
-    
-    // Add GeoJSON layer
-    geojsonLayer = L.geoJSON(geojson, {
-      style: styleState,
-      onEachFeature: onEachFeature
-    }).addTo(map);
-    
+    boundaryGeoJSON = await loadBoundaries();
+    addStatesLayer();
   } catch (error) {
     console.error('Error loading GeoJSON:', error);
   }
 }
 
+// The simplified local asset built by build_boundaries.py; the remote
+// full-resolution GeoJSON is only a fallback if it cannot be loaded
+async function loadBoundaries() {
+  const topology = await fetchJson(dataUrls.boundaries);
+  if (topology) {
+    return topologyToGeoJSON(topology, 'states');
+  }
+  console.warn(`Falling back to remote boundaries; ${dataUrls.boundaries} is unavailable`);
+  const response = await fetch('https://raw.githubusercontent.com/PublicaMundi/MappingAPI/master/data/geojson/us-states.json');
+  return response.json();
+}
+
+// (Re)build the states layer; tooltips and click handlers capture the
+// current statesData records
+function addStatesLayer() {
+  if (geojsonLayer) {
+    map.removeLayer(geojsonLayer);
+  }
+  geojsonLayer = L.geoJSON(boundaryGeoJSON, {
+    style: styleState,
+    onEachFeature: onEachFeature
+  }).addTo(map);
+}
+
+// Decode a quantized, delta-encoded TopoJSON object into a GeoJSON FeatureCollection
+function topologyToGeoJSON(topology, objectName) {
+  const [scaleX, scaleY] = topology.transform.scale;
+  const [translateX, translateY] = topology.transform.translate;
+
+  const arcs = topology.arcs.map(arc => {
+    let x = 0, y = 0;
+    return arc.map(([dx, dy]) => {
+      x += dx;
+      y += dy;
+      return [x * scaleX + translateX, y * scaleY + translateY];
+    });
+  });
+
+  // Negative indices (~i) refer to arc i walked backwards
+  const ring = arcIndices => {
+    const points = [];
+    arcIndices.forEach(index => {
+      const arc = index < 0 ? arcs[~index].slice().reverse() : arcs[index];
+      points.push(...(points.length ? arc.slice(1) : arc));
+    });
+    return points;
+  };
+  const polygon = rings => rings.map(ring);
+
+  return {
+    type: 'FeatureCollection',
+    features: topology.objects[objectName].geometries.map(geometry => ({
+      type: 'Feature',
+      properties: geometry.properties,
+      geometry: {
+        type: geometry.type,
+        coordinates: geometry.type === 'Polygon' ? polygon(geometry.arcs) : geometry.arcs.map(polygon)
+      }
+    }))
+  };
+}
+
 // Create dynamic SVG patterns
 function createDynamicPatterns() {
   const defs = document.querySelector('#pattern-defs defs');
@@ -1063,6 +1438,7 @@ function onEachFeature(feature, layer) {
   
   // Hover effects
   layer.on('mouseover', function() {
+    loadLegalDetail(stateData).catch(() => {}); // warm the detail shard before a click
     this.setStyle({
       weight: 3,
       fillOpacity: 0.9
@@ -1075,6 +1451,8 @@ function onEachFeature(feature, layer) {
 }
 
 // Show state detail panel
+let panelState = null; // state currently shown, so late shard responses for another state are dropped
+
 function showStateDetail(state) {
   const panel = document.getElementById('state-panel');
   
@@ -1088,10 +1466,30 @@ function showStateDetail(state) {
   document.getElementById('panel-id-required').textContent = state.legal.idRequired ? 'Yes' : 'No';
   document.getElementById('panel-id-required').className = state.legal.idRequired ? 'text-lg text-red-600 font-semibold' : 'text-lg text-green-600 font-semibold';
   
-  // Exact legal language
-  document.getElementById('panel-applicability').textContent = state.legal.applicabilityExact;
-  document.getElementById('panel-id-requirements').textContent = state.legal.idRequirementsExact;
-  document.getElementById('panel-penalties').textContent = state.legal.penaltiesExact;
+  // Exact legal language (loaded on demand from the state's detail shard)
+  panelState = state;
+  const legalTextIds = {
+    'panel-applicability': 'applicabilityExact',
+    'panel-id-requirements': 'idRequirementsExact',
+    'panel-penalties': 'penaltiesExact'
+  };
+  for (const id of Object.keys(legalTextIds)) {
+    document.getElementById(id).textContent = 'Loading…';
+  }
+  loadLegalDetail(state)
+    .then(detail => {
+      if (panelState !== state) return;
+      for (const [id, field] of Object.entries(legalTextIds)) {
+        document.getElementById(id).textContent = detail[field];
+      }
+    })
+    .catch(error => {
+      console.error(`Error loading legal text for ${state.state}:`, error);
+      if (panelState !== state) return;
+      for (const id of Object.keys(legalTextIds)) {
+        document.getElementById(id).textContent = 'Unable to load legal text. Please try again.';
+      }
+    });
   document.getElementById('panel-citation').textContent = state.legal.citation;
   
   // Verification methods
@@ -1150,8 +1548,112 @@ function showStateDetail(state) {
   panel.classList.add('open');
 }
 
-// Update market coverage statistics
-function updateMarketStats() {
+// Set up the precomputed selection lookup table built by build_market_stats.py.
+// Optional: if it is missing or out of step with statesData, the market
+// stats are computed from statesData instead.
+function initMarketStats(stats) {
+  marketStats = null;
+  if (!stats) return;
+  const statesByName = new Map(statesData.map(state => [state.state, state]));
+  if (stats.version !== 1 || !isCurrentDerivedData(stats) ||
+      stats.states.length !== statesData.length || !stats.states.every(name => statesByName.has(name))) {
+    console.warn('market-stats.json does not match the states data; computing stats live');
+    return;
+  }
+  stats.stateRecords = stats.states.map(name => statesByName.get(name));
+  stats.methodBits = Object.fromEntries(stats.methods.map((method, i) => [method, 1 << i]));
+  stats.memberCache = new Map();
+  marketStats = stats;
+}
+
+// Decode an outcome's hex member bitset into state records (cached per outcome)
+function marketStatsMembers(outcomeIndex) {
+  let members = marketStats.memberCache.get(outcomeIndex);
+  if (members) return members;
+
+  members = decodeMemberBitset(marketStats.outcomes[outcomeIndex][5], marketStats.stateRecords);
+  marketStats.memberCache.set(outcomeIndex, members);
+  return members;
+}
+
+// Records whose bits are set in a hex bitset (bit i = records[i])
+function decodeMemberBitset(hex, records) {
+  const members = [];
+  for (let digit = 0; digit < hex.length; digit++) {
+    const nibble = parseInt(hex[hex.length - 1 - digit], 16);
+    for (let bit = 0; bit < 4; bit++) {
+      if (nibble & (1 << bit)) members.push(records[digit * 4 + bit]);
+    }
+  }
+  return members;
+}
+
+// Prepare the minimum method-cover table (built by build_method_cover.py);
+// the panel falls back to a live greedy cover if it is missing or stale
+function initMethodCover(cover) {
+  methodCover = null;
+  if (!cover) return;
+  const statesByName = new Map(statesData.map(state => [state.state, state]));
+  if (cover.version !== 1 || !isCurrentDerivedData(cover) ||
+      cover.states.length !== statesData.length || !cover.states.every(name => statesByName.has(name))) {
+    console.warn('method-cover.json does not match the states data; using the greedy cover');
+    return;
+  }
+  cover.stateRecords = cover.states.map(name => statesByName.get(name));
+  cover.stateIndex = new Map(cover.states.map((name, i) => [name, i]));
+  methodCover = cover;
+}
+
+// Exact minimum covers for a set of selected states, or null if not precomputed
+function lookupMethodCover(selectedStates) {
+  if (!methodCover) return null;
+
+  const nibbles = new Array(Math.ceil(methodCover.states.length / 4)).fill(0);
+  for (const state of selectedStates) {
+    const i = methodCover.stateIndex.get(state.state);
+    if (i === undefined) return null;
+    nibbles[i >> 2] |= 1 << (i & 3);
+  }
+  const key = nibbles.map(nibble => nibble.toString(16)).reverse().join('').replace(/^0+/, '') || '0';
+  const selection = methodCover.selections[key];
+  if (!selection) return null;
+
+  const expand = ([mask, population, uncovered]) => ({
+    methods: methodCover.methods.filter((method, i) => mask & (1 << i)),
+    population,
+    uncovered: decodeMemberBitset(uncovered, methodCover.stateRecords)
+  });
+  const [size, minimum, partial] = selection;
+  return { size, minimum: minimum.map(expand), partial: partial.map(expand) };
+}
+
+// Look up the current selection in the precomputed table
+function lookupMarketSelection() {
+  if (!marketStats) return null;
+
+  let outcomeIndex;
+  if (activeFilterMode === 'idCheck') {
+    const mask = getSelectedIdMethods().reduce((m, method) => m | (marketStats.methodBits[method] || 0), 0);
+    outcomeIndex = marketStats.methodIndex[mask];
+  } else {
+    const mask = getSelectedTiers().reduce((m, tier) => m | (1 << tier), 0);
+    outcomeIndex = marketStats.tierIndex[mask];
+  }
+
+  const [count, population, populationPercent, gayMalePopulation, totalLgbtPopulation] =
+    marketStats.outcomes[outcomeIndex];
+  return {
+    selectedStates: marketStatsMembers(outcomeIndex),
+    totalStates: count,
+    totalPopPercent: populationPercent,
+    totalPopulation: population,
+    totalGayPopulation: totalLgbtPopulation,
+    totalGayMalePopulation: gayMalePopulation
+  };
+}
+
+// Compute the current selection's aggregates directly from statesData
+function computeMarketSelection() {
   let selectedStates;
 
   if (activeFilterMode === 'idCheck') {
@@ -1194,6 +1696,16 @@ function updateMarketStats() {
   // Calculate gay population statistics
   const totalGayPopulation = selectedStates.reduce((sum, state) => sum + (state.totalLgbtPopulation || 0), 0);
   const totalGayMalePopulation = selectedStates.reduce((sum, state) => sum + (state.gayMalePopulation || 0), 0);
+
+  return { selectedStates, totalStates, totalPopPercent, totalPopulation, totalGayPopulation, totalGayMalePopulation };
+}
+
+// Update market coverage statistics
+function updateMarketStats() {
+  const {
+    selectedStates, totalStates, totalPopPercent, totalPopulation, totalGayPopulation, totalGayMalePopulation
+  } = lookupMarketSelection() || computeMarketSelection();
+
   const gayMalePercentCoverage = populationMetadata.totalUSGayMalePopulation > 0 ? 
     (totalGayMalePopulation / populationMetadata.totalUSGayMalePopulation * 100) : 0;
 
@@ -1236,6 +1748,94 @@ function updateMarketStats() {
   updateVerificationMethods(selectedStates);
 }
 
+// Greedy fallback when method-cover.json is unavailable: pick the method from
+// the lowest friction group that covers the most remaining states
+function greedyMethodCover(statesWithRequirements, methodHierarchy, methodToStates, methodCounts) {
+  const mustProcessMethods = [];
+  const coveredStates = new Set();
+  const methodAssignedStates = {}; // Track which states are assigned to each method
+
+  // First, handle states that require MULTIPLE specific methods
+  // Currently only Florida requires BOTH anonymousOption AND commerciallySoftware
+  statesWithRequirements.forEach(state => {
+    const methods = state.legal.verificationMethods;
+
+    // Check if state requires anonymousOption (Florida is the only one)
+    if (methods.anonymousOption) {
+      if (!mustProcessMethods.includes('anonymousOption')) {
+        mustProcessMethods.push('anonymousOption');
+        methodAssignedStates['anonymousOption'] = [];
+      }
+      methodAssignedStates['anonymousOption'].push(state);
+      // Don't mark as covered yet - Florida also needs commerciallySoftware
+    }
+  });
+
+  const allMethodsSorted = Object.keys(methodCounts).sort((a, b) => {
+    // Sort by: 1) tier (lower is better), 2) coverage (higher is better)
+    const tierDiff = methodHierarchy[a].group - methodHierarchy[b].group;
+    if (tierDiff !== 0) return tierDiff;
+    return methodCounts[b] - methodCounts[a]; // Higher coverage first
+  });
+
+  // Greedy selection: pick methods until all states are covered
+  while (coveredStates.size < statesWithRequirements.length && allMethodsSorted.length > 0) {
+    let bestMethod = null;
+    let bestNewCoverage = 0;
+    let bestTier = Infinity;
+    let bestNewStates = [];
+
+    // Find the method from the LOWEST tier that covers the most NEW states
+    for (const method of allMethodsSorted) {
+      if (mustProcessMethods.includes(method)) continue;
+
+      const tier = methodHierarchy[method].group;
+      const newStates = (methodToStates[method] || []).filter(
+        state => !coveredStates.has(state)
+      );
+
+      // Pick this method if:
+      // 1. It's from a lower tier than current best, OR
+      // 2. Same tier but covers more new states
+      if (newStates.length > 0 && (tier < bestTier || (tier === bestTier && newStates.length > bestNewCoverage))) {
+        bestMethod = method;
+        bestNewCoverage = newStates.length;
+        bestTier = tier;
+        bestNewStates = newStates;
+      }
+    }
+
+    if (!bestMethod) break; // No more methods can help
+
+    // Add this method to the must-process list and track assigned states
+    mustProcessMethods.push(bestMethod);
+    methodAssignedStates[bestMethod] = bestNewStates;
+    bestNewStates.forEach(state => coveredStates.add(state));
+  }
+
+  return { mustProcessMethods, methodAssignedStates };
+}
+
+// Pick the lowest-friction minimum cover and attribute each state to the
+// method it needs (its minimumRequirement if set, else its cheapest
+// accepted method in the cover)
+function assignExactCover(exactCover, statesWithRequirements, methodHierarchy) {
+  const friction = methods => methods.reduce((sum, method) => sum + methodHierarchy[method].group, 0);
+  const best = [...exactCover.minimum].sort((a, b) =>
+    friction(a.methods) - friction(b.methods) || b.population - a.population)[0];
+
+  const mustProcessMethods = [...best.methods].sort((a, b) => methodHierarchy[a].group - methodHierarchy[b].group);
+  const methodAssignedStates = Object.fromEntries(mustProcessMethods.map(method => [method, []]));
+  statesWithRequirements.forEach(state => {
+    const required = state.legal.minimumRequirement;
+    const method = mustProcessMethods.includes(required)
+      ? required
+      : mustProcessMethods.find(m => state.legal.verificationMethods[m]);
+    if (method) methodAssignedStates[method].push(state);
+  });
+  return { mustProcessMethods, methodAssignedStates };
+}
+
 // Update verification methods with hierarchical display
 function updateVerificationMethods(selectedStates) {
   const minimumEl = document.getElementById('verification-minimum');
@@ -1315,70 +1915,14 @@ function updateVerificationMethods(selectedStates) {
     });
   });
 
-  // SMART GREEDY ALGORITHM: Find minimum set of lowest-tier methods to cover all states
-  const mustProcessMethods = [];
-  const coveredStates = new Set();
-  const methodAssignedStates = {}; // Track which states are assigned to each method
-
-  // First, handle states that require MULTIPLE specific methods
-  // Currently only Florida requires BOTH anonymousOption AND commerciallySoftware
-  statesWithRequirements.forEach(state => {
-    const methods = state.legal.verificationMethods;
-
-    // Check if state requires anonymousOption (Florida is the only one)
-    if (methods.anonymousOption) {
-      if (!mustProcessMethods.includes('anonymousOption')) {
-        mustProcessMethods.push('anonymousOption');
-        methodAssignedStates['anonymousOption'] = [];
-      }
-      methodAssignedStates['anonymousOption'].push(state);
-      // Don't mark as covered yet - Florida also needs commerciallySoftware
-    }
-  });
-
-  const allMethodsSorted = Object.keys(methodCounts).sort((a, b) => {
-    // Sort by: 1) tier (lower is better), 2) coverage (higher is better)
-    const tierDiff = methodHierarchy[a].group - methodHierarchy[b].group;
-    if (tierDiff !== 0) return tierDiff;
-    return methodCounts[b] - methodCounts[a]; // Higher coverage first
-  });
-
-  // Greedy selection: pick methods until all states are covered
-  while (coveredStates.size < statesWithRequirements.length && allMethodsSorted.length > 0) {
-    let bestMethod = null;
-    let bestNewCoverage = 0;
-    let bestTier = Infinity;
-    let bestNewStates = [];
-
-    // Find the method from the LOWEST tier that covers the most NEW states
-    for (const method of allMethodsSorted) {
-      if (mustProcessMethods.includes(method)) continue;
-
-      const tier = methodHierarchy[method].group;
-      const newStates = (methodToStates[method] || []).filter(
-        state => !coveredStates.has(state)
-      );
-
-      // Pick this method if:
-      // 1. It's from a lower tier than current best, OR
-      // 2. Same tier but covers more new states
-      if (newStates.length > 0 && (tier < bestTier || (tier === bestTier && newStates.length > bestNewCoverage))) {
-        bestMethod = method;
-        bestNewCoverage = newStates.length;
-        bestTier = tier;
-        bestNewStates = newStates;
-      }
-    }
-
-    if (!bestMethod) break; // No more methods can help
-
-    // Add this method to the must-process list and track assigned states
-    mustProcessMethods.push(bestMethod);
-    methodAssignedStates[bestMethod] = bestNewStates;
-    bestNewStates.forEach(state => coveredStates.add(state));
-  }
+  // Smallest method set covering every state: exact from the precomputed
+  // table when available, otherwise the greedy heuristic
+  const exactCover = lookupMethodCover(selectedStates);
+  const { mustProcessMethods, methodAssignedStates } = exactCover
+    ? assignExactCover(exactCover, statesWithRequirements, methodHierarchy)
+    : greedyMethodCover(statesWithRequirements, methodHierarchy, methodToStates, methodCounts);
 
-  // "Other Options" = Everything else not selected by greedy algorithm
+  // "Other Options" = Everything else not in the must-process set
   const otherMethods = Object.keys(methodCounts).filter(method =>
     !mustProcessMethods.includes(method)
   );
@@ -1393,6 +1937,8 @@ function updateVerificationMethods(selectedStates) {
 
     if (mustProcessMethods.length === 1) {
       html += '<div class="text-xs text-green-700 mb-2 italic">Simplest option covering all selected states</div>';
+    } else if (exactCover) {
+      html += `<div class="text-xs text-green-700 mb-2 italic">Smallest set of methods covering all states (no ${mustProcessMethods.length - 1}-method set does)</div>`;
     } else {
       html += '<div class="text-xs text-green-700 mb-2 italic">Optimal combination of simplest methods to cover all states</div>';
     }
@@ -1418,8 +1964,22 @@ function updateVerificationMethods(selectedStates) {
       const stateList = assignedStates.map(s => s.state).sort().join(', ');
       html += `<div class="text-sm text-green-900">• <span class="legal-term font-medium" data-term="${info.term}">${info.label}</span> <span class="state-allocation-count text-green-700 text-xs cursor-help" data-states="${stateList}">(${coverage})</span></div>`;
     });
+    html += '</div>';
 
-    html += '</div></div>';
+    if (exactCover && exactCover.partial.length > 0) {
+      // What fewer methods would reach (best set of each smaller size)
+      const selectedPopulation = selectedStates.reduce((sum, state) => sum + state.population, 0);
+      html += '<div class="mt-2 pt-2 border-t border-green-200 space-y-0.5">';
+      html += '<div class="text-xs text-green-700 italic">With fewer methods</div>';
+      exactCover.partial.forEach(option => {
+        const labels = option.methods.map(method => methodHierarchy[method].label).join(' + ');
+        const reach = selectedPopulation > 0 ? (option.population / selectedPopulation * 100).toFixed(1) : '0.0';
+        const leftOut = option.uncovered.map(s => s.state).sort().join(', ');
+        html += `<div class="text-xs text-green-900">${labels}: ${reach}% of population <span class="state-allocation-count text-green-700 cursor-help" data-states="${leftOut}">(misses ${option.uncovered.length})</span></div>`;
+      });
+      html += '</div>';
+    }
+    html += '</div>';
     minimumEl.innerHTML = html;
 
     // Initialize state allocation tooltips
@@ -1891,9 +2451,13 @@ function renderTable() {
   const tierFilter = document.getElementById('tier-filter').value;
   const idReqFilter = document.getElementById('id-req-filter').value;
   
+  const textMatches = searchStatutes(searchQuery);
+  renderGlossaryMatches(textMatches ? textMatches.glossary : []);
+
   // Filter states
   let filteredStates = statesData.filter(state => {
-    const matchesSearch = state.state.toLowerCase().includes(searchQuery);
+    const matchesSearch = state.state.toLowerCase().includes(searchQuery) ||
+      (textMatches !== null && textMatches.states.has(state.state));
     const matchesTier = !tierFilter || state.legal.tier.toString() === tierFilter;
     const matchesIdReq = !idReqFilter || 
       (idReqFilter === 'yes' && state.legal.idRequired) ||
@@ -1939,13 +2503,25 @@ function renderTable() {
       return tableSortDirection === 'asc' ? aVal - bVal : bVal - aVal;
     }
   });
+
+  // While searching, name matches come first, then states by relevance
+  if (textMatches) {
+    const rank = state => state.state.toLowerCase().includes(searchQuery)
+      ? Infinity
+      : (textMatches.states.get(state.state)?.score || 0);
+    sortedStates.sort((a, b) => rank(b) - rank(a));
+  }
   
   // Render rows
   sortedStates.forEach(state => {
     const row = document.createElement('tr');
     row.dataset.state = state.state;
+    const textMatch = textMatches?.states.get(state.state);
+    const matchedIn = textMatch
+      ? `<div class="text-xs font-normal text-gray-500">matched in ${textMatch.fields.join(', ')}</div>`
+      : '';
     row.innerHTML = `
-      <td class="px-4 py-3 text-sm font-medium text-gray-900">${state.state}</td>
+      <td class="px-4 py-3 text-sm font-medium text-gray-900">${state.state}${matchedIn}</td>
       <td class="px-4 py-3 text-sm">
         <span class="tier-badge tier-${state.legal.tier}">Tier ${state.legal.tier}</span>
       </td>
@@ -1974,6 +2550,16 @@ function renderTable() {
   });
 }
 
+// Glossary terms matching the table search, shown above the table
+function renderGlossaryMatches(matches) {
+  const container = document.getElementById('search-glossary');
+  if (!container) return;
+  container.innerHTML = matches.slice(0, 3).map(match =>
+    `<div><strong>📖 ${match.label}:</strong> ${match.summary}</div>`
+  ).join('');
+  container.classList.toggle('hidden', matches.length === 0);
+}
+
 // Initialize table sorting
 function initTableSorting() {
   document.querySelectorAll('.table-header').forEach(header => {
@@ -2012,6 +2598,17 @@ function initTableFilters() {
   }
   
   searchInput.addEventListener('input', renderTable);
+
+  // Full-text search needs the index; fetch it on first use and re-run the
+  // search once it arrives
+  const ensureSearchIndex = () => {
+    if (searchIndexRequest) return;
+    loadSearchIndex().then(index => {
+      if (index && searchInput.value) renderTable();
+    });
+  };
+  searchInput.addEventListener('focus', ensureSearchIndex);
+  searchInput.addEventListener('input', ensureSearchIndex);
   
   tierFilter.addEventListener('change', () => {
     updateFilterStyling();
@@ -0,0 +1,81 @@
+// US Adult Content Compliance Dashboard
+// Service worker template - build.py fills in BUILD and writes dist/sw.js
+
+const BUILD = /* BUILD_MANIFEST */ null;
+
+const CACHE_PREFIX = 'compliance-dashboard-';
+const CACHE_NAME = CACHE_PREFIX + BUILD.version;
+const RUNTIME_CACHE = CACHE_PREFIX + 'runtime';
+
+// Third-party scripts and styles the dashboard needs to render offline
+const CDN_HOSTS = ['unpkg.com', 'cdn.tailwindcss.com'];
+
+// Precache the app shell and first-render data; other data files are
+// cached by staleWhileRevalidate when first requested
+self.addEventListener('install', event => {
+  event.waitUntil(
+    caches.open(CACHE_NAME)
+      .then(cache => cache.addAll(BUILD.precache))
+      .then(() => self.skipWaiting())
+  );
+});
+
+// Drop the previous build's cache and tell open pages to switch to the new
+// data files
+self.addEventListener('activate', event => {
+  event.waitUntil((async () => {
+    const oldCaches = (await caches.keys()).filter(name =>
+      name.startsWith(CACHE_PREFIX) && name !== CACHE_NAME && name !== RUNTIME_CACHE
+    );
+    await Promise.all(oldCaches.map(name => caches.delete(name)));
+    await self.clients.claim();
+
+    if (oldCaches.length > 0) {
+      const clients = await self.clients.matchAll({ type: 'window' });
+      clients.forEach(client => client.postMessage({ type: 'data-updated', assets: BUILD.assets }));
+    }
+  })());
+});
+
+self.addEventListener('fetch', event => {
+  const request = event.request;
+  if (request.method !== 'GET') return;
+
+  const url = new URL(request.url);
+  if (url.origin === self.location.origin) {
+    if (url.pathname.includes('/data/')) {
+      event.respondWith(staleWhileRevalidate(event, CACHE_NAME));
+    } else {
+      event.respondWith(cacheFirst(request, url));
+    }
+  } else if (CDN_HOSTS.includes(url.hostname)) {
+    event.respondWith(staleWhileRevalidate(event, RUNTIME_CACHE));
+  }
+});
+
+// Serve from cache immediately and refresh the cached copy in the background
+async function staleWhileRevalidate(event, cacheName) {
+  const cache = await caches.open(cacheName);
+  const cached = await cache.match(event.request);
+  const network = fetch(event.request).then(response => {
+    if (response.ok || response.type === 'opaque') {
+      cache.put(event.request, response.clone());
+    }
+    return response;
+  });
+
+  if (cached) {
+    event.waitUntil(network.catch(() => {}));
+    return cached;
+  }
+  return network;
+}
+
+// App shell: the precached copy belongs to this build, so it never goes
+// stale; a new build arrives as a new service worker
+async function cacheFirst(request, url) {
+  const cache = await caches.open(CACHE_NAME);
+  const key = url.pathname.endsWith('/') ? new URL('index.html', url).href : request;
+  const cached = await cache.match(key, { ignoreSearch: request.mode === 'navigate' });
+  return cached || fetch(request);
+}
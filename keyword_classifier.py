@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Compiled keyword classifier for verification methods and penalty types
+
+The keyword tables below are compiled into a single regular expression per
+table, so each document is scanned once and its flags come back as a
+bitmask (bit i = i-th key of the table).
+
+Usage:
+    python keyword_classifier.py bills/*.txt   # classify a corpus, one JSON line per file
+"""
+import json
+import re
+import sys
+
+# flag -> alternatives; an alternative matches when ALL of its terms appear
+METHOD_KEYWORDS = {
+    'creditCard': [('credit card',), ('debit card',)],
+    'digitizedId': [('digitized id',), ('digital id',)],
+    'governmentId': [('government-issued id',), ('government issued id',)],
+    'transactionalData': [('transactional data',)],
+    'ial2Required': [('ial2',), ('identity assurance level 2',)],
+    'photoMatching': [('photo', 'match')],
+    'anonymousOption': [('anonymous',)],
+    'thirdPartyService': [('third party',), ('third-party',)],
+    'commercialDatabase': [('commercial database',), ('commercially available database',)],
+    'commerciallySoftware': [('commercially available software',), ('commercially reasonable',)],
+    'bankAccount': [('bank account',)],
+    'financialDocument': [('financial document',)],
+}
+
+PENALTY_KEYWORDS = {
+    'punitiveDamages': [('punitive',)],
+    'injunctiveRelief': [('injunctive',)],
+    'statutoryDamages': [('statutory',)],
+}
+
+
+class KeywordClassifier:
+    """Multi-pattern matcher compiled from a flag -> keyword table"""
+
+    def __init__(self, table):
+        self.flags = list(table)
+        terms = sorted({term for alternatives in table.values()
+                        for alternative in alternatives for term in alternative})
+        self._term_bits = {term: 1 << i for i, term in enumerate(terms)}
+
+        # A zero-width lookahead reports every start position, so terms
+        # that overlap at different offsets are all seen. At the same
+        # offset only the longest term matches; it implies its prefixes.
+        alternation = '|'.join(re.escape(term) for term in sorted(terms, key=len, reverse=True))
+        self._pattern = re.compile(f'(?=({alternation}))')
+        self._implied = {
+            term: self._mask_of(t for t in terms if term.startswith(t))
+            for term in terms
+        }
+
+        # (flag bit, required term mask) for every alternative
+        self._rules = [
+            (1 << i, self._mask_of(alternative))
+            for i, flag in enumerate(self.flags)
+            for alternative in table[flag]
+        ]
+
+    def _mask_of(self, terms):
+        mask = 0
+        for term in terms:
+            mask |= self._term_bits[term]
+        return mask
+
+    def classify(self, text):
+        """Return the flag bitmask for one document"""
+        if not text:
+            return 0
+
+        seen = 0
+        implied = self._implied
+        for match in self._pattern.finditer(text.lower()):
+            seen |= implied[match.group(1)]
+
+        mask = 0
+        for flag_bit, required in self._rules:
+            if seen & required == required:
+                mask |= flag_bit
+        return mask
+
+    def classify_many(self, texts):
+        """Classify a corpus, returning one bitmask per document"""
+        classify = self.classify
+        return [classify(text) for text in texts]
+
+    def flag_names(self, mask):
+        """Expand a bitmask to flag names in table order"""
+        return [flag for i, flag in enumerate(self.flags) if mask >> i & 1]
+
+
+METHOD_CLASSIFIER = KeywordClassifier(METHOD_KEYWORDS)
+PENALTY_CLASSIFIER = KeywordClassifier(PENALTY_KEYWORDS)
+
+
+def classify_corpus(paths):
+    """Yield (path, method flags, penalty flags) for each text file"""
+    for path in paths:
+        with open(path, 'r') as f:
+            text = f.read()
+        yield (path,
+               METHOD_CLASSIFIER.flag_names(METHOD_CLASSIFIER.classify(text)),
+               PENALTY_CLASSIFIER.flag_names(PENALTY_CLASSIFIER.classify(text)))
+
+
+if __name__ == '__main__':
+    for path, methods, penalties in classify_corpus(sys.argv[1:]):
+        print(json.dumps({'file': path, 'methods': methods, 'penalties': penalties}))
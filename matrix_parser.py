@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Single-pass parser for legal_matrix_data.txt shared by all review scripts
+
+The matrix is a flat list of lines. Each jurisdiction starts with a Yes/No
+line (ID required?) followed by its name, then applicability, requirements,
+penalties and citation. Lines starting with '-' continue the previous field,
+and anything after the citation is collected as notes.
+
+The parsed index is cached on disk keyed by the file's path and content
+hash, so repeat runs against an unchanged matrix skip parsing entirely;
+caches for earlier contents of the same file are deleted when a new one is
+written, while other matrix files keep theirs.
+
+legal_matrix_data.md holds the same matrix as a table (RTF despite its
+extension; Markdown pipe tables are read too). iter_matrix_table streams
+its rows through a memory map, one row in memory at a time, and yields
+records in the same layout, with exact cell boundaries (the flat .txt loses
+them for multi-line cells) and the citation's hyperlink as citationUrl.
+"""
+import hashlib
+import json
+import mmap
+import os
+import re
+from contextlib import contextmanager
+
+MATRIX_FIELDS = ['applicability', 'requirements', 'penalties', 'citation']
+
+# Header lines that look like a record start but are not jurisdictions
+HEADER_LINES = ['ID Req?', 'States', '-']
+
+# Bump when the record layout changes so stale caches are ignored
+INDEX_VERSION = 1
+
+DEFAULT_CACHE_DIR = '.cache'
+PATH_KEY_LENGTH = 16
+
+# matrix-index-v<version>-<path key>-<content hash>.json; caches written
+# before the path key was added match with an empty path key
+CACHE_NAME = re.compile(r'matrix-index-v\d+-(?:([0-9a-f]{%d})-)?[0-9a-f]{64}\.json' % PATH_KEY_LENGTH)
+
+
+def _is_record_start(line, next_line):
+    """A Yes/No line followed by a capitalised name opens a new record"""
+    return (line in ['Yes', 'No'] and len(next_line) > 0
+            and next_line[0].isupper() and next_line not in HEADER_LINES)
+
+
+def _new_record(id_required):
+    return {
+        'idRequired': id_required,
+        'applicability': '',
+        'requirements': '',
+        'penalties': '',
+        'citation': '',
+        'notes': ''
+    }
+
+
+def iter_matrix_records(lines):
+    """Walk the matrix lines once, yielding (state_name, record) pairs"""
+    state_name = None
+    record = None
+    field_idx = -1
+    pending = None
+
+    for raw in lines:
+        line = raw.strip()
+
+        # A Yes/No line is only a record start if the next line is a name,
+        # so hold it back until we have seen what follows
+        if pending is not None:
+            if _is_record_start(pending, line):
+                if record is not None:
+                    yield state_name, record
+                state_name = line
+                record = _new_record(pending == 'Yes')
+                field_idx = -1
+                pending = None
+                continue
+            previous, pending = pending, None
+            if record is not None:
+                field_idx = _append_line(record, field_idx, previous)
+
+        if line in ['Yes', 'No']:
+            pending = line
+            continue
+
+        if record is None or not line:
+            continue
+
+        field_idx = _append_line(record, field_idx, line)
+
+    if pending is not None and record is not None:
+        _append_line(record, field_idx, pending)
+    if record is not None:
+        yield state_name, record
+
+
+def _append_line(record, field_idx, line):
+    """Add one non-empty line to the record and return the new field index"""
+    # Continuation lines stay in the current field; anything else moves on
+    if field_idx < 0 or not line.startswith('-'):
+        field_idx += 1
+
+    field = MATRIX_FIELDS[field_idx] if field_idx < len(MATRIX_FIELDS) else 'notes'
+    if record[field]:
+        record[field] += ' ' + line
+    else:
+        record[field] = line
+    return field_idx
+
+
+def iter_matrix_file(path):
+    """Stream (state_name, record) pairs from a .txt matrix line by line"""
+    with open(path, 'r', encoding='utf-8') as f:
+        yield from iter_matrix_records(f)
+
+
+# Table columns after the ID Req? and state name columns
+TABLE_FIELDS = MATRIX_FIELDS
+
+RTF_TOKEN = re.compile(
+    rb"\\'([0-9a-fA-F]{2})"            # \'92: code-page character
+    rb"|\\([a-zA-Z]+)(-?\d+)? ?"        # control word with optional parameter
+    rb"|\\(.)"                         # control symbol (\\, \{, backslash-newline, ...)
+    rb"|([{}])"
+    rb"|[\r\n]+"                        # raw line breaks are not text in RTF
+    rb"|([^\\{}\r\n]+)", re.DOTALL)
+RTF_SKIPPED_DESTINATIONS = {b'fonttbl', b'colortbl', b'expandedcolortbl', b'stylesheet', b'info', b'pict'}
+RTF_CHARACTERS = {
+    b'par': '\n', b'line': '\n', b'tab': ' ', b'emdash': '\u2014', b'endash': '\u2013',
+    b'lquote': '\u2018', b'rquote': '\u2019', b'ldblquote': '\u201c', b'rdblquote': '\u201d',
+    b'bullet': '\u2022',
+}
+RTF_SYMBOLS = {b'\n': '\n', b'\r': '\n', b'~': ' ', b'-': '', b'_': '-'}
+HYPERLINK = re.compile(r'HYPERLINK\s+"([^"]*)"')
+MARKDOWN_LINK = re.compile(r'\[([^\]]*)\]\(([^)\s]*)\)')
+MARKDOWN_SEPARATOR = re.compile(r'^\|?\s*:?-{3,}')
+
+
+@contextmanager
+def _mapped(path):
+    """Read-only memory map of path (empty bytes for an empty file)"""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b''
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            yield data
+
+
+def _rtf_rows(tokens, codepage='cp1252'):
+    """Yield ([cell text], [cell link]) for each \\row of an RTF token stream"""
+    cells, links = [], []
+    text, link = [], ''
+    # Per group: (skipped, capturing field instruction)
+    skipped, capture = False, False
+    stack = []
+    ignorable = False
+    instruction = []
+    skip_chars = 0
+    unicode_skip = 1
+
+    for match in tokens:
+        hex_char, word, param, symbol, brace, chunk = match.groups()
+        if brace == b'{':
+            stack.append((skipped, capture))
+            ignorable = False
+            continue
+        if brace == b'}':
+            if capture and not (stack and stack[-1][1]):
+                found = HYPERLINK.search(''.join(instruction))
+                if found:
+                    link = found.group(1)
+                instruction = []
+            skipped, capture = stack.pop() if stack else (False, False)
+            continue
+
+        if word is not None:
+            if word in RTF_SKIPPED_DESTINATIONS or (ignorable and word != b'fldinst'):
+                skipped = True
+            elif word == b'fldinst':
+                skipped, capture = True, True
+            ignorable = False
+            if skipped:
+                continue
+            if word == b'uc':
+                unicode_skip = int(param or 1)
+            elif word == b'u':
+                value = int(param)
+                text.append(chr(value + 0x10000 if value < 0 else value))
+                skip_chars = unicode_skip
+            elif word == b'trowd':
+                cells, links, text, link = [], [], [], ''
+            elif word == b'cell':
+                cells.append(''.join(text))
+                links.append(link)
+                text, link = [], ''
+            elif word == b'row':
+                yield cells, links
+                cells, links, text, link = [], [], [], ''
+            elif word in RTF_CHARACTERS:
+                text.append(RTF_CHARACTERS[word])
+            continue
+
+        if symbol == b'*':
+            ignorable = True
+            continue
+        if capture:
+            if chunk is not None:
+                instruction.append(chunk.decode('latin-1'))
+            continue
+        if skipped:
+            continue
+        if hex_char is not None:
+            if skip_chars:
+                skip_chars -= 1
+            else:
+                text.append(bytes([int(hex_char, 16)]).decode(codepage, errors='replace'))
+        elif symbol is not None:
+            text.append(RTF_SYMBOLS.get(symbol, symbol.decode('latin-1')))
+        elif chunk is not None:
+            chunk = chunk.decode('latin-1')
+            if skip_chars:
+                dropped = min(skip_chars, len(chunk))
+                chunk, skip_chars = chunk[dropped:], skip_chars - dropped
+            text.append(chunk)
+
+
+def _markdown_rows(lines):
+    """Yield ([cell text], [cell link]) for each pipe-table row"""
+    for raw in lines:
+        line = raw.decode('utf-8').strip()
+        if not line.startswith('|') or MARKDOWN_SEPARATOR.match(line):
+            continue
+        cells, links = [], []
+        for cell in re.split(r'(?<!\\)\|', line.strip('|')):
+            found = MARKDOWN_LINK.search(cell)
+            links.append(found.group(2) if found else '')
+            cell = MARKDOWN_LINK.sub(r'\1', cell).replace('\\|', '|')
+            cells.append(re.sub(r'<br\s*/?>', '\n', cell, flags=re.IGNORECASE))
+        yield cells, links
+
+
+def _table_record(cells, links):
+    """(state_name, record) for one table row, or None for header/short rows"""
+    cells = ['\n'.join(line.strip() for line in cell.split('\n') if line.strip()) for cell in cells]
+    if len(cells) < 2 + len(TABLE_FIELDS) or cells[0] not in ['Yes', 'No'] or cells[1] in HEADER_LINES:
+        return None
+    record = _new_record(cells[0] == 'Yes')
+    for field, value in zip(TABLE_FIELDS, cells[2:]):
+        record[field] = value
+    record['notes'] = '\n'.join(cell for cell in cells[2 + len(TABLE_FIELDS):] if cell)
+    record['citationUrl'] = links[2 + TABLE_FIELDS.index('citation')]
+    return cells[1], record
+
+
+def iter_matrix_table(path='legal_matrix_data.md'):
+    """Stream (state_name, record) pairs from the table matrix via a memory map
+
+    RTF tables are tokenized straight off the map and Markdown tables read a
+    line at a time, so only the current row is held in memory.
+    """
+    with _mapped(path) as data:
+        if data[:5] == b'{\\rtf':
+            codepage = re.search(rb'\\ansicpg(\d+)', data[:4096])
+            rows = _rtf_rows(RTF_TOKEN.finditer(data), f'cp{codepage.group(1).decode()}' if codepage else 'cp1252')
+        else:
+            rows = _markdown_rows(iter(data.readline, b'') if data else [])
+        try:
+            for cells, links in rows:
+                row = _table_record(cells, links)
+                if row:
+                    yield row
+        finally:
+            # Release match objects into the map before it is closed
+            rows.close()
+            del rows
+
+
+def parse_matrix(text):
+    """Parse matrix text into a state -> record index"""
+    index = {}
+    for state_name, record in iter_matrix_records(text.split('\n')):
+        # First occurrence wins, matching the old name-based lookup
+        index.setdefault(state_name, record)
+    return index
+
+
+def content_hash(data):
+    """SHA-256 hex digest of bytes or text"""
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    return hashlib.sha256(data).hexdigest()
+
+
+def load_matrix_index(path='legal_matrix_data.txt', cache_dir=DEFAULT_CACHE_DIR):
+    """Return the parsed matrix index, reusing the on-disk cache when valid"""
+    with open(path, 'rb') as f:
+        raw = f.read()
+
+    digest = content_hash(raw)
+    path_key = content_hash(os.path.abspath(path))[:PATH_KEY_LENGTH]
+    cache_path = None
+    if cache_dir:
+        cache_path = os.path.join(cache_dir, f'matrix-index-v{INDEX_VERSION}-{path_key}-{digest}.json')
+        try:
+            with open(cache_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            pass
+
+    index = parse_matrix(raw.decode('utf-8'))
+
+    if cache_path:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = cache_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(index, f, ensure_ascii=False)
+        os.replace(tmp_path, cache_path)
+        _remove_stale_caches(cache_dir, path_key, os.path.basename(cache_path))
+
+    return index
+
+
+def _remove_stale_caches(cache_dir, path_key, keep):
+    """Delete this matrix file's caches for older contents or index versions
+
+    Caches of other matrix files are left alone; ones from before caches
+    were keyed by path can no longer be looked up and go too.
+    """
+    for name in os.listdir(cache_dir):
+        match = CACHE_NAME.fullmatch(name)
+        if match and match.group(1) in (path_key, None) and name != keep:
+            try:
+                os.unlink(os.path.join(cache_dir, name))
+            except FileNotFoundError:
+                pass
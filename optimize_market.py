@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Cost-weighted market optimizer over verification method subsets
+
+For every one of the 4,096 subsets of the 12 verification methods the
+optimizer works out which states the subset lets you serve
+(state_bitmasks.satisfies: states without an ID requirement always, others
+when an accepted method and any minimumRequirement are offered), the gay-male
+audience of those states, and the monthly cost:
+
+    sum of integration costs of the offered methods
+  + for each served ID state: gayMalePopulation * --verification-rate checks
+    at the cheapest per-check price among the offered methods it accepts
+    (its minimumRequirement's price if it has one)
+
+All subsets are evaluated together as numpy arrays (subset × state ×
+method), so a run with new quotes takes milliseconds. It prints the Pareto
+frontier of cost versus audience (no cheaper subset reaches as many people)
+and, with --budget, the largest audience affordable within that budget.
+
+Costs come from data/verification-costs.json; --quote overrides one method
+(`--quote governmentId:4000:0.8` = integration 4000/month, 0.80 per check).
+
+Requires numpy.
+
+Usage:
+    python optimize_market.py
+    python optimize_market.py --budget 5000 --quote governmentId:4000:0.8
+    python optimize_market.py --verification-rate 0.002 --json frontier.json
+"""
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+
+from dataset_io import iter_records
+from schema_validator import VERIFICATION_METHOD_FIELDS
+from state_bitmasks import method_mask, required_mask
+
+DEFAULT_COSTS = 'data/verification-costs.json'
+# Monthly verifications per member of the served audience in ID states
+DEFAULT_VERIFICATION_RATE = 0.001
+
+
+def load_costs(path, quotes=()):
+    """(integration, per_check) arrays in VERIFICATION_METHOD_FIELDS order; raises ValueError"""
+    with open(path, 'r', encoding='utf-8') as f:
+        methods = json.load(f)['methods']
+    missing = [method for method in VERIFICATION_METHOD_FIELDS if method not in methods]
+    if missing:
+        raise ValueError(f"{path}: no costs for {', '.join(missing)}")
+    methods = {method: dict(costs) for method, costs in methods.items()}
+
+    for quote in quotes:
+        try:
+            method, integration, per_check = quote.split(':')
+            methods[method].update(integration=float(integration), perCheck=float(per_check))
+        except (ValueError, KeyError):
+            raise ValueError(f"bad --quote {quote!r} (expected METHOD:INTEGRATION:PER_CHECK)")
+
+    integration = np.array([methods[m]['integration'] for m in VERIFICATION_METHOD_FIELDS], dtype=float)
+    per_check = np.array([methods[m]['perCheck'] for m in VERIFICATION_METHOD_FIELDS], dtype=float)
+    return integration, per_check
+
+
+class MarketModel:
+    """Per-state inputs as arrays; evaluate() prices every method subset at once"""
+
+    def __init__(self, states):
+        states = sorted(states, key=lambda state: state['state'])
+        self.names = [state['abbreviation'] for state in states]
+        self.audience = np.array([state.get('gayMalePopulation') or 0 for state in states], dtype=float)
+        self.id_required = np.array([state['legal']['idRequired'] for state in states])
+        self.accepted = np.array([method_mask(state) for state in states], dtype=np.int64)
+        self.required = np.array([required_mask(state) for state in states], dtype=np.int64)
+
+        width = len(VERIFICATION_METHOD_FIELDS)
+        self.masks = np.arange(1 << width, dtype=np.int64)
+        # bits[subset, method]
+        self.bits = (self.masks[:, None] >> np.arange(width)) & 1 == 1
+        # Methods a state's visitors would use: its minimumRequirement if
+        # set, otherwise any method it accepts
+        usable = np.where(self.required != 0, self.required, self.accepted)
+        self.usable = (usable[:, None] >> np.arange(width)) & 1 == 1  # [state, method]
+
+        # served[subset, state]
+        offered_accepted = (self.masks[:, None] & self.accepted[None, :]) != 0
+        has_required = (self.masks[:, None] & self.required[None, :]) == self.required[None, :]
+        self.served = ~self.id_required[None, :] | (offered_accepted & has_required)
+        self.served_audience = self.served.astype(float) @ self.audience
+
+    def evaluate(self, integration, per_check, verification_rate):
+        """Monthly cost of every subset (index = method mask)"""
+        fixed = self.bits.astype(float) @ integration
+        # Cheapest usable offered method per (subset, state)
+        prices = np.where(self.bits[:, None, :] & self.usable[None, :, :], per_check[None, None, :], np.inf)
+        cheapest = prices.min(axis=2)
+        checking = self.served & self.id_required[None, :]
+        variable = np.where(checking, cheapest, 0.0) @ (self.audience * verification_rate)
+        return fixed + variable
+
+    def methods(self, mask):
+        return [method for i, method in enumerate(VERIFICATION_METHOD_FIELDS) if mask >> i & 1]
+
+    def states(self, mask):
+        return [name for name, served in zip(self.names, self.served[mask]) if served]
+
+
+def pareto_frontier(cost, audience):
+    """Masks on the cost/audience frontier, cheapest first
+
+    Sorted by cost (then fewer methods), a subset is kept only if it reaches
+    strictly more audience than every cheaper one.
+    """
+    method_counts = np.array([bin(mask).count('1') for mask in range(len(cost))])
+    order = np.lexsort((method_counts, -audience, cost))
+    frontier = []
+    best = -1.0
+    for mask in order:
+        if audience[mask] > best:
+            frontier.append(int(mask))
+            best = audience[mask]
+    return frontier
+
+
+def best_within_budget(cost, audience, budget):
+    """Mask reaching the most audience at cost <= budget (cheapest on ties), or None"""
+    affordable = np.flatnonzero(cost <= budget)
+    if affordable.size == 0:
+        return None
+    top = audience[affordable].max()
+    candidates = affordable[audience[affordable] == top]
+    return int(candidates[np.argmin(cost[candidates])])
+
+
+def option(model, mask, cost, total_audience):
+    return {
+        'methods': model.methods(mask),
+        'monthlyCost': round(float(cost[mask]), 2),
+        'audience': int(model.served_audience[mask]),
+        'audiencePercent': round(float(model.served_audience[mask] / total_audience * 100), 2),
+        'states': model.states(mask),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cost vs audience frontier over verification method subsets')
+    parser.add_argument('--dataset', default='data/states-data.json')
+    parser.add_argument('--costs', default=DEFAULT_COSTS, help='per-method cost file (default: %(default)s)')
+    parser.add_argument('--quote', action='append', default=[],
+                        help='override one method: METHOD:INTEGRATION:PER_CHECK (repeatable)')
+    parser.add_argument('--verification-rate', type=float, default=DEFAULT_VERIFICATION_RATE,
+                        help='monthly checks per audience member in served ID states (default: %(default)s)')
+    parser.add_argument('--budget', type=float, help='also report the best subset within this monthly budget')
+    parser.add_argument('--json', help='also write the frontier (and budget answer) to this file')
+    args = parser.parse_args()
+
+    try:
+        integration, per_check = load_costs(args.costs, args.quote)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    model = MarketModel(iter_records(args.dataset))
+    cost = model.evaluate(integration, per_check, args.verification_rate)
+    frontier = pareto_frontier(cost, model.served_audience)
+    elapsed = time.perf_counter() - start
+
+    total_audience = model.audience.sum()
+    options = [option(model, mask, cost, total_audience) for mask in frontier]
+
+    print("=" * 80)
+    print("MARKET OPTIMIZER: MONTHLY COST VS GAY-MALE AUDIENCE")
+    print("=" * 80)
+    print(f"{len(model.masks):,} method subsets × {len(model.names)} states in {elapsed * 1000:.0f} ms  |  "
+          f"{args.verification_rate:g} checks per audience member per month")
+    print()
+    print(f"{'Monthly cost':>14} {'Audience':>12} {'Share':>7}  Methods")
+    print("-" * 80)
+    for entry in options:
+        print(f"{'$' + format(entry['monthlyCost'], ',.0f'):>14} {entry['audience']:>12,} "
+              f"{entry['audiencePercent']:>6.1f}%  {', '.join(entry['methods']) or '(none)'}")
+
+    result = {'verificationRate': args.verification_rate, 'frontier': options}
+    if args.budget is not None:
+        print()
+        mask = best_within_budget(cost, model.served_audience, args.budget)
+        if mask is None:
+            print(f"❌ Nothing fits a ${args.budget:,.0f}/month budget")
+        else:
+            best = option(model, mask, cost, total_audience)
+            result['budget'] = dict(best, budget=args.budget)
+            excluded = [name for name in model.names if name not in best['states']]
+            print(f"✅ Best within ${args.budget:,.0f}/month: {', '.join(best['methods']) or 'no methods'} "
+                  f"(${best['monthlyCost']:,.0f}, {best['audience']:,} people, {best['audiencePercent']:.1f}%)")
+            print(f"   Not served: {', '.join(excluded) or 'none'}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(result, f, indent=2)
+        print()
+        print(f"✓ Results written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
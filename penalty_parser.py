@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Normalize the free-text penalties in states-data.json into numeric components
+
+Each clause of legal.penaltiesExact (split on newlines, ';', sentence ends
+and "AND") becomes zero or more components:
+
+    amount    lower bound in dollars (None for "up to $X")
+    cap       upper bound in dollars (None for "$X or more")
+    unit      'day' (per day in violation), 'violation' (per violation or
+              instance), 'action' (once per lawsuit, e.g. statutory damages
+              or the minor-access penalty) or 'damages' (unquantified)
+    trigger   'noVerification', 'dataRetention' or 'minorAccess'
+    enforcer  'attorneyGeneral' or 'private'
+    alternative  None, or the remedy's position in an "X or Y" clause
+              ("Actual damages or $5,000 per violation"): the claimant
+              recovers one of the clause's remedies, not all of them
+
+A fixed amount has amount == cap. The structured legal.penalties fields
+(perViolation, perDay, statutoryDamages, ...) are cross-checked against the
+parsed components and mismatches are reported.
+
+Usage:
+    python penalty_parser.py [--dataset data/states-data.json] [--json penalties.json]
+"""
+import argparse
+import json
+import re
+
+from dataset_io import iter_records
+
+AMOUNT_PATTERN = re.compile(
+    r'(?P<up_to>up to\s+)?\$\s?(?P<low>[\d,]+(?:\.\d+)?)'
+    r'(?:\s*(?:to|-|–)\s*\$\s?(?P<high>[\d,]+(?:\.\d+)?))?'
+    r'(?P<or_more>\s+or more)?', re.IGNORECASE)
+CLAUSE_SPLIT = re.compile(r'\n+|;|(?<=[a-z0-9)])\.\s+|\s+AND\s+')
+# "or" between remedies, but not in "$X or more"
+ALTERNATIVE_SPLIT = re.compile(r'\s+or\s+(?!more\b)', re.IGNORECASE)
+UNQUANTIFIED_DAMAGES = re.compile(r'\b(?:actual|compensatory)\b|\b(?<!statutory )(?<!punitive )damages\b',
+                                  re.IGNORECASE)
+
+
+def dollars(text):
+    return float(text.replace(',', ''))
+
+
+def clause_enforcer(clause, private_right):
+    lower = clause.lower()
+    if 'attorney general' in lower or 'government' in lower or 'civil penalt' in lower:
+        return 'attorneyGeneral'
+    return 'private' if private_right else 'attorneyGeneral'
+
+
+def amount_unit(following):
+    """Unit and trigger from the text right after an amount"""
+    lower = following.lower()
+    if 'minor' in lower:
+        return 'action', 'minorAccess'
+    trigger = 'dataRetention' if 'retain' in lower or 'retention' in lower else 'noVerification'
+    if re.search(r'\bper day\b|\beach day\b|\bdaily\b', lower):
+        return 'day', trigger
+    if 'statutory damages' in lower:
+        return 'action', trigger
+    return 'violation', trigger
+
+
+def parse_clause(clause, private_right):
+    """Components for one clause of penaltiesExact
+
+    If the clause offers remedies as alternatives ("X or Y") and each side
+    yields components, they are parsed side by side and tagged with their
+    position in `alternative`; otherwise the clause is parsed whole.
+    """
+    enforcer = clause_enforcer(clause, private_right)
+    options = [remedy_components(part, clause, enforcer, private_right)
+               for part in ALTERNATIVE_SPLIT.split(clause)]
+    options = [option for option in options if option]
+    if len(options) < 2:
+        return remedy_components(clause, clause, enforcer, private_right)
+    for position, option in enumerate(options):
+        for component in option:
+            component['alternative'] = position
+    return [component for option in options for component in option]
+
+
+def remedy_components(remedy, clause, enforcer, private_right):
+    """Components for the remedies in `remedy` (all of a clause, or one side of its "or")"""
+    components = []
+    matches = list(AMOUNT_PATTERN.finditer(remedy))
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(remedy)
+        unit, trigger = amount_unit(remedy[match.end():end])
+        low, high = dollars(match['low']), match['high']
+        if match['up_to']:
+            amount, cap = None, low
+        elif high:
+            amount, cap = low, dollars(high)
+        elif match['or_more']:
+            amount, cap = low, None
+        else:
+            amount, cap = low, low
+        components.append({'amount': amount, 'cap': cap, 'unit': unit, 'trigger': trigger,
+                           'enforcer': enforcer, 'alternative': None, 'text': clause})
+
+    # "actual damages", "compensatory damages", "liability ... for damages"
+    if UNQUANTIFIED_DAMAGES.search(remedy) or (not matches and 'liabilit' in remedy.lower()):
+        trigger = 'minorAccess' if 'minor' in remedy.lower() else 'noVerification'
+        components.append({'amount': None, 'cap': None, 'unit': 'damages', 'trigger': trigger,
+                           'enforcer': 'private' if private_right else enforcer, 'alternative': None,
+                           'text': clause})
+    return components
+
+
+def parse_penalties(legal):
+    """Normalized penalty components and flags for one state's `legal` object"""
+    penalties = legal.get('penalties') or {}
+    private_right = bool(penalties.get('privateRightOfAction'))
+    text = legal.get('penaltiesExact') or ''
+
+    components = []
+    seen_damages = set()
+    for clause in CLAUSE_SPLIT.split(text):
+        clause = ' '.join(clause.split())
+        if not clause or clause.upper() in ('N/A', '-'):
+            continue
+        for component in parse_clause(clause, private_right):
+            if component['unit'] == 'damages':
+                # Several clauses often restate the same damages remedy
+                key = (component['trigger'], component['enforcer'])
+                if key in seen_damages:
+                    continue
+                seen_damages.add(key)
+            components.append(component)
+
+    return {
+        'components': components,
+        'attorneyFees': bool(penalties.get('attorneyFees')),
+        'punitiveDamages': bool(penalties.get('punitiveDamages')),
+        'injunctiveRelief': bool(penalties.get('injunctiveRelief')),
+        'privateRightOfAction': private_right,
+    }
+
+
+def structured_mismatches(legal, parsed):
+    """Differences between the structured penalties fields and the parsed components"""
+    penalties = legal.get('penalties') or {}
+    components = parsed['components']
+    problems = []
+
+    def amounts(unit, trigger=None):
+        return {component['cap'] or component['amount'] for component in components
+                if component['unit'] == unit and (trigger is None or component['trigger'] == trigger)}
+
+    for field, unit, trigger in [('perDay', 'day', None), ('ifMinorAccesses', 'action', 'minorAccess')]:
+        value = penalties.get(field)
+        if value and value.startswith('$') and dollars(value[1:].split()[0]) not in amounts(unit, trigger):
+            problems.append(f"{field} {value} not found in penaltiesExact")
+
+    per_violation = penalties.get('perViolation')
+    if per_violation and per_violation.startswith('$'):
+        # "$500 to $10,000" → the top of the range
+        top = dollars(per_violation.split('$')[-1].split()[0])
+        if top not in amounts('violation') | amounts('day') | amounts('action', 'noVerification'):
+            problems.append(f"perViolation {per_violation} not found in penaltiesExact")
+
+    statutory = penalties.get('statutoryDamages')
+    if statutory and statutory.startswith('$') and dollars(statutory[1:].split()[0]) not in {
+            component['amount'] for component in components if component['unit'] == 'action'}:
+        problems.append(f"statutoryDamages {statutory} not found in penaltiesExact")
+    return problems
+
+
+def format_component(component):
+    amount, cap = component['amount'], component['cap']
+    if component['unit'] == 'damages':
+        value = 'damages (unquantified)'
+    elif amount is None:
+        value = f"up to ${cap:,.0f}"
+    elif cap is None:
+        value = f"${amount:,.0f} or more"
+    elif amount == cap:
+        value = f"${amount:,.0f}"
+    else:
+        value = f"${amount:,.0f}–${cap:,.0f}"
+    per = {'day': ' per day', 'violation': ' per violation', 'action': ' per action', 'damages': ''}
+    alternative = 'or ' if component.get('alternative') else ''
+    return f"{alternative}{value}{per[component['unit']]} [{component['trigger']}, {component['enforcer']}]"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Normalize penalty text into numeric components')
+    parser.add_argument('--dataset', default='data/states-data.json')
+    parser.add_argument('--json', help='write {abbreviation: parsed penalties} to this file')
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("PENALTY NORMALIZATION")
+    print("=" * 80)
+    print()
+
+    results = {}
+    mismatches = 0
+    for state in iter_records(args.dataset):
+        legal = state['legal']
+        parsed = parse_penalties(legal)
+        results[state['abbreviation']] = parsed
+        problems = structured_mismatches(legal, parsed)
+        mismatches += len(problems)
+        if not parsed['components'] and not problems:
+            continue
+
+        flags = [flag for flag in ('attorneyFees', 'punitiveDamages', 'injunctiveRelief') if parsed[flag]]
+        print(f"{state['abbreviation']} {state['state']}" + (f"  (+ {', '.join(flags)})" if flags else ''))
+        for component in parsed['components']:
+            print(f"   • {format_component(component)}")
+        for problem in problems:
+            print(f"   ⚠️  {problem}")
+
+    print()
+    quantified = sum(1 for parsed in results.values()
+                     if any(c['unit'] != 'damages' for c in parsed['components']))
+    print(f"✓ {quantified} states with quantified penalties, "
+          f"{sum(1 for parsed in results.values() if parsed['components'])} with any monetary exposure")
+    if mismatches:
+        print(f"⚠️  {mismatches} structured field(s) disagree with penaltiesExact")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"✓ Parsed penalties written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
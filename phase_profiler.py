@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Per-phase timing, counters and peak memory for the review scripts
+
+Scripts add the flags with add_profile_arguments() and run their main body
+inside `with Profiler.from_args('name', args) as profiler:`. Work is
+attributed to named phases (load, parse, classify, compare, write, ...):
+
+    with profiler.phase('parse'):
+        matrix = load_matrix_index(path)
+    for state in profiler.iterate('load', iter_records(path)):
+        ...
+    profiler.count('records')
+
+Phases nest and time is exclusive: while an inner phase (or the next() of a
+wrapped record stream) runs, the outer one is paused, so phase seconds add
+up to the wall time minus unattributed work, even when streaming
+generators interleave loading with processing. Peak memory (tracemalloc)
+is tracked the same way per phase. With --cprofile N each phase also gets
+its own cProfile and its top N functions by cumulative time.
+
+On exit the report is written as JSON to the --profile path (stderr for
+'-'), including after sys.exit(). Without --profile the profiler is
+disabled and every call is a no-op.
+"""
+import cProfile
+import json
+import os
+import pstats
+import resource
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+REPORT_VERSION = 1
+
+
+def add_profile_arguments(parser):
+    parser.add_argument('--profile', nargs='?', const='-', metavar='PATH',
+                        help='write per-phase timings, counters and peak memory as JSON to PATH '
+                             "(stderr if omitted or '-')")
+    parser.add_argument('--cprofile', type=int, metavar='TOP',
+                        help='also run cProfile per phase and report its TOP functions (implies --profile)')
+
+
+class _Phase:
+    __slots__ = ('seconds', 'calls', 'peak', 'profile')
+
+    def __init__(self, cprofile):
+        self.seconds = 0.0
+        self.calls = 0
+        self.peak = 0
+        self.profile = cProfile.Profile() if cprofile else None
+
+
+class Profiler:
+    """Collects phase timings and counters; disabled unless given an output"""
+
+    def __init__(self, script=None, output=None, cprofile_top=None):
+        self.script = script
+        self.output = output
+        self.enabled = output is not None
+        self.cprofile_top = cprofile_top
+        self.counters = {}
+        self._phases = {}
+        self._stack = []
+        self._mark = None
+        self._started = None
+        self._peak = 0
+
+    @classmethod
+    def from_args(cls, script, args):
+        output = args.profile if args.profile is not None else ('-' if args.cprofile else None)
+        return cls(script, output, args.cprofile)
+
+    def __enter__(self):
+        if self.enabled:
+            tracemalloc.start()
+            self._started = datetime.now(timezone.utc)
+            self._wall = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.enabled:
+            while self._stack:
+                self._leave()
+            self.write(self.report())
+            tracemalloc.stop()
+        return False
+
+    def _take_peak(self):
+        """Traced-memory peak since the last call (also folded into the overall peak)"""
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.reset_peak()
+        self._peak = max(self._peak, peak)
+        return peak
+
+    def _charge(self, name, now):
+        phase = self._phases[name]
+        phase.seconds += now - self._mark
+        phase.peak = max(phase.peak, self._take_peak())
+        if phase.profile:
+            phase.profile.disable()
+
+    def _enter(self, name):
+        now = time.perf_counter()
+        if self._stack:
+            self._charge(self._stack[-1], now)
+        else:
+            self._take_peak()
+        if name not in self._phases:
+            self._phases[name] = _Phase(self.cprofile_top)
+        phase = self._phases[name]
+        phase.calls += 1
+        self._stack.append(name)
+        self._mark = time.perf_counter()
+        if phase.profile:
+            phase.profile.enable()
+
+    def _leave(self):
+        self._charge(self._stack.pop(), time.perf_counter())
+        self._mark = time.perf_counter()
+        if self._stack and self._phases[self._stack[-1]].profile:
+            self._phases[self._stack[-1]].profile.enable()
+
+    @contextmanager
+    def phase(self, name):
+        """Attribute the enclosed work to phase `name`"""
+        if not self.enabled:
+            yield
+            return
+        self._enter(name)
+        try:
+            yield
+        finally:
+            self._leave()
+
+    def iterate(self, name, iterable, counter=None):
+        """Wrap a (lazy) iterable so producing each item counts as phase `name`
+
+        Items are also counted under `counter` if given. Code inside a
+        phase() block must not yield; wrap generators with iterate instead.
+        """
+        if not self.enabled:
+            return iterable
+        return self._iterate(name, iterable, counter)
+
+    def _iterate(self, name, iterable, counter):
+        iterator = iter(iterable)
+        while True:
+            with self.phase(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            if counter:
+                self.count(counter)
+            yield item
+
+    def count(self, name, n=1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def _top_functions(self, profile):
+        stats = pstats.Stats(profile).stats
+        rows = sorted(stats.items(), key=lambda item: -item[1][3])[:self.cprofile_top]
+        return [{'function': f"{os.path.basename(filename)}:{line}({function})", 'calls': calls,
+                 'totalSeconds': round(total, 6), 'cumulativeSeconds': round(cumulative, 6)}
+                for (filename, line, function), (_, calls, total, cumulative, _) in rows]
+
+    def report(self):
+        wall = time.perf_counter() - self._wall
+        phases = []
+        for name, phase in self._phases.items():
+            entry = {'name': name, 'seconds': round(phase.seconds, 6), 'calls': phase.calls,
+                     'peakTracedBytes': phase.peak}
+            if phase.profile:
+                entry['topFunctions'] = self._top_functions(phase.profile)
+            phases.append(entry)
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return {
+            'version': REPORT_VERSION,
+            'script': self.script,
+            'startedAt': self._started.isoformat(timespec='seconds'),
+            'python': sys.version.split()[0],
+            'wallSeconds': round(wall, 6),
+            'unattributedSeconds': round(wall - sum(phase.seconds for phase in self._phases.values()), 6),
+            'phases': phases,
+            'counters': self.counters,
+            'peakTracedBytes': max(self._peak, tracemalloc.get_traced_memory()[1]),
+            # ru_maxrss is KiB on Linux, bytes on macOS
+            'maxRssBytes': max_rss if sys.platform == 'darwin' else max_rss * 1024,
+        }
+
+    def write(self, report):
+        text = json.dumps(report, indent=2)
+        if self.output == '-':
+            print(text, file=sys.stderr)
+            return
+        tmp_path = self.output + '.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(text + '\n')
+        os.replace(tmp_path, self.output)
+        print(f"✓ Profile written to {self.output}", file=sys.stderr)
+
+
+# Default for functions that take an optional profiler
+NO_PROFILER = Profiler()
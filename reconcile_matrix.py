@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Three-way reconciliation of legal_matrix_data.md, legal_matrix_data.txt and
+states-data.json
+
+The three sources are streamed side by side in one merged pass: the table
+matrix through matrix_parser.iter_matrix_table (memory-mapped), the flat
+matrix line by line and the dataset record by record. Each state is held
+only until it has been seen in every source, then compared and dropped, so
+memory stays bounded by how far apart the sources list the same state.
+
+For each state the ID requirement, applicability, requirements, penalties
+and citation are compared across the sources (texts by similarity as in
+detailed_state_check.py, '-' and 'N/A' meaning empty). A field is reported
+when one source disagrees with the other two (named as the outlier) or when
+all three differ; states missing from a source are listed as well.
+
+Usage:
+    python reconcile_matrix.py
+    python reconcile_matrix.py --json reconciliation.json
+"""
+import argparse
+import json
+import sys
+from itertools import zip_longest
+
+from dataset_io import iter_records
+from matrix_parser import iter_matrix_file, iter_matrix_table
+from text_similarity import SIMILARITY_THRESHOLD, check_similarity, normalize_text
+
+SOURCES = ['md', 'txt', 'dataset']
+
+# (report name, matrix field, dataset legal field)
+COMPARED_FIELDS = [
+    ('idRequired', 'idRequired', 'idRequired'),
+    ('applicability', 'applicability', 'applicabilityExact'),
+    ('requirements', 'requirements', 'idRequirementsExact'),
+    ('penalties', 'penalties', 'penaltiesExact'),
+    ('citation', 'citation', 'citation'),
+]
+
+
+def merged_pass(streams):
+    """Yield (state, {source: record}) once a state has been seen in every stream
+
+    streams: {source: iterator of (state, record)}, advanced in lockstep.
+    States some stream never yields come last, in name order, with only the
+    sources that had them. Later duplicates within a stream are ignored
+    (first occurrence wins, as in matrix_parser.parse_matrix).
+    """
+    names = list(streams)
+    pending = {}
+    finished = set()
+    for batch in zip_longest(*streams.values()):
+        for source, item in zip(names, batch):
+            if item is None:
+                continue
+            state, record = item
+            if state in finished:
+                continue
+            entry = pending.setdefault(state, {})
+            entry.setdefault(source, record)
+            if len(entry) == len(names):
+                finished.add(state)
+                yield state, pending.pop(state)
+    for state in sorted(pending):
+        yield state, pending[state]
+
+
+def field_value(source, record, matrix_field, dataset_field):
+    value = record.get(dataset_field if source == 'dataset' else matrix_field)
+    if isinstance(value, str) and set(value.replace('N/A', '-').split()) <= {'-'}:
+        return ''
+    return value
+
+
+def agree(field, a, b):
+    if isinstance(a, bool) or isinstance(b, bool):
+        return a == b
+    if field == 'citation':
+        return normalize_text(a or '') == normalize_text(b or '')
+    similarity, _ = check_similarity(a or '', b or '')
+    return similarity >= SIMILARITY_THRESHOLD
+
+
+def reconcile_state(records):
+    """[(field, outlier source or None if all differ, {source: value})] for one state"""
+    present = [source for source in SOURCES if source in records]
+    pairs = [(a, b) for i, a in enumerate(present) for b in present[i + 1:]]
+    problems = []
+    for field, matrix_field, dataset_field in COMPARED_FIELDS:
+        values = {source: field_value(source, records[source], matrix_field, dataset_field)
+                  for source in present}
+        agreeing = {pair for pair in pairs if agree(field, values[pair[0]], values[pair[1]])}
+        if len(agreeing) == len(pairs):
+            continue
+        # The outlier is the one source whose absence leaves only agreement
+        outliers = [source for source in present
+                    if len(present) > 2 and all(pair in agreeing for pair in pairs if source not in pair)]
+        problems.append((field, outliers[0] if len(outliers) == 1 else None, values))
+    return problems
+
+
+def reconcile(md_path, txt_path, dataset_path):
+    """Per-state results from one merged pass over the three sources"""
+    streams = {
+        'md': iter_matrix_table(md_path),
+        'txt': iter_matrix_file(txt_path),
+        'dataset': ((record['state'], record['legal']) for record in iter_records(dataset_path)),
+    }
+    results = {}
+    for state, records in merged_pass(streams):
+        results[state] = {
+            'missingFrom': [source for source in SOURCES if source not in records],
+            'citationUrl': records.get('md', {}).get('citationUrl', ''),
+            'problems': reconcile_state(records),
+        }
+    return results
+
+
+def truncate(value, length=70):
+    text = json.dumps(value, ensure_ascii=False) if not isinstance(value, str) else ' '.join(value.split())
+    return text[:length] + '...' if len(text) > length else text
+
+
+def print_report(results, paths):
+    print("=" * 80)
+    print("LEGAL MATRIX RECONCILIATION")
+    print("=" * 80)
+    print(' | '.join(f"{source}: {path}" for source, path in zip(SOURCES, paths)))
+    print()
+
+    outlier_counts = {source: 0 for source in SOURCES}
+    conflicts = 0
+    for state, result in results.items():
+        if not result['missingFrom'] and not result['problems']:
+            continue
+        print(f"{state}")
+        if result['missingFrom']:
+            print(f"   ⚠️  missing from {', '.join(result['missingFrom'])}")
+        for field, outlier, values in result['problems']:
+            if outlier:
+                outlier_counts[outlier] += 1
+                others = ' = '.join(source for source in values if source != outlier)
+                print(f"   ❌ {field}: {outlier} differs ({others})")
+            else:
+                conflicts += 1
+                print(f"   ❌ {field}: sources disagree")
+            for source, value in values.items():
+                print(f"      {source:<8} {truncate(value)}")
+    print()
+
+    clean = sum(1 for result in results.values() if not result['missingFrom'] and not result['problems'])
+    print(f"✓ {clean} of {len(results)} states agree across all sources")
+    for source, count in outlier_counts.items():
+        if count:
+            print(f"⚠️  {count} field(s) where only {source} differs")
+    if conflicts:
+        print(f"⚠️  {conflicts} field(s) with no two sources agreeing")
+    linked = sum(1 for result in results.values() if result['citationUrl'])
+    print(f"✓ {linked} citation links available from the .md matrix")
+    return clean == len(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Reconcile the .md and .txt legal matrices with the dataset')
+    parser.add_argument('--matrix-md', default='legal_matrix_data.md')
+    parser.add_argument('--matrix-txt', default='legal_matrix_data.txt')
+    parser.add_argument('--dataset', default='data/states-data.json')
+    parser.add_argument('--json', help='also write the per-state results to this file')
+    args = parser.parse_args()
+
+    results = reconcile(args.matrix_md, args.matrix_txt, args.dataset)
+    consistent = print_report(results, [args.matrix_md, args.matrix_txt, args.dataset])
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"✓ Results written to {args.json}")
+    sys.exit(0 if consistent else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Versioned per-state rule history with as-of-date queries
+
+data/rule-history.json keeps, for every state, the list of `legal` objects
+it has had and the date each took effect (null = in force since before
+records began). `record` adds a version for each state whose `legal`
+differs from its latest one, dated by --effective, else the record's own
+legal.effectiveDate, else today. A backdated change is carried into the
+versions dated after it, so the latest version always matches the dataset.
+
+The history is not seeded with guessed dates. It starts with the first
+`record` (or the first apply_corrections.py run that changes the dataset),
+which stores every state's rule undated unless the rule names its own
+effectiveDate, and grows by one dated version whenever a later record
+finds a state's legal object changed. apply_corrections.py records the
+dataset before and after each patch, so corrections are dated by its
+--effective option.
+
+RuleHistory answers "which rule applied on this date?" by bisecting each
+state's change dates, without rebuilding the dataset. All versions live in
+one flat list ordered by (state, date), so a batch of (state, date) events
+resolves to version ids with a single sorted search (numpy searchsorted
+when installed, bisect otherwise).
+
+Usage:
+    python rule_history.py record [--dataset data/states-data.json] [--effective 2025-07-01]
+    python rule_history.py as-of 2025-06-30 [--state TX]
+    python rule_history.py changes 2024-01-01 2025-12-31
+"""
+import argparse
+import copy
+import json
+import os
+import sys
+from bisect import bisect_right
+from datetime import date
+
+from dataset_io import iter_records, locked, write_json_atomic
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+DEFAULT_HISTORY = 'data/rule-history.json'
+NO_VERSION = -1
+# Keys are state_index * DAY_SPAN + day ordinal; baseline versions use day 0
+DAY_SPAN = 1 << 20
+
+
+def to_ordinal(value):
+    """Day ordinal of a date, datetime or ISO string (timestamps are cut to the date)"""
+    if isinstance(value, str):
+        value = date.fromisoformat(value[:10])
+    return value.toordinal()
+
+
+def effective_ordinal(effective):
+    return 0 if effective is None else to_ordinal(effective)
+
+
+class RuleHistory:
+    """Read-only view of a rule history store"""
+
+    def __init__(self, store):
+        self.abbreviations = sorted(store['states'])
+        self.versions = []
+        self._keys = []
+        self._state_index = {abbreviation: i for i, abbreviation in enumerate(self.abbreviations)}
+        for i, abbreviation in enumerate(self.abbreviations):
+            for version in sorted(store['states'][abbreviation], key=lambda v: effective_ordinal(v['effective'])):
+                self.versions.append(dict(version, state=abbreviation))
+                self._keys.append(i * DAY_SPAN + effective_ordinal(version['effective']))
+        self._state_of_version = [key // DAY_SPAN for key in self._keys]
+        self._np_keys = np.array(self._keys, dtype=np.int64) if np is not None else None
+
+    @classmethod
+    def load(cls, path=DEFAULT_HISTORY):
+        return cls(load_store(path))
+
+    def version_id(self, abbreviation, when):
+        """Flat index of the version in force for a state on a date, or NO_VERSION"""
+        state = self._state_index.get(abbreviation)
+        if state is None:
+            return NO_VERSION
+        i = bisect_right(self._keys, state * DAY_SPAN + to_ordinal(when)) - 1
+        return i if i >= 0 and self._state_of_version[i] == state else NO_VERSION
+
+    def rule(self, abbreviation, when):
+        """The legal object in force for a state on a date, or None"""
+        i = self.version_id(abbreviation, when)
+        return None if i == NO_VERSION else self.versions[i]['legal']
+
+    def as_of(self, when):
+        """{abbreviation: legal} for every state with a rule in force on a date"""
+        day = to_ordinal(when)
+        rules = {}
+        for state, abbreviation in enumerate(self.abbreviations):
+            i = bisect_right(self._keys, state * DAY_SPAN + day) - 1
+            if i >= 0 and self._state_of_version[i] == state:
+                rules[abbreviation] = self.versions[i]['legal']
+        return rules
+
+    def version_ids(self, state_indexes, ordinals):
+        """Version ids for many (state index, day ordinal) events at once
+
+        state_indexes index self.abbreviations; anything outside that range
+        or before a state's first version maps to NO_VERSION.
+        """
+        if np is None:
+            ids = []
+            for state, day in zip(state_indexes, ordinals):
+                if not 0 <= state < len(self.abbreviations):
+                    ids.append(NO_VERSION)
+                    continue
+                i = bisect_right(self._keys, state * DAY_SPAN + day) - 1
+                ids.append(i if i >= 0 and self._state_of_version[i] == state else NO_VERSION)
+            return ids
+
+        states = np.asarray(state_indexes, dtype=np.int64)
+        keys = states * DAY_SPAN + np.asarray(ordinals, dtype=np.int64)
+        ids = np.searchsorted(self._np_keys, keys, side='right') - 1
+        in_range = (states >= 0) & (states < len(self.abbreviations)) & (ids >= 0)
+        state_of_version = np.array(self._state_of_version, dtype=np.int64)
+        valid = in_range & (state_of_version[np.maximum(ids, 0)] == states)
+        return np.where(valid, ids, NO_VERSION)
+
+    def changes(self, start, end):
+        """Versions that took effect between two dates (inclusive), by date"""
+        first, last = to_ordinal(start), to_ordinal(end)
+        return sorted((v for v in self.versions
+                       if v['effective'] is not None and first <= to_ordinal(v['effective']) <= last),
+                      key=lambda v: (v['effective'], v['state']))
+
+    def as_of_range(self, start, end):
+        """[(from_date, rules)] for each stretch of the range in which no rule changes"""
+        segments = [(to_ordinal(start), self.as_of(start))]
+        for change in self.changes(start, end):
+            day = to_ordinal(change['effective'])
+            if day == segments[-1][0]:
+                segments[-1][1][change['state']] = change['legal']
+            else:
+                segments.append((day, dict(segments[-1][1], **{change['state']: change['legal']})))
+        return [(date.fromordinal(day).isoformat(), rules) for day, rules in segments]
+
+
+def load_store(path):
+    if not os.path.exists(path):
+        return {'description': 'Per-state rule versions with effective dates; see rule_history.py',
+                'states': {}}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+_MISSING = object()
+
+
+def _diff(old, new, path=()):
+    """[(key path, new value or _MISSING)] for every leaf that differs between two legal objects"""
+    if isinstance(old, dict) and isinstance(new, dict):
+        changes = []
+        for key in list(old) + [key for key in new if key not in old]:
+            changes += _diff(old.get(key, _MISSING), new.get(key, _MISSING), path + (key,))
+        return changes
+    return [] if old == new else [(path, new)]
+
+
+def _patch(legal, changes):
+    """Copy of legal with _diff changes applied"""
+    legal = copy.deepcopy(legal)
+    for path, value in changes:
+        parent = legal
+        for key in path[:-1]:
+            if not isinstance(parent.get(key), dict):
+                parent[key] = {}
+            parent = parent[key]
+        if value is _MISSING:
+            parent.pop(path[-1], None)
+        else:
+            parent[path[-1]] = copy.deepcopy(value)
+    return legal
+
+
+def record_dataset(store, states, effective=None):
+    """Record a version for every state whose legal changed; returns the changed abbreviations
+
+    A change dated before a state's latest version (a backdated correction)
+    becomes a version on its own date, built from the rule then in force,
+    and is also applied to every later version, so the latest version
+    always matches the dataset.
+    """
+    changed = []
+    today = date.today().isoformat()
+    for state in states:
+        abbreviation = state['abbreviation'].upper()
+        legal = state['legal']
+        versions = store['states'].setdefault(abbreviation, [])
+        versions.sort(key=lambda v: effective_ordinal(v['effective']))
+        if not versions:
+            # First sighting: the rule stands for all earlier dates unless it
+            # names its own effective date
+            versions.append({'effective': effective or legal.get('effectiveDate'), 'legal': legal})
+            changed.append(abbreviation)
+            continue
+        if versions[-1]['legal'] == legal:
+            continue
+
+        when = effective or legal.get('effectiveDate') or today
+        day = effective_ordinal(when)
+        changes = _diff(versions[-1]['legal'], legal)
+        earlier = [v for v in versions if effective_ordinal(v['effective']) < day]
+        # The version being replaced on the same date, else the last earlier one
+        base = next((v for v in versions if effective_ordinal(v['effective']) == day),
+                    earlier[-1] if earlier else None)
+        later = [dict(v, legal=_patch(v['legal'], changes))
+                 for v in versions if effective_ordinal(v['effective']) > day]
+        current = legal if base is None else _patch(base['legal'], changes)
+        versions[:] = earlier + [{'effective': when, 'legal': current}] + later
+        changed.append(abbreviation)
+    return changed
+
+
+def record_file(history_path, states, effective=None):
+    """record_dataset against a history file under its lock; returns the changed abbreviations"""
+    with locked(history_path):
+        store = load_store(history_path)
+        changed = record_dataset(store, states, effective)
+        if changed:
+            write_json_atomic(history_path, store)
+    return changed
+
+
+def describe(legal):
+    if legal is None:
+        return 'no rule recorded'
+    methods = [name for name, accepted in legal['verificationMethods'].items() if accepted]
+    return (f"Tier {legal['tier']}, ID {'required' if legal['idRequired'] else 'not required'}"
+            + (f", methods: {', '.join(methods)}" if methods else ''))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-state rule history with as-of-date queries')
+    parser.add_argument('--history', default=DEFAULT_HISTORY)
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    record = sub.add_parser('record', help='record the dataset as new rule versions where it changed')
+    record.add_argument('--dataset', default='data/states-data.json')
+    record.add_argument('--effective', help='effective date for all recorded changes (YYYY-MM-DD)')
+
+    as_of = sub.add_parser('as-of', help='rules in force on a date')
+    as_of.add_argument('date')
+    as_of.add_argument('--state', action='append', help='limit to these abbreviations')
+
+    changes = sub.add_parser('changes', help='rule changes between two dates')
+    changes.add_argument('start')
+    changes.add_argument('end')
+
+    args = parser.parse_args()
+
+    try:
+        if args.command == 'record':
+            if args.effective:
+                date.fromisoformat(args.effective)
+            changed = record_file(args.history, iter_records(args.dataset), args.effective)
+            print(f"✓ Recorded {len(changed)} changed state(s)" +
+                  (f": {', '.join(changed)}" if changed else ''))
+            return
+
+        history = RuleHistory.load(args.history)
+        if args.command == 'as-of':
+            rules = history.as_of(args.date)
+            for abbreviation in args.state or history.abbreviations:
+                print(f"{abbreviation:<4} {describe(rules.get(abbreviation.upper()))}")
+        else:
+            found = history.changes(args.start, args.end)
+            for change in found:
+                print(f"{change['effective']}  {change['state']:<4} {describe(change['legal'])}")
+            if not found:
+                print(f"✓ No rule changes between {args.start} and {args.end}")
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
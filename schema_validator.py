@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Compiled schema validator for states-data.json records
+
+STATE_SCHEMA mirrors the StateData interface in PROJECT_SPECS.md, updated
+for the fields the dataset has gained since (gayMaleDensity replaced
+lgbtqDensity, the population breakdowns, the 12 verification methods and
+9 penalty fields). compile_schema turns it into nested checker functions
+once, so validating a record is a single traversal that collects every
+error with its JSON path instead of stopping at the first failure.
+"""
+from collections import namedtuple
+
+Enum = namedtuple('Enum', 'values')
+Nullable = namedtuple('Nullable', 'spec')
+Optional = namedtuple('Optional', 'spec')
+
+NUMBER = (int, float)
+
+VERIFICATION_METHOD_FIELDS = [
+    'creditCard', 'digitizedId', 'governmentId', 'transactionalData',
+    'ial2Required', 'photoMatching', 'anonymousOption', 'thirdPartyService',
+    'commercialDatabase', 'commerciallySoftware', 'bankAccount', 'financialDocument',
+]
+
+STATE_SCHEMA = {
+    'state': str,
+    'abbreviation': str,
+    'population': int,
+    'populationPercent': NUMBER,
+    'gayMaleDensity': Enum(('high', 'medium', 'low')),
+    'gayMalePopulation': int,
+    'lesbianPopulation': int,
+    'totalLgbtPopulation': int,
+    'legal': {
+        'tier': Enum((0, 1, 2, 3, 4)),
+        'idRequired': bool,
+        'applicabilityExact': str,
+        'idRequirementsExact': str,
+        'penaltiesExact': str,
+        'verificationMethods': {field: bool for field in VERIFICATION_METHOD_FIELDS},
+        'penalties': {
+            'perViolation': Nullable(str),
+            'perDay': Nullable(str),
+            'ifMinorAccesses': Nullable(str),
+            'privateRightOfAction': bool,
+            'attorneyFees': bool,
+            'civilOnly': bool,
+            'punitiveDamages': bool,
+            'injunctiveRelief': bool,
+            'statutoryDamages': Nullable(str),
+        },
+        'citation': str,
+        'effectiveDate': Nullable(str),
+        'notes': str,
+        'minimumRequirement': Optional(str),
+    },
+}
+
+
+def _type_name(value):
+    return 'null' if value is None else type(value).__name__
+
+
+def compile_schema(spec):
+    """Compile a schema spec into a check(value, path, errors) function"""
+    if isinstance(spec, dict):
+        fields = []
+        for key, field_spec in spec.items():
+            required = not isinstance(field_spec, Optional)
+            if not required:
+                field_spec = field_spec.spec
+            fields.append((key, required, compile_schema(field_spec)))
+
+        def check_object(value, path, errors):
+            if not isinstance(value, dict):
+                errors.append((path, f"expected object, got {_type_name(value)}"))
+                return
+            for key, required, check in fields:
+                if key in value:
+                    check(value[key], f"{path}.{key}", errors)
+                elif required:
+                    errors.append((f"{path}.{key}", "missing required field"))
+        return check_object
+
+    if isinstance(spec, Nullable):
+        inner = compile_schema(spec.spec)
+
+        def check_nullable(value, path, errors):
+            if value is not None:
+                inner(value, path, errors)
+        return check_nullable
+
+    if isinstance(spec, Enum):
+        allowed = spec.values
+
+        def check_enum(value, path, errors):
+            # bool is an int subclass; True must not pass as tier 1
+            if isinstance(value, bool) or value not in allowed:
+                errors.append((path, f"expected one of {', '.join(map(repr, allowed))}, got {value!r}"))
+        return check_enum
+
+    types = spec if isinstance(spec, tuple) else (spec,)
+    expected = ' or '.join(t.__name__ for t in types)
+    reject_bool = bool not in types
+
+    def check_type(value, path, errors):
+        if not isinstance(value, types) or (reject_bool and isinstance(value, bool)):
+            errors.append((path, f"expected {expected}, got {_type_name(value)}"))
+    return check_type
+
+
+check_state = compile_schema(STATE_SCHEMA)
+
+
+def validate_records(records, record_checks=()):
+    """Validate an iterable of state records in one pass
+
+    record_checks are extra callables (record, path, errors) run on each
+    record. Returns (record_count, errors) where errors is a list of
+    (json_path, state_name, message).
+    """
+    errors = []
+    seen_names = set()
+    seen_abbreviations = set()
+    count = 0
+
+    for i, record in enumerate(records):
+        count += 1
+        path = f"$[{i}]"
+        record_errors = []
+        check_state(record, path, record_errors)
+
+        name = record.get('state') if isinstance(record, dict) else None
+        abbreviation = record.get('abbreviation') if isinstance(record, dict) else None
+        if name in seen_names:
+            record_errors.append((f"{path}.state", f"duplicate state name {name!r}"))
+        if abbreviation in seen_abbreviations:
+            record_errors.append((f"{path}.abbreviation", f"duplicate abbreviation {abbreviation!r}"))
+        seen_names.add(name)
+        seen_abbreviations.add(abbreviation)
+
+        if isinstance(record, dict):
+            for record_check in record_checks:
+                record_check(record, path, record_errors)
+
+        errors.extend((error_path, name, message) for error_path, message in record_errors)
+
+    return count, errors
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Monte-Carlo estimate of yearly penalty exposure for a market selection
+
+A state is exposed when it is in the selection (--states / --tiers) and the
+verification methods offered (--methods) do not satisfy it. Each exposed
+state's penalties come from penalty_parser.py; every scenario then draws,
+for one year:
+
+    attorney-general actions  Bernoulli(--enforcement-rate), if the state has
+                              attorney-general penalties
+    private suits             Poisson(--suit-rate), if it has private ones
+
+and prices each action from its components: per-violation amounts times
+Poisson(--violations-per-action) violations, per-day amounts times
+geometric(--days-per-action) days, per-action amounts once (minor-access
+penalties with probability --minor-access-rate), unquantified damages as
+lognormal(--damages-per-suit) per suit, plus --attorney-fees per action
+where fees are recoverable. Remedies a clause offers as alternatives
+("actual damages or $5,000 per violation") are drawn per action and only
+the larger one counts. "Up to $X" draws uniformly from
+[--up-to-floor * X, X]; ranges draw uniformly; data-retention penalties
+only apply with --retains-data. Punitive damages are listed, not priced.
+
+All scenarios for a state are drawn at once as numpy arrays, so a million
+scenarios take about a second. Reported per state and in total: expected
+exposure, probability of any exposure, P95/P99 and (total only) P99.9 and
+the expected loss beyond P99.
+
+Requires numpy.
+
+Usage:
+    python simulate_exposure.py --methods creditCard,commerciallySoftware
+    python simulate_exposure.py --tiers 0,1,2 --scenarios 5000000 --json exposure.json
+    python simulate_exposure.py --states TX,FL,KS --enforcement-rate 0.2
+"""
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+
+from dataset_io import iter_records
+from penalty_parser import format_component, parse_penalties
+from state_bitmasks import METHOD_BITS, method_mask, required_mask, satisfies
+
+DEFAULT_SCENARIOS = 1_000_000
+
+ASSUMPTIONS = {
+    'enforcementRate': 0.05,
+    'suitRate': 0.2,
+    'violationsPerAction': 10.0,
+    'daysPerAction': 90.0,
+    'minorAccessRate': 0.25,
+    'damagesPerSuit': 50_000.0,
+    'damagesSigma': 1.0,
+    'attorneyFees': 75_000.0,
+    'upToFloor': 0.5,
+    'retainsData': False,
+}
+
+
+def select_states(states, abbreviations=None, tiers=None, offered=0):
+    """(exposed, compliant) state records for a market selection"""
+    exposed, compliant = [], []
+    for state in states:
+        if abbreviations and state['abbreviation'].upper() not in abbreviations:
+            continue
+        if tiers is not None and state['legal']['tier'] not in tiers:
+            continue
+        if satisfies(state['legal']['idRequired'], method_mask(state), required_mask(state), offered):
+            compliant.append(state)
+        else:
+            exposed.append(state)
+    return exposed, compliant
+
+
+def draw_amount(rng, component, n, assumptions):
+    """Per-scenario dollar amount for one component"""
+    low, high = component['amount'], component['cap']
+    if low is None:
+        low = high * assumptions['upToFloor']
+    if high is None:
+        high = low
+    return np.full(n, low) if low == high else rng.uniform(low, high, n)
+
+
+def sum_of_lognormals(rng, counts, mean, sigma):
+    """Per-scenario sum of counts[i] lognormal draws with the given mean"""
+    mu = np.log(mean) - sigma ** 2 / 2
+    draws = rng.lognormal(mu, sigma, int(counts.sum()))
+    owners = np.repeat(np.arange(len(counts)), counts)
+    return np.bincount(owners, weights=draws, minlength=len(counts))
+
+
+def action_values(rng, component, m, assumptions):
+    """Dollar amount of one component for each of m separate actions"""
+    if component['unit'] == 'damages':
+        sigma = assumptions['damagesSigma']
+        values = rng.lognormal(np.log(assumptions['damagesPerSuit']) - sigma ** 2 / 2, sigma, m)
+    else:
+        if component['unit'] == 'violation':
+            units = rng.poisson(assumptions['violationsPerAction'], m)
+        elif component['unit'] == 'day':
+            units = rng.geometric(1 / max(assumptions['daysPerAction'], 1), m)
+        else:
+            units = np.ones(m)
+        values = units * draw_amount(rng, component, m, assumptions)
+    if component['trigger'] == 'minorAccess':
+        values = values * (rng.random(m) < assumptions['minorAccessRate'])
+    return values
+
+
+def price_alternatives(rng, group, count, assumptions):
+    """Per-scenario amount for the remedies of one "X or Y" clause
+
+    count[i] actions are brought in scenario i; each recovers whichever
+    alternative comes out larger for it, not their sum.
+    """
+    owners = np.repeat(np.arange(len(count)), count)
+    options = {}
+    for component in group:
+        values = action_values(rng, component, len(owners), assumptions)
+        options[component['alternative']] = options.get(component['alternative'], 0) + values
+    best = np.maximum.reduce(list(options.values()))
+    return np.bincount(owners, weights=best, minlength=len(count))
+
+
+def simulate_state(rng, parsed, n, assumptions):
+    """Yearly exposure for one state across n scenarios"""
+    components = [component for component in parsed['components']
+                  if assumptions['retainsData'] or component['trigger'] != 'dataRetention']
+    enforcers = {component['enforcer'] for component in components}
+    zero = np.zeros(n, dtype=np.int64)
+    actions = {
+        'attorneyGeneral': ((rng.random(n) < assumptions['enforcementRate']).astype(np.int64)
+                            if 'attorneyGeneral' in enforcers else zero),
+        'private': rng.poisson(assumptions['suitRate'], n) if 'private' in enforcers else zero,
+    }
+
+    exposure = np.zeros(n)
+    alternatives = {}
+    for component in components:
+        if component.get('alternative') is not None:
+            alternatives.setdefault((component['text'], component['enforcer']), []).append(component)
+            continue
+        count = actions[component['enforcer']]
+        if component['trigger'] == 'minorAccess':
+            count = rng.binomial(count, assumptions['minorAccessRate'])
+
+        if component['unit'] == 'damages':
+            exposure += sum_of_lognormals(rng, count, assumptions['damagesPerSuit'], assumptions['damagesSigma'])
+            continue
+        if component['unit'] == 'violation':
+            units = rng.poisson(count * assumptions['violationsPerAction'])
+        elif component['unit'] == 'day':
+            # Each action counts geometric(1 / daysPerAction) days; the sum of
+            # `count` geometrics is count + NegativeBinomial(count, p)
+            p = 1 / max(assumptions['daysPerAction'], 1)
+            units = np.where(count > 0, count + rng.negative_binomial(np.maximum(count, 1), p), 0)
+        else:
+            units = count
+        exposure += units * draw_amount(rng, component, n, assumptions)
+    for (_, enforcer), group in alternatives.items():
+        exposure += price_alternatives(rng, group, actions[enforcer], assumptions)
+
+    if parsed['attorneyFees']:
+        exposure += (actions['attorneyGeneral'] + actions['private']) * assumptions['attorneyFees']
+    return exposure
+
+
+def summarize(exposure):
+    return {
+        'expected': float(exposure.mean()),
+        'probabilityAny': float((exposure > 0).mean()),
+        'p95': float(np.percentile(exposure, 95)),
+        'p99': float(np.percentile(exposure, 99)),
+    }
+
+
+def simulate(states, n, assumptions, seed=None):
+    """Per-state and total exposure statistics for exposed state records"""
+    rng = np.random.default_rng(seed)
+    total = np.zeros(n)
+    per_state = {}
+    for state in states:
+        parsed = parse_penalties(state['legal'])
+        exposure = simulate_state(rng, parsed, n, assumptions)
+        total += exposure
+        per_state[state['abbreviation']] = dict(
+            summarize(exposure),
+            components=[format_component(component) for component in parsed['components']],
+            unpriced=['punitive damages'] if parsed['punitiveDamages'] else [])
+
+    p99 = np.percentile(total, 99)
+    totals = dict(summarize(total), p999=float(np.percentile(total, 99.9)),
+                  expectedBeyondP99=float(total[total >= p99].mean()))
+    return per_state, totals
+
+
+def money(value):
+    return f"${value:,.0f}"
+
+
+def print_report(per_state, totals, compliant, n, assumptions, elapsed):
+    print("=" * 80)
+    print("PENALTY EXPOSURE SIMULATION (1 year)")
+    print("=" * 80)
+    print(f"{n:,} scenarios  |  {len(per_state)} exposed states  |  "
+          f"{len(compliant)} selected states satisfied by the offered methods  |  {elapsed:.1f}s")
+    print(f"Assumptions: AG action {assumptions['enforcementRate']:.0%}/yr, "
+          f"private suits {assumptions['suitRate']:g}/yr, "
+          f"{assumptions['violationsPerAction']:g} violations and {assumptions['daysPerAction']:g} days per action, "
+          f"minor access {assumptions['minorAccessRate']:.0%}, damages {money(assumptions['damagesPerSuit'])}/suit, "
+          f"fees {money(assumptions['attorneyFees'])}/action")
+    print()
+
+    print(f"{'State':<6} {'Expected':>12} {'P(any)':>8} {'P95':>12} {'P99':>12}  Penalties")
+    print("-" * 80)
+    for abbreviation, stats in sorted(per_state.items(), key=lambda item: -item[1]['expected']):
+        notes = stats['components'] + [f"{item} (not priced)" for item in stats['unpriced']]
+        print(f"{abbreviation:<6} {money(stats['expected']):>12} {stats['probabilityAny']:>8.1%} "
+              f"{money(stats['p95']):>12} {money(stats['p99']):>12}  {notes[0] if notes else '-'}")
+        for note in notes[1:]:
+            print(f"{'':<55}{note}")
+    print("-" * 80)
+    print(f"{'TOTAL':<6} {money(totals['expected']):>12} {totals['probabilityAny']:>8.1%} "
+          f"{money(totals['p95']):>12} {money(totals['p99']):>12}")
+    print()
+    print(f"Total P99.9:             {money(totals['p999'])}")
+    print(f"Expected loss beyond P99: {money(totals['expectedBeyondP99'])}")
+
+
+def parse_list(text):
+    return [item.strip() for item in text.split(',') if item.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Simulate yearly penalty exposure for a market selection')
+    parser.add_argument('--dataset', default='data/states-data.json')
+    parser.add_argument('--states', help='comma-separated abbreviations served (default: all)')
+    parser.add_argument('--tiers', help='comma-separated tiers served (default: all)')
+    parser.add_argument('--methods', default='', help='comma-separated verification methods offered')
+    parser.add_argument('--scenarios', type=int, default=DEFAULT_SCENARIOS)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--enforcement-rate', type=float, default=ASSUMPTIONS['enforcementRate'],
+                        help='yearly probability of an attorney-general action per state (default: %(default)s)')
+    parser.add_argument('--suit-rate', type=float, default=ASSUMPTIONS['suitRate'],
+                        help='expected private suits per state per year (default: %(default)s)')
+    parser.add_argument('--violations-per-action', type=float, default=ASSUMPTIONS['violationsPerAction'])
+    parser.add_argument('--days-per-action', type=float, default=ASSUMPTIONS['daysPerAction'])
+    parser.add_argument('--minor-access-rate', type=float, default=ASSUMPTIONS['minorAccessRate'])
+    parser.add_argument('--damages-per-suit', type=float, default=ASSUMPTIONS['damagesPerSuit'])
+    parser.add_argument('--attorney-fees', type=float, default=ASSUMPTIONS['attorneyFees'])
+    parser.add_argument('--up-to-floor', type=float, default=ASSUMPTIONS['upToFloor'],
+                        help='"up to $X" draws from [floor * X, X] (default: %(default)s)')
+    parser.add_argument('--retains-data', action='store_true', help='include data-retention penalties')
+    parser.add_argument('--json', help='also write the results to this file')
+    args = parser.parse_args()
+
+    assumptions = dict(ASSUMPTIONS, enforcementRate=args.enforcement_rate, suitRate=args.suit_rate,
+                       violationsPerAction=args.violations_per_action, daysPerAction=args.days_per_action,
+                       minorAccessRate=args.minor_access_rate, damagesPerSuit=args.damages_per_suit,
+                       attorneyFees=args.attorney_fees, upToFloor=args.up_to_floor,
+                       retainsData=args.retains_data)
+
+    offered = 0
+    for method in parse_list(args.methods):
+        if method not in METHOD_BITS:
+            print(f"❌ Unknown verification method {method!r} (one of {', '.join(METHOD_BITS)})")
+            sys.exit(1)
+        offered |= METHOD_BITS[method]
+    abbreviations = {item.upper() for item in parse_list(args.states)} if args.states else None
+    tiers = {int(item) for item in parse_list(args.tiers)} if args.tiers else None
+
+    exposed, compliant = select_states(iter_records(args.dataset), abbreviations, tiers, offered)
+
+    start = time.perf_counter()
+    per_state, totals = simulate(exposed, args.scenarios, assumptions, args.seed)
+    elapsed = time.perf_counter() - start
+
+    print_report(per_state, totals, compliant, args.scenarios, assumptions, elapsed)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'scenarios': args.scenarios, 'assumptions': assumptions,
+                       'compliantStates': [state['abbreviation'] for state in compliant],
+                       'states': per_state, 'total': totals}, f, indent=2)
+        print()
+        print(f"✓ Results written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Content-addressed snapshot store and structural diff for states-data.json
+
+Each state record is stored once under data/snapshots/objects/, named by
+the SHA-256 of its compact JSON, so a snapshot that changes one state adds
+one object rather than a full copy of the dataset. A named snapshot
+(data/snapshots/refs/<name>.json) is just the ordered list of
+[abbreviation, record hash] pairs.
+
+The diff compares two snapshots by hash first: states whose hashes match
+are skipped without being read, and only changed records are loaded and
+walked field by field (again skipping equal subtrees). It reports added
+and removed states and every changed, added or removed field path.
+
+Either side of a diff may be a snapshot name or a dataset file.
+
+Usage:
+    python snapshot_store.py save 2025-10-review [--dataset data/states-data.json]
+    python snapshot_store.py list
+    python snapshot_store.py diff 2025-09 2025-10-review [--json]
+    python snapshot_store.py diff 2025-10-review data/states-data.json
+    python snapshot_store.py restore 2025-09 --output data/states-data.json
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import tempfile
+from datetime import datetime, timezone
+
+from dataset_io import iter_records, locked, write_json_atomic, write_records_atomic
+
+DEFAULT_STORE = os.path.join('data', 'snapshots')
+NAME_PATTERN = re.compile(r'^[A-Za-z0-9][A-Za-z0-9._-]*$')
+
+_MISSING = object()
+
+
+def encode_record(record):
+    """Canonical stored form of a record (key order kept so restores round-trip)"""
+    return json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def record_key(record):
+    return (record.get('abbreviation') or record['state']).upper()
+
+
+class SnapshotStore:
+    """Record objects and named snapshots under one directory"""
+
+    def __init__(self, root=DEFAULT_STORE):
+        self.root = root
+        self.objects_dir = os.path.join(root, 'objects')
+        self.refs_dir = os.path.join(root, 'refs')
+        self._cache = {}
+        self.objects_written = 0
+
+    def _object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], digest[2:] + '.json')
+
+    def _ref_path(self, name):
+        if not NAME_PATTERN.match(name):
+            raise ValueError(f"invalid snapshot name {name!r} (letters, digits, '.', '_', '-')")
+        return os.path.join(self.refs_dir, name + '.json')
+
+    def put(self, record):
+        """Store a record if it is new; returns its hash"""
+        data = encode_record(record)
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.', suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+                raise
+            self.objects_written += 1
+        return digest
+
+    def get(self, digest):
+        """Load a record by hash (cached, so a record shared by many snapshots is read once)"""
+        record = self._cache.get(digest)
+        if record is None:
+            with open(self._object_path(digest), 'rb') as f:
+                record = json.loads(f.read())
+            self._cache[digest] = record
+        return record
+
+    def save(self, name, records, source=None):
+        """Store records as a named snapshot; returns (entries, new_object_count)
+
+        Snapshots are immutable: saving an existing name with different
+        content raises ValueError, saving identical content is a no-op.
+        """
+        path = self._ref_path(name)
+        before = self.objects_written
+        entries = entries_for(records, self.put)
+
+        if os.path.exists(path):
+            if self.entries(name) != entries:
+                raise ValueError(f"snapshot {name!r} already exists with different content")
+            return entries, 0
+        os.makedirs(self.refs_dir, exist_ok=True)
+        write_json_atomic(path, {
+            'name': name,
+            'created': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'source': source,
+            'records': entries,
+        })
+        return entries, self.objects_written - before
+
+    def ref(self, name):
+        path = self._ref_path(name)
+        if not os.path.exists(path):
+            raise ValueError(f"no snapshot named {name!r} in {self.root}")
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def entries(self, name):
+        return [tuple(entry) for entry in self.ref(name)['records']]
+
+    def names(self):
+        if not os.path.isdir(self.refs_dir):
+            return []
+        return sorted(filename[:-5] for filename in os.listdir(self.refs_dir) if filename.endswith('.json'))
+
+    def object_count(self):
+        if not os.path.isdir(self.objects_dir):
+            return 0
+        return sum(len([f for f in files if f.endswith('.json')])
+                   for _, _, files in os.walk(self.objects_dir))
+
+    def records(self, name):
+        """Yield the records of a snapshot in their original order"""
+        for _, digest in self.entries(name):
+            yield self.get(digest)
+
+
+def entries_for(records, hash_record):
+    """[(key, hash)] for a record stream; raises ValueError on duplicate states"""
+    entries = []
+    seen = set()
+    for record in records:
+        key = record_key(record)
+        if key in seen:
+            raise ValueError(f"duplicate state {key!r}")
+        seen.add(key)
+        entries.append((key, hash_record(record)))
+    return entries
+
+
+def resolve(store, spec):
+    """(entries, loader) for a snapshot name or a dataset file path"""
+    if os.path.isfile(spec):
+        records = {}
+
+        def remember(record):
+            digest = hashlib.sha256(encode_record(record)).hexdigest()
+            records[digest] = record
+            return digest
+
+        entries = entries_for(iter_records(spec), remember)
+        return entries, records.__getitem__
+    return store.entries(spec), store.get
+
+
+def diff_values(old, new, path=()):
+    """Yield (kind, path, old, new) for every differing leaf of two JSON values"""
+    if old == new:
+        return
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key in list(old) + [key for key in new if key not in old]:
+            a, b = old.get(key, _MISSING), new.get(key, _MISSING)
+            if a is _MISSING:
+                yield 'added', path + (key,), None, b
+            elif b is _MISSING:
+                yield 'removed', path + (key,), a, None
+            else:
+                yield from diff_values(a, b, path + (key,))
+    else:
+        yield 'changed', path, old, new
+
+
+def diff_snapshots(old_entries, old_load, new_entries, new_load):
+    """Structural diff of two [(key, hash)] lists; records are loaded only when hashes differ"""
+    old_hashes, new_hashes = dict(old_entries), dict(new_entries)
+    result = {'added': [], 'removed': [], 'changed': {}, 'unchanged': 0}
+    for key, digest in new_entries:
+        if key not in old_hashes:
+            result['added'].append(key)
+    for key, digest in old_entries:
+        if key not in new_hashes:
+            result['removed'].append(key)
+        elif new_hashes[key] == digest:
+            result['unchanged'] += 1
+        else:
+            fields = [{'kind': kind, 'path': '.'.join(path), 'old': a, 'new': b}
+                      for kind, path, a, b in diff_values(old_load(digest), new_load(new_hashes[key]))]
+            if fields:
+                result['changed'][key] = fields
+            else:
+                # Same content in a different key order
+                result['unchanged'] += 1
+    return result
+
+
+def format_value(value):
+    text = json.dumps(value, ensure_ascii=False)
+    return text[:60] + '...' if len(text) > 60 else text
+
+
+def print_diff(old_spec, new_spec, result):
+    print("=" * 80)
+    print(f"SNAPSHOT DIFF: {old_spec} → {new_spec}")
+    print("=" * 80)
+    for key in result['added']:
+        print(f"+ {key}  added")
+    for key in result['removed']:
+        print(f"- {key}  removed")
+    for key, fields in result['changed'].items():
+        print(f"~ {key}")
+        for field in fields:
+            if field['kind'] == 'added':
+                print(f"      + {field['path']}: {format_value(field['new'])}")
+            elif field['kind'] == 'removed':
+                print(f"      - {field['path']}: {format_value(field['old'])}")
+            else:
+                print(f"      {field['path']}: {format_value(field['old'])} → {format_value(field['new'])}")
+    print()
+    field_count = sum(len(fields) for fields in result['changed'].values())
+    print(f"{len(result['added'])} added, {len(result['removed'])} removed, "
+          f"{len(result['changed'])} changed ({field_count} fields), {result['unchanged']} unchanged")
+    if not (result['added'] or result['removed'] or result['changed']):
+        print("✅ No differences")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Content-addressed snapshots of states-data.json')
+    parser.add_argument('--store', default=DEFAULT_STORE, help='store directory (default: %(default)s)')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    save = sub.add_parser('save', help='store a dataset file as a named snapshot')
+    save.add_argument('name')
+    save.add_argument('--dataset', default='data/states-data.json')
+
+    sub.add_parser('list', help='list snapshots')
+
+    diff = sub.add_parser('diff', help='structural diff of two snapshots or dataset files')
+    diff.add_argument('old')
+    diff.add_argument('new')
+    diff.add_argument('--json', action='store_true', help='print the diff as JSON')
+
+    restore = sub.add_parser('restore', help='write a snapshot back out as a dataset file')
+    restore.add_argument('name')
+    restore.add_argument('--output', required=True)
+
+    args = parser.parse_args()
+    store = SnapshotStore(args.store)
+
+    try:
+        if args.command == 'save':
+            entries, new_objects = store.save(args.name, iter_records(args.dataset), source=args.dataset)
+            print(f"✓ Snapshot {args.name}: {len(entries)} records, {new_objects} new object(s)")
+        elif args.command == 'list':
+            for name in store.names():
+                ref = store.ref(name)
+                print(f"{name:<40} {ref['created']}  {len(ref['records']):>3} records  {ref.get('source') or ''}")
+            print(f"{len(store.names())} snapshot(s), {store.object_count()} distinct record object(s)")
+        elif args.command == 'diff':
+            old_entries, old_load = resolve(store, args.old)
+            new_entries, new_load = resolve(store, args.new)
+            result = diff_snapshots(old_entries, old_load, new_entries, new_load)
+            if args.json:
+                print(json.dumps(result, indent=2, ensure_ascii=False))
+            else:
+                print_diff(args.old, args.new, result)
+        else:
+            with locked(args.output):
+                count = write_records_atomic(args.output, store.records(args.name))
+            print(f"✓ Restored {count} records from {args.name} to {args.output}")
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Bitmask encodings of tiers and verification methods
+
+Bit i of a method mask is VERIFICATION_METHOD_FIELDS[i]. The dashboard's
+"No Law" filter is an extra selection bit (NO_LAW_BIT) that a state
+carries when it accepts no verification method at all, so a state matches
+an ID-check selection exactly when selection_bits(state) & selection != 0.
+"""
+from schema_validator import VERIFICATION_METHOD_FIELDS
+
+METHOD_BITS = {method: 1 << i for i, method in enumerate(VERIFICATION_METHOD_FIELDS)}
+ALL_METHODS_MASK = (1 << len(VERIFICATION_METHOD_FIELDS)) - 1
+
+NO_LAW_BIT = 1 << len(VERIFICATION_METHOD_FIELDS)
+SELECTION_FIELDS = VERIFICATION_METHOD_FIELDS + ['noLaw']
+
+TIERS = [0, 1, 2, 3, 4]
+
+
+def method_mask(state):
+    """Mask of the verification methods a state accepts"""
+    methods = state['legal']['verificationMethods']
+    mask = 0
+    for method, bit in METHOD_BITS.items():
+        if methods.get(method):
+            mask |= bit
+    return mask
+
+
+def selection_bits(state):
+    """Method mask plus NO_LAW_BIT for states that accept no method"""
+    mask = method_mask(state)
+    return mask if mask else NO_LAW_BIT
+
+
+def tier_bit(state):
+    return 1 << state['legal']['tier']
+
+
+def required_mask(state):
+    """Bit of the state's minimumRequirement method, or 0 if it has none"""
+    return METHOD_BITS.get(state['legal'].get('minimumRequirement'), 0)
+
+
+def satisfies(id_required, accepted, required, offered):
+    """Whether offering the methods in `offered` complies with a state's law
+
+    States without an ID requirement are always satisfied; otherwise at
+    least one offered method must be accepted and the minimumRequirement
+    method (if any) must be among those offered.
+    """
+    if not id_required:
+        return True
+    return bool(accepted & offered) and offered & required == required
+
+
+def methods_from_mask(mask):
+    """Expand a method mask to field names in bit order"""
+    return [method for method, bit in METHOD_BITS.items() if mask & bit]
+
+
+def subset_unions(item_bits, width):
+    """For every mask over `width` bits, OR together item_bits[b] for each set bit b
+
+    Each mask reuses the result for the mask without its lowest bit, so all
+    2**width unions cost one OR each.
+    """
+    unions = [0] * (1 << width)
+    for mask in range(1, 1 << width):
+        lowest = mask & -mask
+        unions[mask] = unions[mask ^ lowest] | item_bits[lowest.bit_length() - 1]
+    return unions
@@ -0,0 +1,31 @@
+import os
+import sys
+
+# The scripts are flat top-level modules; make them importable from tests/
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pytest
+
+DATASET = os.path.join(ROOT, 'data', 'states-data.json')
+
+IP_RANGES = """network,start,end,region
+203.0.113.0/25,,,TX
+,203.0.113.128,203.0.113.255,Florida
+,198.51.100.0,198.51.100.0,US-CA
+2001:db8::/33,,,TX
+,2001:db8:8000::,2001:db8:8000::ffff,fl
+10.0.0.0/8,,,ON
+"""
+
+
+@pytest.fixture
+def ip_index_path(tmp_path):
+    """A compiled IP index over a few documentation ranges (plus a skipped non-US row)"""
+    from ip_state_index import compile_index
+
+    csv_path = tmp_path / 'ranges.csv'
+    csv_path.write_text(IP_RANGES)
+    output = tmp_path / 'ip-state-index.bin'
+    assert compile_index(str(csv_path), DATASET, str(output)) == (3, 2, 1)
+    return str(output)
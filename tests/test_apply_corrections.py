@@ -0,0 +1,79 @@
+import json
+import os
+
+import pytest
+
+from apply_corrections import CorrectionError, apply_to_dataset
+
+STATES = [
+    {'state': 'Texas', 'abbreviation': 'TX', 'legal': {'tier': 1, 'idRequirementsExact': 'Government ID'}},
+    {'state': 'Ohio', 'abbreviation': 'OH', 'legal': {'tier': 3, 'idRequirementsExact': '-'}},
+]
+
+
+@pytest.fixture
+def dataset(tmp_path, monkeypatch):
+    # Snapshots go to data/snapshots relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    path = tmp_path / 'states-data.json'
+    path.write_text(json.dumps(STATES, indent=2))
+    return path
+
+
+def leftovers(path):
+    return sorted(name for name in os.listdir(path.parent) if name.endswith('.tmp'))
+
+
+@pytest.mark.parametrize('failing', [
+    {'op': 'test', 'state': 'OH', 'path': '/legal/tier', 'value': 2},
+    {'op': 'replace', 'state': 'Ohio', 'path': '/legal/missing', 'value': 1},
+    {'op': 'append', 'state': 'Ohio', 'path': '/legal/tier', 'value': 'x'},
+    {'op': 'add', 'state': 'Nowhere', 'path': '/legal/tier', 'value': 1},
+])
+def test_failed_operation_rolls_back_whole_batch(dataset, failing):
+    before = dataset.read_bytes()
+    operations = [
+        {'op': 'replace', 'state': 'TX', 'path': '/legal/tier', 'value': 2},
+        failing,
+    ]
+    with pytest.raises(CorrectionError):
+        apply_to_dataset(str(dataset), operations)
+    assert dataset.read_bytes() == before
+    assert leftovers(dataset) == []
+    assert not (dataset.parent / 'data' / 'snapshots').exists()
+
+
+def test_successful_batch_writes_and_snapshots(dataset):
+    operations = [{'op': 'replace', 'state': 'TX', 'path': '/legal/tier', 'value': 2}]
+    changes, snapshot = apply_to_dataset(str(dataset), operations)
+    assert [(c['state'], c['old'], c['new']) for c in changes] == [('Texas', 1, 2)]
+    assert snapshot is not None
+    assert json.loads(dataset.read_text())[0]['legal']['tier'] == 2
+
+    # Re-applying is a no-op and does not rewrite the file
+    before = dataset.read_bytes()
+    assert apply_to_dataset(str(dataset), operations) == ([], None)
+    assert dataset.read_bytes() == before
+
+
+def test_changes_are_recorded_in_rule_history(dataset, tmp_path):
+    from rule_history import RuleHistory
+
+    history_path = str(tmp_path / 'rule-history.json')
+    operations = [{'op': 'replace', 'state': 'TX', 'path': '/legal/tier', 'value': 2}]
+    apply_to_dataset(str(dataset), operations, history_path=history_path, effective='2025-07-01')
+
+    history = RuleHistory.load(history_path)
+    assert history.abbreviations == ['OH', 'TX']
+    assert history.rule('TX', '2025-06-30')['tier'] == 1
+    assert history.rule('TX', '2025-07-01')['tier'] == 2
+    assert [(v['state'], v['effective']) for v in history.changes('2000-01-01', '2100-01-01')] == [('TX', '2025-07-01')]
+
+    # Dry runs and failed batches leave the history alone
+    before = open(history_path).read()
+    apply_to_dataset(str(dataset), [{'op': 'replace', 'state': 'OH', 'path': '/legal/tier', 'value': 1}],
+                     dry_run=True, history_path=history_path)
+    with pytest.raises(CorrectionError):
+        apply_to_dataset(str(dataset), operations + [{'op': 'test', 'state': 'OH', 'path': '/legal/tier', 'value': 0}],
+                         history_path=history_path)
+    assert open(history_path).read() == before
@@ -0,0 +1,39 @@
+import json
+import os
+import shutil
+
+from build import build_site
+from conftest import ROOT
+from dataset_io import dataset_hash
+
+SOURCES = ['data/states-data.json', 'data/population-metadata.json', 'legal_matrix_data.txt',
+           'legal-glossary.md', 'js/app.js', 'js/sw.template.js', 'index.html', 'login.html']
+DERIVED = ['data/states-summary.json', 'data/market-stats.json', 'data/method-cover.json',
+           'data/search-index.json']
+
+
+def test_build_regenerates_stale_derived_data(tmp_path, monkeypatch):
+    for path in SOURCES + DERIVED:
+        os.makedirs(tmp_path / os.path.dirname(path), exist_ok=True)
+        shutil.copyfile(os.path.join(ROOT, path), tmp_path / path)
+    monkeypatch.chdir(tmp_path)
+
+    # Change the dataset after the derived files were built
+    with open('data/states-data.json') as f:
+        states = json.load(f)
+    states[0]['population'] += 1000
+    with open('data/states-data.json', 'w') as f:
+        json.dump(states, f, indent=2)
+    current = dataset_hash('data/states-data.json')
+
+    manifest = build_site('dist')
+
+    assert manifest['sourceHash'] == current
+    built = {}
+    for path in DERIVED:
+        with open(os.path.join('dist', manifest['assets'][path])) as f:
+            built[path] = json.load(f)
+        assert built[path]['sourceHash'] == current, path
+    assert built['data/states-summary.json']['states'][0]['population'] == states[0]['population']
+    with open(os.path.join('dist', manifest['assets']['js/app.js'])) as f:
+        assert f'const DATASET_HASH = "{current}";' in f.read()
@@ -0,0 +1,51 @@
+from build_boundaries import build_topology, is_valid_ring, zoom_tolerance
+
+
+def square(x, y, size):
+    return [[x, y], [x + size, y], [x + size, y + size], [x, y + size], [x, y]]
+
+
+def decode(topology):
+    arcs = []
+    for arc in topology['arcs']:
+        x = y = 0
+        points = []
+        for dx, dy in arc:
+            x, y = x + dx, y + dy
+            points.append((x, y))
+        arcs.append(points)
+
+    def ring(refs):
+        points = []
+        for ref in refs:
+            arc = arcs[ref] if ref >= 0 else arcs[~ref][::-1]
+            points.extend(arc[1:] if points else arc)
+        return points
+
+    for geometry in topology['objects']['states']['geometries']:
+        polygons = geometry['arcs'] if geometry['type'] == 'MultiPolygon' else [geometry['arcs']]
+        yield geometry['properties']['name'], [[ring(refs) for refs in rings] for rings in polygons]
+
+
+def test_islands_that_collapse_are_dropped():
+    # A long thin island: each half of the closed arc simplifies to a
+    # straight line, leaving the zero-area ring A-B-A
+    sliver = [[-100, 40], [-99, 40], [-98, 40.02], [-97, 40], [-98, 39.98], [-99, 40], [-100, 40]]
+    features = [
+        {'properties': {'name': 'Mainland'},
+         'geometry': {'type': 'MultiPolygon', 'coordinates': [[square(-110, 30, 10)], [sliver]]}},
+        {'properties': {'name': 'Neighbour'},
+         'geometry': {'type': 'Polygon', 'coordinates': [square(-100, 30, 5)]}},
+    ]
+    topology = build_topology(features, {}, zoom_tolerance(4), quantization=10000)
+    decoded = dict(decode(topology))
+    assert len(decoded['Mainland']) == 1
+    for polygons in decoded.values():
+        for rings in polygons:
+            assert all(is_valid_ring(ring) for ring in rings)
+
+    # Every stored arc is used by a remaining ring
+    used = {ref if ref >= 0 else ~ref for geometry in topology['objects']['states']['geometries']
+            for rings in (geometry['arcs'] if geometry['type'] == 'MultiPolygon' else [geometry['arcs']])
+            for refs in rings for ref in refs}
+    assert used == set(range(len(topology['arcs'])))
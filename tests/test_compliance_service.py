@@ -0,0 +1,146 @@
+import asyncio
+import json
+import re
+import shutil
+
+import pytest
+
+import compliance_service
+from compliance_service import ComplianceService, DecisionProtocol
+from conftest import DATASET
+from ip_state_index import IPStateIndex
+
+
+@pytest.fixture
+def service():
+    return ComplianceService(DATASET)
+
+
+def get(service, target, method='GET', body=b''):
+    status, payload = service.dispatch(method, target, body)
+    return status, json.loads(payload)
+
+
+def test_decision_routes(service):
+    status, decision = get(service, '/v1/decision/tx')
+    assert status == 200
+    assert decision['state'] == 'Texas' and decision['idRequired'] is True
+    assert 'satisfied' not in decision
+
+    assert get(service, '/v1/decision/ZZ')[0] == 404
+    assert get(service, '/v1/decision/TX', method='POST')[0] == 405
+    assert get(service, '/v1/nowhere')[0] == 404
+    assert get(service, '/v1/health')[1]['states'] == 51
+
+
+def test_methods_query(service):
+    status, decision = get(service, '/v1/decision/TX?methods=governmentId')
+    assert status == 200
+    assert decision['offeredMethods'] == ['governmentId'] and decision['satisfied'] is True
+
+    # An empty list offers nothing; other parameters do not switch to methods mode
+    assert get(service, '/v1/decision/TX?methods=')[1]['satisfied'] is False
+    assert 'satisfied' not in get(service, '/v1/decision/TX?foo=1')[1]
+    assert get(service, '/v1/decision/TX?methods=carrierPigeon')[0] == 400
+
+
+def test_batch(service):
+    body = json.dumps({'states': ['TX', 'ca', 'ZZ'], 'methods': ['governmentId']}).encode()
+    status, result = get(service, '/v1/decisions', method='POST', body=body)
+    assert status == 200
+    assert [d.get('satisfied') for d in result['decisions']] == [True, True, None]
+    assert result['decisions'][2]['error'] == 'unknown state'
+
+    assert get(service, '/v1/decisions')[0] == 405
+    assert get(service, '/v1/decisions', method='POST', body=b'{')[0] == 400
+    assert get(service, '/v1/decisions', method='POST', body=b'{"states": "TX"}')[0] == 400
+
+
+def test_decision_by_ip(service, ip_index_path):
+    assert get(service, '/v1/decision-by-ip/203.0.113.7')[0] == 404  # no index loaded
+
+    service.ip_index = IPStateIndex(ip_index_path)
+    assert get(service, '/v1/decision-by-ip/203.0.113.7')[1]['abbreviation'] == 'TX'
+    assert get(service, '/v1/decision-by-ip/2001:db8:8000::1?methods=')[1]['abbreviation'] == 'FL'
+    assert get(service, '/v1/decision-by-ip/192.0.2.1')[0] == 404
+    assert get(service, '/v1/decision-by-ip/1.2.3.4%00')[0] == 404
+    assert get(service, '/v1/decision-by-ip/not-an-ip')[0] == 404
+
+
+class FakeTransport:
+    def __init__(self):
+        self.written = b''
+        self.closed = False
+
+    def write(self, data):
+        self.written += data
+
+    def is_closing(self):
+        return self.closed
+
+    def close(self):
+        self.closed = True
+
+
+def exchange(service, raw):
+    protocol = DecisionProtocol(service)
+    transport = FakeTransport()
+    protocol.connection_made(transport)
+    protocol.data_received(raw)
+    return transport
+
+
+def statuses(transport):
+    return [int(status) for status in re.findall(rb'HTTP/1\.1 (\d{3}) ', transport.written)]
+
+
+def test_pipelined_requests(service):
+    transport = exchange(service, b'GET /v1/decision/TX HTTP/1.1\r\n\r\n'
+                                  b'GET /v1/decision/ZZ HTTP/1.1\r\nConnection: close\r\n\r\n')
+    assert statuses(transport) == [200, 404]
+    assert transport.closed
+
+
+def test_malformed_requests_get_400(service):
+    for raw in [b'GARBAGE\r\n\r\n',
+                b'POST /v1/decisions HTTP/1.1\r\nContent-Length: x\r\n\r\n',
+                b'POST /v1/decisions HTTP/1.1\r\nContent-Length: -5\r\n\r\n{"states": []}']:
+        transport = exchange(service, raw)
+        assert statuses(transport) == [400], raw
+        assert transport.closed
+
+
+def test_unexpected_error_returns_500(service, monkeypatch, capsys):
+    def broken(*args):
+        raise RuntimeError('boom')
+
+    monkeypatch.setattr(service.index, 'body', broken)
+    transport = exchange(service, b'GET /v1/decision/TX HTTP/1.1\r\n\r\nGET /v1/health HTTP/1.1\r\n\r\n')
+    assert statuses(transport) == [500, 200]
+    assert b'"error":"internal error"' in transport.written
+    assert not transport.closed
+    assert 'RuntimeError: boom' in capsys.readouterr().err
+
+
+def test_watch_keeps_index_after_unexpected_load_error(tmp_path, monkeypatch, capsys):
+    dataset = tmp_path / 'states-data.json'
+    shutil.copyfile(DATASET, dataset)
+    service = ComplianceService(str(dataset))
+    index = service.index
+
+    def broken(path):
+        raise KeyError('legal')
+
+    async def run():
+        watcher = asyncio.create_task(service.watch(interval=0.01))
+        await asyncio.sleep(0.02)
+        dataset.write_text(dataset.read_text() + '\n')
+        await asyncio.sleep(0.1)
+        assert not watcher.done()
+        watcher.cancel()
+
+    monkeypatch.setattr(compliance_service, 'load_index', broken)
+    asyncio.run(run())
+    assert service.index is index
+    err = capsys.readouterr().err
+    assert f'Keeping index {index.version}' in err and "KeyError: 'legal'" in err
@@ -0,0 +1,52 @@
+import json
+import os
+import stat
+
+import pytest
+
+from dataset_io import iter_records, write_json_atomic, write_records_atomic
+
+
+def mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+@pytest.mark.parametrize('original', [0o644, 0o664, 0o600])
+def test_rewrites_keep_the_file_mode(tmp_path, original):
+    path = tmp_path / 'states-data.json'
+    path.write_text(json.dumps([{'state': 'Texas'}]))
+    os.chmod(path, original)
+
+    write_records_atomic(str(path), iter_records(str(path)))
+    assert mode(path) == original
+    write_json_atomic(str(path), [{'state': 'Ohio'}])
+    assert mode(path) == original
+
+
+def test_new_files_get_the_umask_default(tmp_path):
+    old_umask = os.umask(0o022)
+    try:
+        write_json_atomic(str(tmp_path / 'a.json'), {})
+        write_records_atomic(str(tmp_path / 'b.ndjson'), [{'state': 'Texas'}])
+    finally:
+        os.umask(old_umask)
+    assert mode(tmp_path / 'a.json') == 0o644
+    assert mode(tmp_path / 'b.ndjson') == 0o644
+
+
+def test_write_records_round_trips_and_rolls_back(tmp_path):
+    path = tmp_path / 'states-data.json'
+    records = [{'state': 'Texas', 'legal': {'tier': 3}}, {'state': 'Ohio', 'legal': {'tier': 0}}]
+    path.write_text(json.dumps(records, indent=2))
+    before = path.read_bytes()
+    assert write_records_atomic(str(path), iter_records(str(path))) == 2
+    assert path.read_bytes() == before
+
+    def failing():
+        yield records[0]
+        raise RuntimeError('boom')
+
+    with pytest.raises(RuntimeError):
+        write_records_atomic(str(path), failing())
+    assert path.read_bytes() == before
+    assert sorted(os.listdir(tmp_path)) == ['states-data.json']
@@ -0,0 +1,40 @@
+import json
+import os
+
+import pytest
+
+from conftest import DATASET, ROOT
+from detailed_state_check import run_verification
+from matrix_parser import load_matrix_index
+
+STALE = {'Arkansas', 'Maryland', 'South Carolina'}
+
+
+@pytest.fixture
+def matrix_index(tmp_path):
+    return load_matrix_index(os.path.join(ROOT, 'legal_matrix_data.txt'), str(tmp_path / 'cache'))
+
+
+def stale_states():
+    with open(DATASET) as f:
+        states = json.load(f)
+    for state in states:
+        if state['state'] in STALE:
+            state['legal']['citation'] += ' (amended)'
+    return states
+
+
+@pytest.mark.parametrize('jobs', [2, 3])
+def test_jobs_keep_serial_order_with_partly_stale_manifest(tmp_path, matrix_index, jobs):
+    manifest = tmp_path / 'manifest.json'
+    with open(DATASET) as f:
+        list(run_verification(json.load(f), matrix_index, manifest_file=str(manifest)))
+    fresh = manifest.read_bytes()
+
+    serial = list(run_verification(stale_states(), matrix_index, manifest_file=str(manifest)))
+    manifest.write_bytes(fresh)
+    parallel = list(run_verification(stale_states(), matrix_index, jobs=jobs, manifest_file=str(manifest)))
+
+    assert [name for name, _ in serial] == [state['state'] for state in stale_states()]
+    assert parallel == serial
+    assert list(run_verification(stale_states(), matrix_index)) == serial
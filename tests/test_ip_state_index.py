@@ -0,0 +1,76 @@
+import pytest
+
+import ip_state_index
+from conftest import DATASET
+from ip_state_index import IPStateIndex, NO_STATE, merge_ranges
+
+
+@pytest.fixture
+def index(ip_index_path):
+    index = IPStateIndex(ip_index_path)
+    yield index
+    index.close()
+
+
+@pytest.mark.parametrize('ip, expected', [
+    ('203.0.113.0', 'TX'),        # first address of the first range
+    ('203.0.113.127', 'TX'),      # last address before an adjacent range of another state
+    ('203.0.113.128', 'FL'),
+    ('203.0.113.255', 'FL'),      # last address of the last IPv4 range
+    ('204.0.0.0', None),          # past the end
+    ('198.51.100.0', 'CA'),       # single-address range
+    ('198.51.99.255', None),
+    ('198.51.100.1', None),
+    ('0.0.0.0', None),            # before the first range
+    ('255.255.255.255', None),
+    ('10.1.2.3', None),           # non-US region skipped at compile time
+    ('2001:db8::', 'TX'),
+    ('2001:db8:7fff:ffff:ffff:ffff:ffff:ffff', 'TX'),
+    ('2001:db8:8000::ffff', 'FL'),
+    ('2001:db8:8000::1:0', None),
+    ('::', None),
+    ('::ffff:203.0.113.7', 'TX'),        # IPv4-mapped, as reported by dual-stack sockets
+    ('::ffff:cb00:7107', 'TX'),          # the same address in hex
+    ('::FFFF:203.0.113.200', 'FL'),
+    ('::ffff:198.51.100.1', None),
+    ('::203.0.113.7', None),             # IPv4-compatible, not mapped
+    ('ffff:ffff:ffff:ffff:ffff:ffff:ffff:ffff', None),
+])
+def test_lookup_boundaries(index, ip, expected):
+    assert index.lookup(ip) == expected
+    assert index.lookup_many([ip]) == [expected]
+
+
+@pytest.mark.parametrize('ip', ['', 'not-an-ip', '203.0.113.7\x00', '2001:db8::1\x00', '203.0.113',
+                                '203.0.113.7 ', '0xcb.0.113.7', '203.0.113.256', '2001:db8::g', ':::'])
+def test_invalid_addresses_have_no_state(index, ip):
+    assert index.lookup_index(ip) == NO_STATE
+    assert index.lookup_many([ip]) == [None]
+
+
+def test_batch_matches_single_lookups(index, monkeypatch):
+    ips = ['203.0.113.7', 'bogus', '2001:db8::1', '198.51.100.0', '198.51.100.1', '203.0.113.200',
+           '::ffff:198.51.100.0', '::ffff:not-an-ip']
+    expected = [index.lookup(ip) for ip in ips]
+    assert expected == ['TX', None, 'TX', 'CA', None, 'FL', 'CA', None]
+    assert index.lookup_many(ips) == expected
+
+    monkeypatch.setattr(ip_state_index, 'np', None)
+    assert index.lookup_many(ips) == expected
+
+
+def test_merge_ranges():
+    assert merge_ranges([(10, 19, 1), (0, 9, 1), (20, 29, 2)]) == [(0, 19, 1), (20, 29, 2)]
+    with pytest.raises(ValueError):
+        merge_ranges([(0, 10, 1), (10, 20, 2)])
+
+
+def test_index_without_ipv4_ranges(tmp_path):
+    csv_path = tmp_path / 'ranges.csv'
+    csv_path.write_text('network,region\n2001:db8::/32,TX\n')
+    output = str(tmp_path / 'v6.bin')
+    ip_state_index.compile_index(str(csv_path), DATASET, output)
+    index = IPStateIndex(output)
+    assert index.lookup('203.0.113.7') is None
+    assert index.lookup_many(['203.0.113.7', '2001:db8::1']) == [None, 'TX']
+    index.close()
@@ -0,0 +1,71 @@
+import json
+import os
+
+from keyword_classifier import METHOD_CLASSIFIER, PENALTY_CLASSIFIER
+
+DATASET = os.path.join(os.path.dirname(__file__), '..', 'data', 'states-data.json')
+
+
+def substring_methods(text):
+    """The per-keyword `in` checks analysis_script used before the classifier"""
+    requirements = text.lower()
+    checks = {
+        'creditCard': 'credit card' in requirements or 'debit card' in requirements,
+        'digitizedId': 'digitized id' in requirements or 'digital id' in requirements,
+        'governmentId': 'government-issued id' in requirements or 'government issued id' in requirements,
+        'transactionalData': 'transactional data' in requirements,
+        'ial2Required': 'ial2' in requirements or 'identity assurance level 2' in requirements,
+        'photoMatching': 'photo' in requirements and 'match' in requirements,
+        'anonymousOption': 'anonymous' in requirements,
+        'thirdPartyService': 'third party' in requirements or 'third-party' in requirements,
+        'commercialDatabase': 'commercial database' in requirements or 'commercially available database' in requirements,
+        'commerciallySoftware': 'commercially available software' in requirements or 'commercially reasonable' in requirements,
+        'bankAccount': 'bank account' in requirements,
+        'financialDocument': 'financial document' in requirements,
+    }
+    return [flag for flag, found in checks.items() if found]
+
+
+def substring_penalties(text):
+    penalties_text = text.lower()
+    checks = {
+        'punitiveDamages': 'punitive' in penalties_text,
+        'injunctiveRelief': 'injunctive' in penalties_text,
+        'statutoryDamages': 'statutory' in penalties_text,
+    }
+    return [flag for flag, found in checks.items() if found]
+
+
+EDGE_CASES = [
+    '',
+    'Digital ID or a DIGITIZED ID card',
+    'commercially available database or commercially available software',
+    'commercially reasonable method relying on a commercial database',
+    'third-party service; third party vendor',
+    'photograph matched against a photo',
+    'match the photo',
+    'photomatch',
+    'ial2 identity assurance level 2',
+    'government issued identification and government-issued id',
+    'credit card debit cardholder bank account financial documents',
+    'anonymousanonymous',
+    'Punitive and injunctive relief plus statutory damages',
+]
+
+
+def test_methods_match_substring_logic():
+    with open(DATASET) as f:
+        texts = [state['legal']['idRequirementsExact'] for state in json.load(f)]
+    for text in texts + EDGE_CASES:
+        assert METHOD_CLASSIFIER.flag_names(METHOD_CLASSIFIER.classify(text)) == substring_methods(text), text
+
+
+def test_penalties_match_substring_logic():
+    with open(DATASET) as f:
+        texts = [state['legal']['penaltiesExact'] for state in json.load(f)]
+    for text in texts + EDGE_CASES:
+        assert PENALTY_CLASSIFIER.flag_names(PENALTY_CLASSIFIER.classify(text)) == substring_penalties(text), text
+
+
+def test_classify_many_matches_classify():
+    assert METHOD_CLASSIFIER.classify_many(EDGE_CASES) == [METHOD_CLASSIFIER.classify(t) for t in EDGE_CASES]
@@ -0,0 +1,38 @@
+import os
+
+from matrix_parser import load_matrix_index
+
+MATRIX = "Yes\nTexas\nApplies to sites\nGovernment ID\n$10,000 per day\nHB 1181\n"
+
+
+def test_cache_reused_and_stale_caches_removed(tmp_path):
+    matrix = tmp_path / 'matrix.txt'
+    cache_dir = tmp_path / 'cache'
+    matrix.write_text(MATRIX)
+
+    first = load_matrix_index(str(matrix), str(cache_dir))
+    assert first['Texas']['citation'] == 'HB 1181'
+    assert load_matrix_index(str(matrix), str(cache_dir)) == first
+    assert len(os.listdir(cache_dir)) == 1
+
+    matrix.write_text(MATRIX.replace('HB 1181', 'HB 1182'))
+    assert load_matrix_index(str(matrix), str(cache_dir))['Texas']['citation'] == 'HB 1182'
+    assert len(os.listdir(cache_dir)) == 1
+
+
+def test_caches_of_other_matrix_files_are_kept(tmp_path):
+    cache_dir = tmp_path / 'cache'
+    texas = tmp_path / 'texas.txt'
+    utah = tmp_path / 'utah.txt'
+    texas.write_text(MATRIX)
+    utah.write_text(MATRIX.replace('Texas', 'Utah'))
+
+    load_matrix_index(str(texas), str(cache_dir))
+    texas_cache = set(os.listdir(cache_dir))
+    load_matrix_index(str(utah), str(cache_dir))
+    assert len(os.listdir(cache_dir)) == 2
+
+    utah.write_text(MATRIX.replace('Texas', 'Utah').replace('HB 1181', 'SB 287'))
+    assert load_matrix_index(str(utah), str(cache_dir))['Utah']['citation'] == 'SB 287'
+    assert len(os.listdir(cache_dir)) == 2
+    assert texas_cache <= set(os.listdir(cache_dir))
@@ -0,0 +1,23 @@
+import json
+
+from conftest import DATASET
+from penalty_parser import parse_clause, parse_penalties
+
+
+def indiana():
+    with open(DATASET) as f:
+        return next(state for state in json.load(f) if state['abbreviation'] == 'IN')
+
+
+def test_or_clause_remedies_are_alternatives():
+    legal = indiana()['legal']
+    assert legal['penaltiesExact'].startswith('Actual damages or $5,000 per violation')
+
+    components = parse_penalties(legal)['components']
+    assert [(c['unit'], c['amount'], c['alternative']) for c in components] == [
+        ('damages', None, 0), ('violation', 5000.0, 1)]
+
+
+def test_or_more_is_not_an_alternative():
+    components = parse_clause('$50,000 or more in statutory damages', True)
+    assert [(c['amount'], c['cap'], c['alternative']) for c in components] == [(50000.0, None, None)]
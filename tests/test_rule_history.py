@@ -0,0 +1,54 @@
+import copy
+
+from rule_history import RuleHistory, load_store, record_dataset
+
+
+def texas(**legal):
+    base = {'tier': 3, 'idRequired': True, 'notes': '',
+            'verificationMethods': {'creditCard': False, 'governmentId': True},
+            'penalties': {'perViolation': '$10,000', 'perDay': None}}
+    for key, value in legal.items():
+        if isinstance(value, dict):
+            base[key] = dict(base[key], **value)
+        else:
+            base[key] = value
+    return {'state': 'Texas', 'abbreviation': 'TX', 'legal': base}
+
+
+def test_backdated_change_is_carried_into_later_versions(tmp_path):
+    store = load_store(str(tmp_path / 'missing.json'))
+    record_dataset(store, [texas()])
+    # Correction 1 with no --effective (apply_corrections dates it today)
+    first = texas(verificationMethods={'creditCard': True})
+    record_dataset(store, [first], '2026-06-01')
+    # Correction 2 is backdated before correction 1
+    second = texas(verificationMethods={'creditCard': True}, penalties={'perDay': '$1,000'})
+    assert record_dataset(store, [copy.deepcopy(second)], '2026-01-01') == ['TX']
+
+    history = RuleHistory(store)
+    assert history.rule('TX', '2026-06-01') == second['legal']
+    assert history.rule('TX', '2099-01-01') == second['legal']
+    in_between = history.rule('TX', '2026-03-01')
+    assert in_between['penalties']['perDay'] == '$1,000'
+    assert in_between['verificationMethods']['creditCard'] is False
+    assert history.rule('TX', '2025-12-31') == texas()['legal']
+    assert [v['effective'] for v in store['states']['TX']] == [None, '2026-01-01', '2026-06-01']
+
+    # Recording the same dataset again changes nothing
+    assert record_dataset(store, [copy.deepcopy(second)], '2026-01-01') == []
+
+
+def test_same_date_replaces_version_and_removed_fields_propagate(tmp_path):
+    store = load_store(str(tmp_path / 'missing.json'))
+    record_dataset(store, [texas(notes='a')])
+    record_dataset(store, [texas(notes='b')], '2026-06-01')
+    latest = texas(notes='b')
+    del latest['legal']['penalties']['perDay']
+    record_dataset(store, [copy.deepcopy(latest)], '2026-06-01')
+    assert [v['effective'] for v in store['states']['TX']] == [None, '2026-06-01']
+
+    record_dataset(store, [texas(notes='b', tier=2)], '2025-01-01')
+    history = RuleHistory(store)
+    # The backdated record restores perDay, and that reaches the latest version too
+    assert history.rule('TX', '2026-07-01') == texas(notes='b', tier=2)['legal']
+    assert history.rule('TX', '2025-06-01') == texas(notes='a', tier=2)['legal']
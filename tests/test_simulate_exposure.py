@@ -0,0 +1,21 @@
+import json
+
+import numpy as np
+
+from conftest import DATASET
+from penalty_parser import parse_penalties
+from simulate_exposure import ASSUMPTIONS, simulate_state
+
+
+def test_alternative_remedies_are_not_summed():
+    with open(DATASET) as f:
+        indiana = next(state for state in json.load(f) if state['abbreviation'] == 'IN')
+    parsed = parse_penalties(indiana['legal'])
+
+    # Damages of exactly $1M per suit always beat $5,000 per violation, so
+    # each scenario's exposure is a whole number of $1M recoveries
+    assumptions = dict(ASSUMPTIONS, suitRate=2.0, damagesPerSuit=1e6, damagesSigma=1e-9, attorneyFees=0.0)
+    exposure = simulate_state(np.random.default_rng(1), parsed, 10_000, assumptions)
+
+    assert exposure.max() > 0
+    assert np.allclose(exposure, np.round(exposure / 1e6) * 1e6, rtol=0, atol=1)
@@ -0,0 +1,37 @@
+import difflib
+
+from text_similarity import SIMILARITY_THRESHOLD, check_similarity, normalize_text, similarity_ratio
+
+
+def exact(a, b):
+    return difflib.SequenceMatcher(None, ' '.join(a.lower().split()), ' '.join(b.lower().split())).ratio()
+
+
+def test_check_similarity_agrees_with_full_ratio():
+    pairs = [
+        ('Applies to  all websites', 'applies to all websites'),
+        ('Commercial entities publishing material harmful to minors', 'Commercial websites with harmful material'),
+        ('abc', 'xyz pdq lmn'),
+        ('', ''),
+        ('text', ''),
+    ]
+    for a, b in pairs:
+        ratio, is_exact = check_similarity(a, b)
+        full = exact(a, b) if a and b else (1.0 if a == b else 0.0)
+        assert (ratio < SIMILARITY_THRESHOLD) == (full < SIMILARITY_THRESHOLD)
+        if is_exact:
+            assert ratio == full
+        else:
+            assert ratio >= full
+
+
+def test_similarity_ratio_is_exact():
+    a = 'Age verification required for sites with one third harmful content'
+    b = 'No requirement'
+    _, is_exact = check_similarity(a, b)
+    assert not is_exact
+    assert similarity_ratio(a, b) == exact(a, b)
+
+
+def test_normalize_cache_is_bounded():
+    assert normalize_text.cache_info().maxsize is not None
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Threshold-aware text similarity for the matrix verification scripts
+
+Most comparisons only need to know whether two texts fall below a
+similarity threshold. check_similarity tries cheap upper bounds on
+difflib's ratio first and only runs the full SequenceMatcher.ratio()
+for borderline pairs. The bounds only skip work; scores shown in reports
+come from similarity_ratio.
+"""
+import difflib
+from functools import lru_cache
+
+SIMILARITY_THRESHOLD = 0.85
+
+# A state's texts are compared a few times in a row; keep only recent ones
+NORMALIZE_CACHE_SIZE = 256
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def normalize_text(text):
+    """Lowercase and collapse whitespace (memoized for recent texts)"""
+    return ' '.join(text.lower().split())
+
+
+def check_similarity(text1, text2, threshold=SIMILARITY_THRESHOLD):
+    """Compare two texts against a threshold with early exit
+
+    Returns (ratio, exact). When exact is False, ratio is an upper bound
+    that is already below the threshold, so the pair is known to differ
+    without computing the full ratio. An upper bound is not a score: use
+    similarity_ratio for pairs that get reported.
+    """
+    if not text1 and not text2:
+        return 1.0, True
+    if not text1 or not text2:
+        return 0.0, True
+
+    t1 = normalize_text(text1)
+    t2 = normalize_text(text2)
+    if t1 == t2:
+        return 1.0, True
+
+    matcher = difflib.SequenceMatcher(None, t1, t2)
+
+    # Both bounds are guaranteed >= ratio(), cheapest first
+    bound = matcher.real_quick_ratio()
+    if bound < threshold:
+        return bound, False
+    bound = matcher.quick_ratio()
+    if bound < threshold:
+        return bound, False
+
+    return matcher.ratio(), True
+
+
+def similarity_ratio(text1, text2):
+    """Exact difflib ratio of the normalized texts"""
+    if not text1 and not text2:
+        return 1.0
+    if not text1 or not text2:
+        return 0.0
+    return difflib.SequenceMatcher(None, normalize_text(text1), normalize_text(text2)).ratio()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Per-state content-hash manifest for incremental re-verification
+
+Each review tool stores, per state, a hash of the JSON `legal` object, a
+hash of the parsed matrix block and the last verification result. On the
+next run only states whose hashes changed are re-verified; the cached
+result is reused for the rest.
+"""
+import hashlib
+import json
+import os
+
+DEFAULT_MANIFEST_DIR = '.cache'
+
+
+def record_hash(obj):
+    """Stable SHA-256 of a JSON-serialisable object"""
+    encoded = json.dumps(obj, sort_keys=True, ensure_ascii=False).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def manifest_path(tool_name, manifest_dir=DEFAULT_MANIFEST_DIR):
+    return os.path.join(manifest_dir, f'{tool_name}-manifest.json')
+
+
+def load_manifest(path, version):
+    """Load manifest entries, or {} if missing, unreadable or from another version"""
+    try:
+        with open(path, 'r') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if manifest.get('version') != version:
+        return {}
+    return manifest.get('states', {})
+
+
+def save_manifest(path, version, entries):
+    """Atomically write manifest entries"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump({'version': version, 'states': entries}, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def filter_changed(states, matrix_index, entries, hashes, reused):
+    """Yield only the states whose hashes differ from the manifest
+
+    Consumes states lazily. As a side effect, hashes[state_name] receives
+    the current hashes of every state and reused[state_name] the cached
+    result of every unchanged state.
+    """
+    for state in states:
+        state_name = state['state']
+        current = {
+            'json': record_hash(state['legal']),
+            'matrix': record_hash(matrix_index.get(state_name)),
+        }
+        hashes[state_name] = current
+
+        entry = entries.get(state_name)
+        if entry and entry['json'] == current['json'] and entry['matrix'] == current['matrix']:
+            reused[state_name] = entry['result']
+        else:
+            yield state
+
+
+def build_entries(hashes, results):
+    """Combine current hashes with verification results for saving"""
+    return {state_name: dict(hashes[state_name], result=result)
+            for state_name, result in results.items()}